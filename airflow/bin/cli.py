@@ -60,6 +60,7 @@ from airflow.models.connection import Connection
 from airflow.models.dagpickle import DagPickle
 from airflow.ti_deps.dep_context import (DepContext, SCHEDULER_DEPS)
 from airflow.utils import cli as cli_utils, db
+from airflow.utils.configuration import is_configuration_snapshot
 from airflow.utils.net import get_hostname
 from airflow.utils.log.logging_mixin import (LoggingMixin, redirect_stderr,
                                              redirect_stdout)
@@ -137,8 +138,55 @@ def process_subdir(subdir):
         return subdir
 
 
+def _get_dag_fileloc(dag_id, dag_folder):
+    """
+    Returns the file the DAG was last loaded from by the scheduler, as recorded
+    in the dag table, if this file would be collected from the DAG folder.
+    """
+    dag_folder = dag_folder or settings.DAGS_FOLDER
+    if os.path.isfile(dag_folder):
+        # Only this file is parsed anyway
+        return None
+
+    # The id of a subdag is the id of its parent DAG followed by the task id.
+    # The file of the root DAG defines the subdags too, which may be created
+    # by functions of other files.
+    parts = dag_id.split('.')
+    candidates = ['.'.join(parts[:i]) for i in range(1, len(parts) + 1)]
+    with db.create_session() as session:
+        orm_dags = session.query(DagModel.dag_id, DagModel.fileloc).filter(
+            DagModel.dag_id.in_(candidates)
+        ).all()
+    if not orm_dags:
+        return None
+    fileloc = min(orm_dags, key=lambda orm_dag: len(orm_dag.dag_id)).fileloc
+    if not fileloc or not os.path.isfile(fileloc):
+        return None
+
+    folders = [dag_folder]
+    if conf.getboolean('core', 'LOAD_EXAMPLES'):
+        import airflow.example_dags
+        folders.append(airflow.example_dags.__path__[0])
+    fileloc = os.path.realpath(fileloc)
+    for folder in folders:
+        if fileloc.startswith(os.path.join(os.path.realpath(folder), '')):
+            return fileloc
+    return None
+
+
 def get_dag(args):
-    dagbag = DagBag(process_subdir(args.subdir))
+    dag_folder = process_subdir(args.subdir)
+    fileloc = _get_dag_fileloc(args.dag_id, dag_folder)
+    if fileloc:
+        # Parse only the file defining the DAG rather than the whole folder,
+        # falling back on the folder if the DAG moved to another file
+        dagbag = DagBag(fileloc, include_examples=False)
+        if args.dag_id in dagbag.dags:
+            return dagbag.dags[args.dag_id]
+        log.info('%s not found in %s, filling up the DagBag from %s',
+                 args.dag_id, fileloc, dag_folder or settings.DAGS_FOLDER)
+
+    dagbag = DagBag(dag_folder)
     if args.dag_id not in dagbag.dags:
         raise AirflowException(
             'dag_id could not be found: {}. Either the dag did not exist or it failed to '
@@ -446,9 +494,7 @@ def _run(args, dag, ti):
             try:
                 # Running remotely, so pickling the DAG
                 with db.create_session() as session:
-                    pickle = DagPickle(dag)
-                    session.add(pickle)
-                    pickle_id = pickle.id
+                    pickle_id = dag.pickle(session).id
                     # TODO: This should be written to a log
                     print('Pickled dag {dag} as pickle_id:{pickle_id}'.format(**locals()))
             except Exception as e:
@@ -484,7 +530,8 @@ def run(args, dag=None):
         with open(args.cfg_path, 'r') as conf_file:
             conf_dict = json.load(conf_file)
 
-        if os.path.exists(args.cfg_path):
+        if (os.path.exists(args.cfg_path) and
+                not is_configuration_snapshot(args.cfg_path)):
             os.remove(args.cfg_path)
 
         conf.conf.read_dict(conf_dict, source=args.cfg_path)
@@ -494,17 +541,19 @@ def run(args, dag=None):
     # behind multiple open sleeping connections while heartbeating, which could
     # easily exceed the database connection limit when
     # processing hundreds of simultaneous tasks.
-    settings.configure_orm(disable_connection_pool=True)
+    # The connections may be borrowed from a local pooler instead, if
+    # [core] task_sql_alchemy_conn points at one.
+    settings.configure_orm(disable_connection_pool=True,
+                           sql_alchemy_conn=settings.TASK_SQL_ALCHEMY_CONN)
 
     if not args.pickle and not dag:
         dag = get_dag(args)
     elif not dag:
         with db.create_session() as session:
             log.info('Loading pickle id {args.pickle}'.format(args=args))
-            dag_pickle = session.query(DagPickle).filter(DagPickle.id == args.pickle).first()
-            if not dag_pickle:
+            dag = DagPickle.load(args.pickle, session=session)
+            if not dag:
                 raise AirflowException("Who hid the pickle!? [missing pickle]")
-            dag = dag_pickle.pickle
 
     task = dag.get_task(task_id=args.task_id)
     ti = TaskInstance(task, args.execution_date)
@@ -995,6 +1044,24 @@ def scheduler(args):
         job.run()
 
 
+def _parse_byte_range(range_header):
+    """
+    Parses a Range header asking for a single range of bytes, as
+    ``bytes=start-end`` or ``bytes=start-``.
+
+    :return: (start, end) with end None when open, or None if the header is
+        missing or asks for something else
+    """
+    match = re.match(r'^bytes=(\d+)-(\d*)$', (range_header or '').strip())
+    if not match:
+        return None
+    start = int(match.group(1))
+    end = int(match.group(2)) if match.group(2) else None
+    if end is not None and end < start:
+        return None
+    return start, end
+
+
 @cli_utils.action_logging
 def serve_logs(args):
     print("Starting flask")
@@ -1004,11 +1071,37 @@ def serve_logs(args):
     @flask_app.route('/log/<path:filename>')
     def serve_logs(filename):
         log = os.path.expanduser(conf.get('core', 'BASE_LOG_FOLDER'))
-        return flask.send_from_directory(
-            log,
-            filename,
+        byte_range = _parse_byte_range(flask.request.headers.get('Range'))
+        if byte_range is None:
+            return flask.send_from_directory(
+                log,
+                filename,
+                mimetype="application/json",
+                as_attachment=False)
+
+        # Webservers read logs in chunks, only send the requested bytes
+        path = flask.safe_join(log, filename)
+        if not os.path.isfile(path):
+            flask.abort(404)
+        start, end = byte_range
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if start >= size:
+                return flask.Response(
+                    status=416,
+                    headers={'Content-Range': 'bytes */{}'.format(size)})
+            end = size - 1 if end is None else min(end, size - 1)
+            f.seek(start)
+            data = f.read(end - start + 1)
+        return flask.Response(
+            data,
+            status=206,
             mimetype="application/json",
-            as_attachment=False)
+            headers={
+                'Accept-Ranges': 'bytes',
+                'Content-Range': 'bytes {}-{}/{}'.format(start, end, size),
+            })
 
     WORKER_LOG_SERVER_PORT = \
         int(conf.get('celery', 'WORKER_LOG_SERVER_PORT'))
@@ -122,6 +122,7 @@ class AirflowConfigParser(ConfigParser):
     # is to not store password on boxes in text files.
     as_command_stdout = {
         ('core', 'sql_alchemy_conn'),
+        ('core', 'task_sql_alchemy_conn'),
         ('core', 'fernet_key'),
         ('celery', 'broker_url'),
         ('celery', 'result_backend'),
@@ -150,7 +150,7 @@ class GoogleCloudStorageHook(GoogleCloudBaseHook):
             raise
 
     # pylint:disable=redefined-builtin
-    def download(self, bucket, object, filename=None):
+    def download(self, bucket, object, filename=None, offset=None, length=None):
         """
         Get a file from Google Cloud Storage.
 
@@ -160,12 +160,20 @@ class GoogleCloudStorageHook(GoogleCloudBaseHook):
         :type object: str
         :param filename: If set, a local file path where the file should be written to.
         :type filename: str
+        :param offset: If set, only fetch the object from this byte offset on.
+        :type offset: int
+        :param length: If set, fetch at most this many bytes.
+        :type length: int
         """
         service = self.get_conn()
-        downloaded_file_bytes = service \
+        request = service \
             .objects() \
-            .get_media(bucket=bucket, object=object) \
-            .execute()
+            .get_media(bucket=bucket, object=object)
+        if offset is not None or length is not None:
+            start = offset or 0
+            end = start + length - 1 if length is not None else ''
+            request.headers['Range'] = 'bytes={}-{}'.format(start, end)
+        downloaded_file_bytes = request.execute()
 
         # Write the file to local file path, if requested.
         if filename:
@@ -338,6 +346,49 @@ class GoogleCloudStorageHook(GoogleCloudBaseHook):
                 return False
             raise
 
+    def compose(self, bucket, source_objects, destination_object):
+        """
+        Composes a list of existing objects into a new object in the same
+        storage bucket, concatenating them server side in the given order.
+
+        Currently it only supports up to 32 objects that can be concatenated
+        in a single operation.
+
+        https://cloud.google.com/storage/docs/json_api/v1/objects/compose
+
+        :param bucket: The name of the bucket containing the source objects.
+            This is also the same bucket to store the composed destination object.
+        :type bucket: str
+        :param source_objects: The list of source objects that will be composed
+            into a single object.
+        :type source_objects: list
+        :param destination_object: The path of the object if given.
+        :type destination_object: str
+        """
+        if not source_objects:
+            raise ValueError('source_objects cannot be empty.')
+
+        if not bucket or not destination_object:
+            raise ValueError('bucket and destination_object cannot be empty.')
+
+        service = self.get_conn()
+
+        dict_source_objects = [{'name': source_object}
+                               for source_object in source_objects]
+        body = {
+            'sourceObjects': dict_source_objects
+        }
+
+        self.log.info("Composing %s to %s in the bucket %s",
+                      source_objects, destination_object, bucket)
+        service \
+            .objects() \
+            .compose(destinationBucket=bucket,
+                     destinationObject=destination_object,
+                     body=body) \
+            .execute()
+        self.log.info("Completed successfully.")
+
     def list(self, bucket, versions=None, maxResults=None, prefix=None, delimiter=None):
         """
         List all objects from the bucket with the give string prefix in name
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import heapq
+
+from airflow.exceptions import AirflowDagCycleException
+
+
+class DagGraphIndex(object):
+    """
+    Read-only index of the dependencies between the tasks of a DAG, used to
+    answer topology queries without walking the task objects.
+
+    Tasks are numbered in the order of ``task_dict``. The index keeps the
+    adjacency lists of these numbers, and computes on first use the
+    topological order and the ancestors and descendants of every task, the
+    latter as integer bitsets. The DAG drops its index whenever a task or a
+    dependency is added.
+
+    :param task_dict: the tasks of the DAG, keyed by task_id
+    :type task_dict: dict
+    """
+
+    def __init__(self, task_dict):
+        self.task_dict = task_dict
+        self.task_ids = list(task_dict)
+        self.positions = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        positions = self.positions
+        self.upstream = [
+            [positions[t] for t in task_dict[task_id].upstream_task_ids if t in positions]
+            for task_id in self.task_ids
+        ]
+        self.downstream = [
+            [positions[t] for t in task_dict[task_id].downstream_task_ids if t in positions]
+            for task_id in self.task_ids
+        ]
+        self._topological_order = None
+        self._relatives = {}
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def is_current(self, task_dict):
+        """
+        Whether the index still describes ``task_dict``.
+        """
+        return task_dict is self.task_dict and len(task_dict) == len(self.task_ids)
+
+    def find_cycle(self):
+        """
+        Looks for a cycle with an iterative depth first search.
+
+        :return: an edge closing a cycle, as a pair of task_ids, or None
+        """
+        new, in_progress, done = 0, 1, 2
+        visit = [new] * len(self.task_ids)
+        for root in range(len(self.task_ids)):
+            if visit[root] != new:
+                continue
+            visit[root] = in_progress
+            stack = [(root, iter(self.downstream[root]))]
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if visit[child] == in_progress:
+                        return self.task_ids[node], self.task_ids[child]
+                    if visit[child] == new:
+                        visit[child] = in_progress
+                        stack.append((child, iter(self.downstream[child])))
+                        break
+                else:
+                    visit[node] = done
+                    stack.pop()
+        return None
+
+    def check_cycle(self):
+        """
+        Raises AirflowDagCycleException if the dependencies have a cycle.
+        """
+        edge = self.find_cycle()
+        if edge:
+            raise AirflowDagCycleException(
+                "Cycle detected in DAG. Faulty task: {0} to {1}".format(*edge))
+
+    @property
+    def topological_order(self):
+        """
+        Positions of the tasks such that each task comes after all of its
+        upstream tasks. Among the tasks ready at the same time, the one that
+        comes first in the DAG comes first.
+
+        :return: the positions, or None if the dependencies have a cycle
+        """
+        if self._topological_order is None:
+            pending = [len(upstream) for upstream in self.upstream]
+            ready = [i for i, count in enumerate(pending) if count == 0]
+            order = []
+            while ready:
+                node = heapq.heappop(ready)
+                order.append(node)
+                for child in self.downstream[node]:
+                    pending[child] -= 1
+                    if pending[child] == 0:
+                        heapq.heappush(ready, child)
+            if len(order) != len(self.task_ids):
+                return None
+            self._topological_order = order
+        return self._topological_order
+
+    def _relative_bitsets(self, upstream):
+        bitsets = self._relatives.get(upstream)
+        if bitsets is None:
+            order = self.topological_order
+            if order is None:
+                self.check_cycle()
+            edges = self.upstream if upstream else self.downstream
+            if not upstream:
+                order = reversed(order)
+            bitsets = [0] * len(self.task_ids)
+            # Relatives of a task are its direct relatives and theirs, which
+            # were computed before it in this order.
+            for node in order:
+                bits = 0
+                for relative in edges[node]:
+                    bits |= bitsets[relative] | (1 << relative)
+                bitsets[node] = bits
+            self._relatives[upstream] = bitsets
+        return bitsets
+
+    def relative_ids(self, task_id, upstream=False):
+        """
+        :return: the ids of all the tasks upstream (ancestors) or downstream
+            (descendants) of the task
+        :rtype: set
+        """
+        bits = self._relative_bitsets(upstream)[self.positions[task_id]]
+        relative_ids = set()
+        while bits:
+            lowest = bits & -bits
+            relative_ids.add(self.task_ids[lowest.bit_length() - 1])
+            bits ^= lowest
+        return relative_ids
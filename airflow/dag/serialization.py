@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Serialization of DAGs into JSON documents holding their structure (tasks,
+dependencies, schedule and template fields), so that DAGs can be stored
+and displayed without executing the DAG files that define them.
+"""
+
+import datetime
+import hashlib
+import inspect
+import json
+
+import pendulum
+import six
+from dateutil import relativedelta
+from pendulum.tz.timezone import FixedTimezone
+
+from airflow.models import BaseOperator, DAG
+from airflow.utils import timezone
+
+# Keys marking values JSON can not represent natively.
+TYPE = '__type'
+VAR = '__var'
+
+# Version of the serialization format, bumped on incompatible changes.
+SERIALIZATION_VERSION = 1
+
+_RELATIVEDELTA_FIELDS = (
+    'years', 'months', 'days', 'leapdays', 'hours', 'minutes', 'seconds',
+    'microseconds', 'year', 'month', 'day', 'hour', 'minute', 'second',
+    'microsecond',
+)
+
+# Attributes of the DAG kept in the serialized form.
+_DAG_FIELDS = (
+    '_description', 'schedule_interval', '_schedule_interval', 'start_date',
+    'end_date', 'fileloc', '_full_filepath', '_concurrency',
+    'max_active_runs', 'dagrun_timeout', '_default_view', 'orientation',
+    'catchup', 'is_subdag', 'params', 'default_args', 'template_searchpath',
+)
+
+# Attributes of operators kept in the serialized form, on top of their
+# template fields.
+_OPERATOR_FIELDS = (
+    'owner', 'email', 'email_on_retry', 'email_on_failure', 'retries',
+    'retry_delay', 'retry_exponential_backoff', 'max_retry_delay',
+    'start_date', 'end_date', 'depends_on_past', 'wait_for_downstream',
+    'adhoc', 'priority_weight', 'weight_rule', 'queue', 'pool', 'sla',
+    'execution_timeout', 'trigger_rule', 'run_as_user', 'task_concurrency',
+    'executor_config', 'do_xcom_push', 'params', 'ui_color', 'ui_fgcolor',
+    'template_fields', 'template_ext',
+)
+
+# Documentation and code attributes displayed by the webserver.
+_OPERATOR_DISPLAY_FIELDS = (
+    'doc', 'doc_md', 'doc_json', 'doc_yaml', 'doc_rst', 'python_callable',
+)
+
+
+def _serialize_timezone(tz):
+    name = getattr(tz, 'name', None)
+    if name is None:
+        name = pendulum.instance(datetime.datetime.utcnow(), tz).tzinfo.name
+    return name
+
+
+def _deserialize_timezone(name):
+    if name and name[0] in '+-':
+        hours, minutes = name[1:].split(':')
+        offset = int(hours) * 3600 + int(minutes) * 60
+        return FixedTimezone(-offset if name[0] == '-' else offset)
+    return pendulum.timezone(name)
+
+
+def serialize_value(value):
+    """
+    Converts a value into something ``json.dumps`` can encode. Values of
+    types JSON can not represent are wrapped into a dict tagged with their
+    type, values of unknown types are kept as strings.
+    """
+    if value is None or isinstance(value, (bool, float) + six.integer_types):
+        return value
+    elif isinstance(value, six.string_types):
+        return value
+    elif isinstance(value, dict):
+        return {TYPE: 'dict',
+                VAR: {str(k): serialize_value(v) for k, v in value.items()}}
+    elif isinstance(value, list):
+        return [serialize_value(v) for v in value]
+    elif isinstance(value, tuple):
+        return {TYPE: 'tuple', VAR: [serialize_value(v) for v in value]}
+    elif isinstance(value, (set, frozenset)):
+        return {TYPE: 'set',
+                VAR: sorted((serialize_value(v) for v in value), key=repr)}
+    elif isinstance(value, datetime.datetime):
+        return {TYPE: 'datetime',
+                VAR: timezone.convert_to_utc(value).isoformat()}
+    elif isinstance(value, datetime.timedelta):
+        return {TYPE: 'timedelta', VAR: value.total_seconds()}
+    elif isinstance(value, relativedelta.relativedelta):
+        var = {f: getattr(value, f) for f in _RELATIVEDELTA_FIELDS
+               if getattr(value, f)}
+        if value.weekday is not None:
+            var['weekday'] = [value.weekday.weekday, value.weekday.n]
+        return {TYPE: 'relativedelta', VAR: var}
+    elif isinstance(value, datetime.tzinfo):
+        return {TYPE: 'timezone', VAR: _serialize_timezone(value)}
+    elif callable(value):
+        # Functions are only kept for display, as their qualified name,
+        # which unlike their repr does not change between parses.
+        return '{}.{}'.format(getattr(value, '__module__', ''),
+                              getattr(value, '__name__', type(value).__name__))
+    return str(value)
+
+
+def deserialize_value(value):
+    """
+    Reverses :func:`serialize_value`.
+    """
+    if isinstance(value, list):
+        return [deserialize_value(v) for v in value]
+    elif not isinstance(value, dict):
+        return value
+
+    type_, var = value[TYPE], value[VAR]
+    if type_ == 'dict':
+        return {k: deserialize_value(v) for k, v in var.items()}
+    elif type_ == 'tuple':
+        return tuple(deserialize_value(v) for v in var)
+    elif type_ == 'set':
+        return set(deserialize_value(v) for v in var)
+    elif type_ == 'datetime':
+        return timezone.parse(var)
+    elif type_ == 'timedelta':
+        return datetime.timedelta(seconds=var)
+    elif type_ == 'relativedelta':
+        var = dict(var)
+        if 'weekday' in var:
+            weekday, n = var['weekday']
+            var['weekday'] = relativedelta.weekday(weekday, n)
+        return relativedelta.relativedelta(**var)
+    elif type_ == 'timezone':
+        return _deserialize_timezone(var)
+    raise ValueError('Unknown serialized type {}'.format(type_))
+
+
+class SerializedBaseOperator(BaseOperator):
+    """
+    Stand-in for an operator rebuilt from its serialized form. It carries
+    the attributes needed to display and schedule the task, but not the
+    code of the operator, so it can not be executed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(SerializedBaseOperator, self).__init__(*args, **kwargs)
+        self._task_type = 'BaseOperator'
+        self.subdag = None
+
+    @property
+    def task_type(self):
+        return self._task_type
+
+    def execute(self, context):
+        raise NotImplementedError(
+            'Task {} was loaded from a serialized DAG and can not be '
+            'executed.'.format(self.task_id))
+
+    @classmethod
+    def serialize_operator(cls, op):
+        """
+        Returns a JSON-compatible dict representing the operator.
+        """
+        data = {
+            'task_id': op.task_id,
+            'task_type': op.task_type,
+            'downstream_task_ids': sorted(op.downstream_task_ids),
+        }
+        fields = _OPERATOR_FIELDS + tuple(op.template_fields)
+        for field in fields + _OPERATOR_DISPLAY_FIELDS:
+            value = getattr(op, field, None)
+            if field == 'python_callable' and value is not None:
+                try:
+                    value = inspect.getsource(value)
+                except (IOError, TypeError):
+                    value = serialize_value(value)
+            if value is not None or field in fields:
+                data[field] = serialize_value(value)
+        subdag = getattr(op, 'subdag', None)
+        if isinstance(subdag, DAG):
+            data['subdag'] = SerializedDAG.serialize_dag(subdag)
+        return data
+
+    @classmethod
+    def deserialize_operator(cls, data):
+        """
+        Builds a :class:`SerializedBaseOperator` from the output of
+        :meth:`serialize_operator`.
+        """
+        op = cls(task_id=data['task_id'])
+        op._task_type = data['task_type']
+        op._downstream_task_ids = set(data['downstream_task_ids'])
+        for field, value in data.items():
+            if field in ('task_id', 'task_type', 'downstream_task_ids', 'subdag'):
+                continue
+            setattr(op, field, deserialize_value(value))
+        if 'subdag' in data:
+            op.subdag = SerializedDAG.deserialize_dag(data['subdag'])
+        return op
+
+
+class SerializedDAG(DAG):
+    """
+    A DAG rebuilt from its serialized form, made of
+    :class:`SerializedBaseOperator` tasks.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(SerializedDAG, self).__init__(*args, **kwargs)
+        self.parent_dag_id = None
+
+    @property
+    def subdags(self):
+        subdag_lst = []
+        for task in self.tasks:
+            if getattr(task, 'subdag', None) is not None:
+                subdag_lst.append(task.subdag)
+                subdag_lst += task.subdag.subdags
+        return subdag_lst
+
+    @classmethod
+    def serialize_dag(cls, dag):
+        """
+        Returns a JSON-compatible dict representing the DAG.
+        """
+        data = {
+            'version': SERIALIZATION_VERSION,
+            'dag_id': dag.dag_id,
+            'timezone': _serialize_timezone(dag.timezone),
+            'parent_dag_id': dag.parent_dag.dag_id if dag.parent_dag else None,
+            'tasks': [SerializedBaseOperator.serialize_operator(task)
+                      for task in sorted(dag.tasks, key=lambda t: t.task_id)],
+        }
+        for field in _DAG_FIELDS:
+            data[field] = serialize_value(getattr(dag, field, None))
+        return data
+
+    @classmethod
+    def deserialize_dag(cls, data):
+        """
+        Builds a :class:`SerializedDAG` from the output of
+        :meth:`serialize_dag`.
+        """
+        if data.get('version') != SERIALIZATION_VERSION:
+            raise ValueError('Unsupported serialization version {} for DAG {}'.format(
+                data.get('version'), data.get('dag_id')))
+        dag = cls(dag_id=data['dag_id'])
+        dag.timezone = _deserialize_timezone(data['timezone'])
+        dag.parent_dag_id = data['parent_dag_id']
+        for field in _DAG_FIELDS:
+            setattr(dag, field, deserialize_value(data[field]))
+
+        for task_data in data['tasks']:
+            task = SerializedBaseOperator.deserialize_operator(task_data)
+            # Start and end dates were already reconciled with the DAG's
+            # when the original DAG was built, do not go through add_task.
+            dag.task_dict[task.task_id] = task
+            task._dag = dag
+            if task.subdag is not None:
+                task.subdag.parent_dag = dag
+                task.subdag.is_subdag = True
+        for task in dag.tasks:
+            for downstream_task_id in task.downstream_task_ids:
+                dag.task_dict[downstream_task_id]._upstream_task_ids.add(task.task_id)
+        dag.task_count = len(dag.task_dict)
+        return dag
+
+    @classmethod
+    def to_json(cls, dag):
+        """
+        Serializes the DAG to a JSON string. The output is deterministic so
+        that it can be compared and hashed.
+        """
+        return json.dumps(cls.serialize_dag(dag), sort_keys=True)
+
+    @classmethod
+    def from_json(cls, serialized):
+        return cls.deserialize_dag(json.loads(serialized))
+
+    @staticmethod
+    def hash(serialized):
+        """
+        Content hash of a serialized DAG.
+        """
+        return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
@@ -31,6 +31,7 @@ from airflow import configuration
 from airflow.config_templates.default_celery import DEFAULT_CELERY_CONFIG
 from airflow.exceptions import AirflowException
 from airflow.executors.base_executor import BaseExecutor
+from airflow.utils.cli import can_fork_command, fork_and_run
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.module_loading import import_string
 from airflow.utils.timeout import timeout
@@ -61,6 +62,14 @@ app = Celery(
 def execute_command(command_to_exec):
     log = LoggingMixin().log
     log.info("Executing command in Celery: %s", command_to_exec)
+    if can_fork_command(command_to_exec):
+        # The worker process of Celery already has Airflow imported
+        return_code = fork_and_run(command_to_exec)
+        if return_code != 0:
+            log.error('execute_command failed with exit code %s', return_code)
+            raise AirflowException('Celery command failed')
+        return
+
     env = os.environ.copy()
     try:
         subprocess.check_call(command_to_exec, stderr=subprocess.STDOUT,
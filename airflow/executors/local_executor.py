@@ -51,6 +51,7 @@ import time
 from builtins import range
 
 from airflow.executors.base_executor import BaseExecutor
+from airflow.utils.cli import can_fork_command, fork_and_run
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.state import State
 
@@ -82,6 +83,15 @@ class LocalWorker(multiprocessing.Process, LoggingMixin):
         if key is None:
             return
         self.log.info("%s running %s", self.__class__.__name__, command)
+        if can_fork_command(command):
+            return_code = fork_and_run(command)
+            if return_code == 0:
+                state = State.SUCCESS
+            else:
+                state = State.FAILED
+                self.log.error("Failed to execute task, exit code %s.", return_code)
+            self.result_queue.put((key, state))
+            return
         try:
             subprocess.check_call(command, close_fds=True)
             state = State.SUCCESS
@@ -94,7 +104,6 @@ class LocalWorker(multiprocessing.Process, LoggingMixin):
 
     def run(self):
         self.execute_work(self.key, self.command)
-        time.sleep(1)
 
 
 class QueuedLocalWorker(LocalWorker):
@@ -116,7 +125,6 @@ class QueuedLocalWorker(LocalWorker):
                 break
             self.execute_work(key, command)
             self.task_queue.task_done()
-            time.sleep(1)
 
 
 class LocalExecutor(BaseExecutor):
@@ -35,7 +35,7 @@ from time import sleep
 
 import six
 from past.builtins import basestring
-from sqlalchemy import (Column, Index, Integer, String, and_, func, not_, or_)
+from sqlalchemy import (Column, Index, Integer, String, and_, case, func, not_, or_)
 from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm.session import make_transient
 
@@ -43,7 +43,7 @@ from airflow import configuration as conf
 from airflow import executors, models, settings
 from airflow.exceptions import AirflowException
 from airflow.models import DAG, DagRun, errors
-from airflow.models.dagpickle import DagPickle
+from airflow.models.serialized_dag import SerializedDagModel
 from airflow.settings import Stats
 from airflow.task.task_runner import get_task_runner
 from airflow.ti_deps.dep_context import DepContext, QUEUE_DEPS, RUN_DEPS
@@ -54,6 +54,7 @@ from airflow.utils.dag_processing import (AbstractDagFileProcessor,
                                           SimpleDag,
                                           SimpleDagBag,
                                           SimpleTaskInstance,
+                                          TaskInstanceRow,
                                           list_py_file_paths)
 from airflow.utils.db import create_session, provide_session
 from airflow.utils.email import get_email_address_list, send_email
@@ -110,6 +111,8 @@ class BaseJob(Base, LoggingMixin):
         self.heartrate = heartrate
         self.unixname = getpass.getuser()
         self.max_tis_per_query = conf.getint('scheduler', 'max_tis_per_query')
+        self.max_dagruns_to_create_per_loop = conf.getint(
+            'scheduler', 'max_dagruns_to_create_per_loop')
         super(BaseJob, self).__init__(*args, **kwargs)
 
     def is_alive(self):
@@ -159,33 +162,33 @@ class BaseJob(Base, LoggingMixin):
         sleep at all.
         """
         try:
-            with create_session() as session:
-                job = session.query(BaseJob).filter_by(id=self.id).one()
-                make_transient(job)
-                session.commit()
-
-            if job.state == State.SHUTDOWN:
-                self.kill()
-
             # Figure out how long to sleep for
             sleep_for = 0
-            if job.latest_heartbeat:
+            if self.latest_heartbeat:
                 sleep_for = max(
                     0,
                     self.heartrate - (timezone.utcnow() -
-                                      job.latest_heartbeat).total_seconds())
+                                      self.latest_heartbeat).total_seconds())
 
             sleep(sleep_for)
 
-            # Update last heartbeat time
+            # Check the state and update last heartbeat time with a single
+            # connection
             with create_session() as session:
-                job = session.query(BaseJob).filter(BaseJob.id == self.id).first()
-                job.latest_heartbeat = timezone.utcnow()
-                session.merge(job)
-                session.commit()
+                job_state = session.query(BaseJob.state).filter(
+                    BaseJob.id == self.id).scalar()
+                if job_state != State.SHUTDOWN:
+                    self.latest_heartbeat = timezone.utcnow()
+                    session.query(BaseJob).filter(BaseJob.id == self.id).update(
+                        {BaseJob.latest_heartbeat: self.latest_heartbeat},
+                        synchronize_session=False)
+                    session.commit()
+
+                    self.heartbeat_callback(session=session)
+                    self.log.debug('[heartbeat]')
 
-                self.heartbeat_callback(session=session)
-                self.log.debug('[heartbeat]')
+            if job_state == State.SHUTDOWN:
+                self.kill()
         except OperationalError as e:
             self.log.error("Scheduler heartbeat got an exception: %s", str(e))
 
@@ -242,10 +245,11 @@ class BaseJob(Base, LoggingMixin):
         resettable_states = [State.SCHEDULED, State.QUEUED]
         TI = models.TaskInstance
         DR = models.DagRun
+        # only the keys are needed to find the orphans, the task instances
+        # themselves are locked and loaded below
         if filter_by_dag_run is None:
-            resettable_tis = (
-                session
-                .query(TI)
+            resettable_tis = TaskInstanceRow.from_query(
+                TaskInstanceRow.query(session)
                 .join(
                     DR,
                     and_(
@@ -254,10 +258,16 @@ class BaseJob(Base, LoggingMixin):
                 .filter(
                     DR.state == State.RUNNING,
                     DR.run_id.notlike(BackfillJob.ID_PREFIX + '%'),
-                    TI.state.in_(resettable_states))).all()
+                    TI.state.in_(resettable_states)))
         else:
-            resettable_tis = filter_by_dag_run.get_task_instances(state=resettable_states,
-                                                                  session=session)
+            qry = TaskInstanceRow.query(session).filter(
+                TI.dag_id == filter_by_dag_run.dag_id,
+                TI.execution_date == filter_by_dag_run.execution_date,
+                TI.state.in_(resettable_states))
+            dag = filter_by_dag_run.dag
+            if dag and dag.partial:
+                qry = qry.filter(TI.task_id.in_(dag.task_ids))
+            resettable_tis = TaskInstanceRow.from_query(qry)
         tis_to_reset = []
         # Can't use an update here since it doesn't support joins
         for ti in resettable_tis:
@@ -623,7 +633,7 @@ class SchedulerJob(BaseJob):
             return
 
         TI = models.TaskInstance
-        sq = (
+        max_tis = (
             session
             .query(
                 TI.task_id,
@@ -634,31 +644,27 @@ class SchedulerJob(BaseJob):
                 TI.state == State.SUCCESS,
                 TI.state == State.SKIPPED))
             .filter(TI.task_id.in_(dag.task_ids))
-            .group_by(TI.task_id).subquery('sq')
+            .group_by(TI.task_id)
+            .all()
         )
 
-        max_tis = session.query(TI).filter(
-            TI.dag_id == dag.dag_id,
-            TI.task_id == sq.c.task_id,
-            TI.execution_date == sq.c.max_ti,
-        ).all()
-
         ts = timezone.utcnow()
         SlaMiss = models.SlaMiss
-        for ti in max_tis:
-            task = dag.get_task(ti.task_id)
-            dttm = ti.execution_date
-            if task.sla:
-                dttm = dag.following_schedule(dttm)
-                while dttm < timezone.utcnow():
-                    following_schedule = dag.following_schedule(dttm)
-                    if following_schedule + task.sla < timezone.utcnow():
-                        session.merge(models.SlaMiss(
-                            task_id=ti.task_id,
-                            dag_id=ti.dag_id,
-                            execution_date=dttm,
-                            timestamp=ts))
-                    dttm = dag.following_schedule(dttm)
+        sla_misses = self._find_sla_misses(dag, max_tis, ts)
+        if sla_misses:
+            # Only insert the misses not recorded yet, in one statement
+            recorded = set(
+                session
+                .query(SlaMiss.task_id, SlaMiss.execution_date)
+                .filter(SlaMiss.dag_id == dag.dag_id)
+                .filter(SlaMiss.execution_date >= min(d for _, d in sla_misses))
+            )
+            session.bulk_insert_mappings(SlaMiss, [
+                {'task_id': task_id, 'dag_id': dag.dag_id, 'execution_date': dttm,
+                 'timestamp': ts, 'email_sent': False, 'notification_sent': False}
+                for task_id, dttm in sla_misses
+                if (task_id, dttm) not in recorded
+            ])
         session.commit()
 
         slas = (
@@ -681,12 +687,12 @@ class SchedulerJob(BaseJob):
             )
             blocking_tis = []
             for ti in qry:
-                if ti.task_id in dag.task_ids:
+                if dag.has_task(ti.task_id):
                     ti.task = dag.get_task(ti.task_id)
                     blocking_tis.append(ti)
                 else:
                     session.delete(ti)
-                    session.commit()
+            session.commit()
 
             task_list = "\n".join([
                 sla.task_id + ' on ' + sla.execution_date.isoformat()
@@ -738,9 +744,43 @@ class SchedulerJob(BaseJob):
                     if email_sent:
                         sla.email_sent = True
                     sla.notification_sent = True
-                    session.merge(sla)
             session.commit()
 
+    @staticmethod
+    def _find_sla_misses(dag, max_tis, now):
+        """
+        Finds the schedules for which tasks with an SLA missed it, following
+        the latest successful or skipped run of each task.
+
+        :param dag: the DAG of the tasks
+        :param max_tis: pairs of task_id and latest successful execution date
+        :param now: the current time
+        :return: the (task_id, execution_date) pairs that missed their SLA
+        :rtype: list
+        """
+        # The schedules after a date are listed once and shared by all the
+        # tasks that last succeeded at that date.
+        schedules_after = {}
+        sla_misses = []
+        for task_id, max_ti in max_tis:
+            task = dag.get_task(task_id)
+            if not task.sla:
+                continue
+            if max_ti not in schedules_after:
+                schedules = []
+                for dttm in dag.iter_following_schedules(max_ti):
+                    schedules.append(dttm)
+                    if dttm >= now:
+                        break
+                schedules_after[max_ti] = schedules
+            schedules = schedules_after[max_ti]
+            # A schedule missed its SLA if the SLA passed after the end of its
+            # schedule period, which is the following schedule.
+            for dttm, following_schedule in zip(schedules, schedules[1:]):
+                if following_schedule + task.sla < now:
+                    sla_misses.append((task_id, dttm))
+        return sla_misses
+
     @staticmethod
     def update_import_errors(session, dagbag):
         """
@@ -773,20 +813,81 @@ class SchedulerJob(BaseJob):
         for a DAG based on scheduling interval.
         Returns DagRun if one is scheduled. Otherwise returns None.
         """
-        if dag.schedule_interval and conf.getboolean('scheduler', 'USE_JOB_SCHEDULE'):
+        dag_runs = self.create_dag_runs(dag, max_runs=1, session=session)
+        return dag_runs[0] if dag_runs else None
+
+    @staticmethod
+    @provide_session
+    def _get_dag_run_stats(dag_ids, session=None):
+        """
+        Fetches with one query, for several DAGs at once, what
+        create_dag_runs needs to know about their existing DagRuns.
+
+        :return: a tuple per dag_id of the number of active DagRuns that were
+            not externally triggered, the execution date of the last
+            scheduled DagRun and the one of the last DagRun that was not
+            externally triggered
+        :rtype: dict
+        """
+        stats = {dag_id: (0, None, None) for dag_id in dag_ids}
+        if not stats:
+            return stats
+
+        not_external = DagRun.external_trigger == False  # noqa: E712
+        qry = (
+            session.query(
+                DagRun.dag_id,
+                func.sum(case([(and_(DagRun._state == State.RUNNING, not_external), 1)],
+                              else_=0)),
+                func.max(case([(or_(
+                    not_external,
+                    # add % as a wildcard for the like query
+                    DagRun.run_id.like(DagRun.ID_PREFIX + '%')
+                ), DagRun.execution_date)])),
+                func.max(case([(not_external, DagRun.execution_date)])),
+            )
+            .filter(DagRun.dag_id.in_(dag_ids))
+            .group_by(DagRun.dag_id)
+        )
+        for dag_id, num_active_runs, last_scheduled_run, last_run_date in qry:
+            stats[dag_id] = (int(num_active_runs or 0), last_scheduled_run, last_run_date)
+        return stats
+
+    @provide_session
+    def create_dag_runs(self, dag, max_runs=1, dag_run_stats=None, session=None):
+        """
+        This method checks whether new DagRuns need to be created for a DAG
+        based on scheduling interval, and creates the DagRuns of the schedules
+        that are due, up to max_runs and the max_active_runs of the DAG.
+
+        :param dag_run_stats: what _get_dag_run_stats returned for the DAG,
+            fetched if not given
+        :return: the DagRuns created
+        :rtype: list[DagRun]
+        """
+        if not (dag.schedule_interval and
+                conf.getboolean('scheduler', 'USE_JOB_SCHEDULE')):
+            return []
+
+        if dag_run_stats is None:
+            dag_run_stats = self._get_dag_run_stats([dag.dag_id],
+                                                    session=session)[dag.dag_id]
+        num_active_runs, last_scheduled_run, last_run_date = dag_run_stats
+
+        # return if already reached maximum active runs and no timeout setting
+        if num_active_runs >= dag.max_active_runs and not dag.dagrun_timeout:
+            return []
+        if num_active_runs and dag.dagrun_timeout:
             active_runs = DagRun.find(
                 dag_id=dag.dag_id,
                 state=State.RUNNING,
                 external_trigger=False,
                 session=session
             )
-            # return if already reached maximum active runs and no timeout setting
-            if len(active_runs) >= dag.max_active_runs and not dag.dagrun_timeout:
-                return
             timedout_runs = 0
             for dr in active_runs:
                 if (
-                        dr.start_date and dag.dagrun_timeout and
+                        dr.start_date and
                         dr.start_date < timezone.utcnow() - dag.dagrun_timeout):
                     dr.state = State.FAILED
                     dr.end_date = timezone.utcnow()
@@ -794,108 +895,110 @@ class SchedulerJob(BaseJob):
                                         session=session)
                     timedout_runs += 1
             session.commit()
-            if len(active_runs) - timedout_runs >= dag.max_active_runs:
-                return
-
-            # this query should be replaced by find dagrun
-            qry = (
-                session.query(func.max(DagRun.execution_date))
-                .filter_by(dag_id=dag.dag_id)
-                .filter(or_(
-                    DagRun.external_trigger == False,  # noqa: E712
-                    # add % as a wildcard for the like query
-                    DagRun.run_id.like(DagRun.ID_PREFIX + '%')
-                ))
-            )
-            last_scheduled_run = qry.scalar()
-
-            # don't schedule @once again
-            if dag.schedule_interval == '@once' and last_scheduled_run:
-                return None
-
-            # don't do scheduler catchup for dag's that don't have dag.catchup = True
-            if not (dag.catchup or dag.schedule_interval == '@once'):
-                # The logic is that we move start_date up until
-                # one period before, so that timezone.utcnow() is AFTER
-                # the period end, and the job can be created...
-                now = timezone.utcnow()
-                next_start = dag.following_schedule(now)
-                last_start = dag.previous_schedule(now)
-                if next_start <= now:
-                    new_start = last_start
-                else:
-                    new_start = dag.previous_schedule(last_start)
+            num_active_runs = len(active_runs) - timedout_runs
+        if num_active_runs >= dag.max_active_runs:
+            return []
 
-                if dag.start_date:
-                    if new_start >= dag.start_date:
-                        dag.start_date = new_start
-                else:
-                    dag.start_date = new_start
+        # don't schedule @once again
+        if dag.schedule_interval == '@once' and last_scheduled_run:
+            return []
 
-            next_run_date = None
-            if not last_scheduled_run:
-                # First run
-                task_start_dates = [t.start_date for t in dag.tasks]
-                if task_start_dates:
-                    next_run_date = dag.normalize_schedule(min(task_start_dates))
-                    self.log.debug(
-                        "Next run date based on tasks %s",
-                        next_run_date
-                    )
+        # don't do scheduler catchup for dag's that don't have dag.catchup = True
+        if not (dag.catchup or dag.schedule_interval == '@once'):
+            # The logic is that we move start_date up until
+            # one period before, so that timezone.utcnow() is AFTER
+            # the period end, and the job can be created...
+            now = timezone.utcnow()
+            next_start = dag.following_schedule(now)
+            last_start = dag.previous_schedule(now)
+            if next_start <= now:
+                new_start = last_start
             else:
-                next_run_date = dag.following_schedule(last_scheduled_run)
-
-            # make sure backfills are also considered
-            last_run = dag.get_last_dagrun(session=session)
-            if last_run and next_run_date:
-                while next_run_date <= last_run.execution_date:
-                    next_run_date = dag.following_schedule(next_run_date)
+                new_start = dag.previous_schedule(last_start)
 
-            # don't ever schedule prior to the dag's start_date
             if dag.start_date:
-                next_run_date = (dag.start_date if not next_run_date
-                                 else max(next_run_date, dag.start_date))
-                if next_run_date == dag.start_date:
-                    next_run_date = dag.normalize_schedule(dag.start_date)
-
+                if new_start >= dag.start_date:
+                    dag.start_date = new_start
+            else:
+                dag.start_date = new_start
+
+        next_run_date = None
+        if not last_scheduled_run:
+            # First run
+            task_start_dates = [t.start_date for t in dag.tasks]
+            if task_start_dates:
+                next_run_date = dag.normalize_schedule(min(task_start_dates))
                 self.log.debug(
-                    "Dag start date: %s. Next run date: %s",
-                    dag.start_date, next_run_date
+                    "Next run date based on tasks %s",
+                    next_run_date
                 )
+        else:
+            next_run_date = dag.following_schedule(last_scheduled_run)
 
+        # make sure backfills are also considered
+        if last_run_date and next_run_date:
+            while next_run_date <= last_run_date:
+                next_run_date = dag.following_schedule(next_run_date)
+
+        # don't ever schedule prior to the dag's start_date
+        if dag.start_date:
+            next_run_date = (dag.start_date if not next_run_date
+                             else max(next_run_date, dag.start_date))
+            if next_run_date == dag.start_date:
+                next_run_date = dag.normalize_schedule(dag.start_date)
+
+            self.log.debug(
+                "Dag start date: %s. Next run date: %s",
+                dag.start_date, next_run_date
+            )
+
+        # Get the min task end date, which may come from the dag.default_args
+        min_task_end_date = []
+        task_end_dates = [t.end_date for t in dag.tasks if t.end_date]
+        if task_end_dates:
+            min_task_end_date = min(task_end_dates)
+
+        max_runs = min(max_runs, dag.max_active_runs - num_active_runs)
+        now = timezone.utcnow()
+        run_dates = []
+        while next_run_date and len(run_dates) < max_runs:
             # don't ever schedule in the future
-            if next_run_date > timezone.utcnow():
-                return
+            if next_run_date > now:
+                break
 
             # this structure is necessary to avoid a TypeError from concatenating
             # NoneType
             if dag.schedule_interval == '@once':
                 period_end = next_run_date
-            elif next_run_date:
+            else:
                 period_end = dag.following_schedule(next_run_date)
 
             # Don't schedule a dag beyond its end_date (as specified by the dag param)
-            if next_run_date and dag.end_date and next_run_date > dag.end_date:
-                return
+            if dag.end_date and next_run_date > dag.end_date:
+                break
 
             # Don't schedule a dag beyond its end_date (as specified by the task params)
-            # Get the min task end date, which may come from the dag.default_args
-            min_task_end_date = []
-            task_end_dates = [t.end_date for t in dag.tasks if t.end_date]
-            if task_end_dates:
-                min_task_end_date = min(task_end_dates)
-            if next_run_date and min_task_end_date and next_run_date > min_task_end_date:
-                return
+            if min_task_end_date and next_run_date > min_task_end_date:
+                break
 
-            if next_run_date and period_end and period_end <= timezone.utcnow():
-                next_run = dag.create_dagrun(
-                    run_id=DagRun.ID_PREFIX + next_run_date.isoformat(),
-                    execution_date=next_run_date,
-                    start_date=timezone.utcnow(),
-                    state=State.RUNNING,
-                    external_trigger=False
-                )
-                return next_run
+            if not period_end or period_end > now:
+                break
+
+            run_dates.append(next_run_date)
+            if dag.schedule_interval == '@once':
+                break
+            next_run_date = period_end
+
+        if not run_dates:
+            return []
+        return dag.create_dagruns(
+            run_id_prefix=DagRun.ID_PREFIX,
+            execution_dates=run_dates,
+            start_date=timezone.utcnow(),
+            state=State.RUNNING,
+            external_trigger=False,
+            session=session
+        )
 
     @provide_session
     def _process_task_instances(self, dag, queue, session=None):
@@ -907,7 +1010,7 @@ class SchedulerJob(BaseJob):
 
         # update the state of the previously active dag runs
         dag_runs = DagRun.find(dag_id=dag.dag_id, state=State.RUNNING, session=session)
-        active_dag_runs = []
+        runs = []
         for run in dag_runs:
             self.log.info("Examining DAG run %s", run)
             # don't consider runs that are executed in the future
@@ -918,10 +1021,6 @@ class SchedulerJob(BaseJob):
                 )
                 continue
 
-            if len(active_dag_runs) >= dag.max_active_runs:
-                self.log.info("Active dag runs > max_active_run.")
-                continue
-
             # skip backfill dagruns for now as long as they are not really scheduled
             if run.is_backfill:
                 continue
@@ -930,17 +1029,28 @@ class SchedulerJob(BaseJob):
             run.dag = dag
             # todo: preferably the integrity check happens at dag collection time
             run.verify_integrity(session=session)
-            run.update_state(session=session)
+            runs.append(run)
+
+        # load the task instances of all the runs at once
+        tis_by_run = DagRun.get_task_instances_by_run(runs, session)
+        active_dag_runs = []
+        for run in runs:
+            if len(active_dag_runs) >= dag.max_active_runs:
+                self.log.info("Active dag runs > max_active_run.")
+                break
+
+            run.update_state(session=session, tis=tis_by_run[run.execution_date])
             if run.state == State.RUNNING:
                 make_transient(run)
                 active_dag_runs.append(run)
 
+        schedulable_states = (State.NONE, State.UP_FOR_RETRY, State.UP_FOR_RESCHEDULE)
         for run in active_dag_runs:
             self.log.debug("Examining active DAG run: %s", run)
-            # this needs a fresh session sometimes tis get detached
-            tis = run.get_task_instances(state=(State.NONE,
-                                                State.UP_FOR_RETRY,
-                                                State.UP_FOR_RESCHEDULE))
+            # reuse the task instances loaded above, update_state kept their
+            # states current
+            tis = [ti for ti in tis_by_run[run.execution_date]
+                   if ti.state in schedulable_states]
 
             # this loop is quite slow as it uses are_dependencies_met for
             # every task (in ti.is_runnable). This is also called in
@@ -1067,8 +1177,7 @@ class SchedulerJob(BaseJob):
         DR = models.DagRun
         DM = models.DagModel
         ti_query = (
-            session
-            .query(TI)
+            TaskInstanceRow.query(session)
             .filter(TI.dag_id.in_(simple_dag_bag.dag_ids))
             .outerjoin(
                 DR,
@@ -1087,7 +1196,7 @@ class SchedulerJob(BaseJob):
         else:
             ti_query = ti_query.filter(TI.state.in_(states))
 
-        task_instances_to_examine = ti_query.all()
+        task_instances_to_examine = TaskInstanceRow.from_query(ti_query)
 
         if len(task_instances_to_examine) == 0:
             self.log.debug("No tasks to consider for execution.")
@@ -1208,15 +1317,6 @@ class SchedulerJob(BaseJob):
             ["{}".format(x) for x in executable_tis])
         self.log.info(
             "Setting the following tasks to queued state:\n\t%s", task_instance_str)
-        # so these dont expire on commit
-        for ti in executable_tis:
-            copy_dag_id = ti.dag_id
-            copy_execution_date = ti.execution_date
-            copy_task_id = ti.task_id
-            make_transient(ti)
-            ti.dag_id = copy_dag_id
-            ti.execution_date = copy_execution_date
-            ti.task_id = copy_task_id
         return executable_tis
 
     @provide_session
@@ -1421,6 +1521,7 @@ class SchedulerJob(BaseJob):
         :type tis_out: multiprocessing.Queue[TaskInstance]
         :return: None
         """
+        dag_run_stats = self._get_dag_run_stats([dag.dag_id for dag in dags])
         for dag in dags:
             dag = dagbag.get_dag(dag.dag_id)
             if dag.is_paused:
@@ -1433,8 +1534,11 @@ class SchedulerJob(BaseJob):
 
             self.log.info("Processing %s", dag.dag_id)
 
-            dag_run = self.create_dag_run(dag)
-            if dag_run:
+            dag_runs = self.create_dag_runs(
+                dag,
+                max_runs=self.max_dagruns_to_create_per_loop,
+                dag_run_stats=dag_run_stats[dag.dag_id])
+            for dag_run in dag_runs:
                 self.log.info("Created %s", dag_run)
             self._process_task_instances(dag, tis_out)
             self.manage_slas(dag)
@@ -1711,6 +1815,12 @@ class SchedulerJob(BaseJob):
         # Save individual DAGs in the ORM and update DagModel.last_scheduled_time
         for dag in dagbag.dags.values():
             dag.sync_to_db()
+            # Subdags are serialized within their root DAG
+            if settings.STORE_SERIALIZED_DAGS and not dag.is_subdag:
+                try:
+                    SerializedDagModel.write_dag(dag)
+                except Exception:
+                    self.log.exception("Failed to serialize DAG %s", dag.dag_id)
 
         paused_dag_ids = [dag.dag_id for dag in dagbag.dags.values()
                           if dag.is_paused]
@@ -1722,9 +1832,9 @@ class SchedulerJob(BaseJob):
             if pickle_dags:
                 pickle_id = dag.pickle(session).id
 
-            # Only return DAGs that are not paused
-            if dag_id not in paused_dag_ids:
-                simple_dags.append(SimpleDag(dag, pickle_id=pickle_id))
+            # Paused DAGs are returned too, so that the zombies of their task
+            # instances are handled, but are not scheduled
+            simple_dags.append(SimpleDag(dag, pickle_id=pickle_id))
 
         if len(self.dag_ids) > 0:
             dags = [dag for dag in dagbag.dags.values()
@@ -2250,6 +2360,9 @@ class BackfillJob(BaseJob):
                                 cfg_path = None
                                 if executor.__class__ in (executors.LocalExecutor,
                                                           executors.SequentialExecutor):
+                                    # The command may wait in the executor queue
+                                    # for longer than a shared snapshot is kept,
+                                    # so it gets a copy of its own.
                                     cfg_path = tmp_configuration_copy()
 
                                 executor.queue_task_instance(
@@ -2431,10 +2544,7 @@ class BackfillJob(BaseJob):
         pickle_id = None
         if not self.donot_pickle and self.executor.__class__ not in (
                 executors.LocalExecutor, executors.SequentialExecutor):
-            pickle = DagPickle(self.dag)
-            session.add(pickle)
-            session.commit()
-            pickle_id = pickle.id
+            pickle_id = self.dag.pickle(session).id
 
         executor = self.executor
         executor.start()
@@ -2536,8 +2646,10 @@ class LocalTaskJob(BaseJob):
             heartbeat_time_limit = conf.getint('scheduler',
                                                'scheduler_zombie_task_threshold')
             while True:
-                # Monitor the task to see if it's done
-                return_code = self.task_runner.return_code()
+                # Monitor the task to see if it's done. Wait for it until the
+                # next heartbeat is due, so that its exit is noticed right away.
+                time_to_heartbeat = self.heartrate - (time.time() - last_heartbeat_time)
+                return_code = self.task_runner.wait(max(0, time_to_heartbeat))
                 if return_code is not None:
                     self.log.info("Task exited with return code %s", return_code)
                     return
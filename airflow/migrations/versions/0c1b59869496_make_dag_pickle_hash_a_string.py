@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""make dag pickle hash a string
+
+Revision ID: 0c1b59869496
+Revises: cd036e712a8c
+Create Date: 2019-03-28 11:42:05.381920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0c1b59869496'
+down_revision = 'cd036e712a8c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The pickle hash is now the hex digest of the content of the DAG. The
+    # former hashes were the ids of the DAG objects and are not reused.
+    op.execute('UPDATE dag_pickle SET pickle_hash = NULL')
+    # use batch_alter_table to support SQLite workaround
+    with op.batch_alter_table('dag_pickle') as batch_op:
+        batch_op.alter_column('pickle_hash', type_=sa.String(40),
+                              existing_nullable=True,
+                              postgresql_using='pickle_hash::varchar(40)')
+
+
+def downgrade():
+    op.execute('UPDATE dag_pickle SET pickle_hash = NULL')
+    # use batch_alter_table to support SQLite workaround
+    with op.batch_alter_table('dag_pickle') as batch_op:
+        batch_op.alter_column('pickle_hash', type_=sa.BigInteger(),
+                              existing_nullable=True,
+                              postgresql_using='pickle_hash::bigint')
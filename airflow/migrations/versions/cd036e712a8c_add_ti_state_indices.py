@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""add ti state indices for the scheduler queries
+
+Revision ID: cd036e712a8c
+Revises: d38e04c12aa2
+Create Date: 2019-03-20 10:14:37.218564
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'cd036e712a8c'
+down_revision = 'd38e04c12aa2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Counts of running and queued task instances per task, and the
+    # scheduled and queued task instances of the running dag runs.
+    op.create_index('ti_state_dag_task', 'task_instance',
+                    ['state', 'dag_id', 'task_id', 'execution_date'], unique=False)
+    # Running task instances and their jobs, for the zombie detection. On
+    # Postgres only the running task instances are indexed.
+    op.create_index('ti_state_job_id', 'task_instance', ['state', 'job_id'],
+                    unique=False, postgresql_where=sa.text("state = 'running'"))
+
+
+def downgrade():
+    op.drop_index('ti_state_job_id', table_name='task_instance')
+    op.drop_index('ti_state_dag_task', table_name='task_instance')
@@ -0,0 +1,59 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+
+"""add serialized_dag table
+
+Revision ID: d38e04c12aa2
+Revises: a56c9515abdc, dd4ecb8fbee3
+Create Date: 2019-03-05 11:32:15.461102
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+# revision identifiers, used by Alembic.
+revision = 'd38e04c12aa2'
+down_revision = ('a56c9515abdc', 'dd4ecb8fbee3')
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    conn = op.get_bind()
+    if conn.dialect.name == "mysql":
+        # Serialized DAGs can exceed the 64KB of the TEXT type
+        data_type = mysql.MEDIUMTEXT()
+        timestamp_type = mysql.TIMESTAMP(fsp=6)
+    else:
+        data_type = sa.Text()
+        timestamp_type = sa.TIMESTAMP(timezone=True)
+
+    op.create_table('serialized_dag',
+                    sa.Column('dag_id', sa.String(length=250), nullable=False),
+                    sa.Column('fileloc', sa.String(length=2000), nullable=False),
+                    sa.Column('data', data_type, nullable=False),
+                    sa.Column('dag_hash', sa.String(length=40), nullable=False),
+                    sa.Column('last_updated', timestamp_type, nullable=False),
+                    sa.PrimaryKeyConstraint('dag_id'))
+
+
+def downgrade():
+    op.drop_table('serialized_dag')
@@ -23,12 +23,12 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import copy
-from collections import defaultdict, namedtuple, OrderedDict
+from collections import Counter, defaultdict, namedtuple
 
 from builtins import ImportError as BuiltinImportError, bytes, object, str
 from future.standard_library import install_aliases
 
-from airflow.models.base import Base
+from airflow.models.base import Base, ID_LEN
 
 try:
     # Fix Python > 3.7 deprecation
@@ -65,7 +65,7 @@ from urllib.parse import quote
 from sqlalchemy import (
     Boolean, Column, DateTime, Float, ForeignKey, ForeignKeyConstraint, Index,
     Integer, LargeBinary, PickleType, String, Text, UniqueConstraint, and_, asc,
-    func, or_, true as sqltrue
+    case, func, not_, or_, text, true as sqltrue
 )
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.orm import reconstructor, relationship, synonym
@@ -83,10 +83,13 @@ from airflow.exceptions import (
     AirflowRescheduleException
 )
 from airflow.dag.base_dag import BaseDag, BaseDagBag
+from airflow.dag.graph_index import DagGraphIndex
 from airflow.lineage import apply_lineage, prepare_lineage
 from airflow.models.dagpickle import DagPickle
+from airflow.models.serialized_dag import SerializedDagModel
 from airflow.ti_deps.deps.not_in_retry_period_dep import NotInRetryPeriodDep
 from airflow.ti_deps.deps.prev_dagrun_dep import PrevDagrunDep
+from airflow.ti_deps.deps.ready_to_reschedule import ReadyToRescheduleDep
 from airflow.ti_deps.deps.trigger_rule_dep import TriggerRuleDep
 
 from airflow.ti_deps.dep_context import DepContext, QUEUE_DEPS, RUN_DEPS
@@ -109,7 +112,6 @@ from airflow.utils.log.logging_mixin import LoggingMixin
 
 install_aliases()
 
-ID_LEN = 250
 XCOM_RETURN_KEY = 'return_value'
 
 Stats = settings.Stats
@@ -242,6 +244,84 @@ def clear_task_instances(tis,
             dr.start_date = timezone.utcnow()
 
 
+def bulk_clear_task_instances(condition,
+                              session,
+                              dags=(),
+                              activate_dag_runs=True,
+                              ):
+    """
+    Clears the task instances matching a filter, like
+    :func:`clear_task_instances` but with a few UPDATE statements instead of
+    loading and updating the task instances one by one.
+
+    :param condition: filter selecting the task instances to clear
+    :param session: current session
+    :param dags: the DAGs of the task instances, used to reset their
+        max_tries from the retries of their task
+    :param activate_dag_runs: flag to check for active dag run
+    """
+    from airflow.jobs import BaseJob as BJ
+    TI = TaskInstance
+
+    # The condition may depend on the state of the task instances, collect
+    # what depends on it before updating them.
+    if activate_dag_runs:
+        runs = session.query(TI.dag_id, TI.execution_date).filter(
+            condition).distinct().all()
+    job_ids = [job_id for job_id, in session.query(TI.job_id).filter(
+        condition, TI.state == State.RUNNING, TI.job_id.isnot(None)).distinct()]
+
+    not_running = or_(TI.state != State.RUNNING, TI.state.is_(None))
+    task_ids_by_retries = defaultdict(set)
+    task_ids_by_dag = defaultdict(set)
+    for dag in dags:
+        for task in dag.tasks:
+            task_ids_by_retries[(dag.dag_id, task.retries)].add(task.task_id)
+            task_ids_by_dag[dag.dag_id].add(task.task_id)
+
+    # The try number of a task instance that is not running is the one of
+    # its next try, see TaskInstance.try_number
+    for (dag_id, retries), task_ids in task_ids_by_retries.items():
+        session.query(TI).filter(
+            condition, not_running,
+            TI.dag_id == dag_id, TI.task_id.in_(task_ids),
+        ).update({
+            TI.state: State.NONE,
+            TI.max_tries: TI._try_number + retries,
+        }, synchronize_session='fetch')
+
+    # Ignore errors when updating max_tries if the task is not found in the
+    # dags since database records could be outdated. We make max_tries the
+    # maximum value of its original max_tries or the current task try number.
+    unknown = session.query(TI).filter(condition, not_running)
+    if task_ids_by_dag:
+        unknown = unknown.filter(not_(or_(*[
+            and_(TI.dag_id == dag_id, TI.task_id.in_(task_ids))
+            for dag_id, task_ids in task_ids_by_dag.items()])))
+    unknown.update({
+        TI.state: State.NONE,
+        TI.max_tries: case([(TI.max_tries < TI._try_number, TI._try_number)],
+                           else_=TI.max_tries),
+    }, synchronize_session='fetch')
+
+    if job_ids:
+        session.query(TI).filter(
+            condition, TI.state == State.RUNNING, TI.job_id.isnot(None),
+        ).update({TI.state: State.SHUTDOWN}, synchronize_session='fetch')
+        session.query(BJ).filter(BJ.id.in_(job_ids)).update(
+            {BJ.state: State.SHUTDOWN}, synchronize_session='fetch')
+
+    if activate_dag_runs and runs:
+        session.query(DagRun).filter(
+            DagRun.dag_id.in_({dag_id for dag_id, _ in runs}),
+            DagRun.execution_date.in_({execution_date for _, execution_date in runs}),
+        ).update({
+            DagRun._state: State.RUNNING,
+            DagRun.start_date: timezone.utcnow(),
+            DagRun.end_date: None,
+        }, synchronize_session='fetch')
+
+
 def get_last_dagrun(dag_id, session, include_externally_triggered=False):
     """
     Returns the last dag run for a dag, None if there was none.
@@ -277,6 +357,9 @@ class DagBag(BaseDagBag, LoggingMixin):
         file has been skipped. This is to prevent overloading the user with logging
         messages about skipped files. Therefore only once per DagBag is a file logged
         being skipped.
+    :param store_serialized_dags: read the DAGs from the serialized DAGs the
+        scheduler stores in the database, instead of parsing the DAG files
+    :type store_serialized_dags: bool
     """
 
     # static class variables to detetct dag cycle
@@ -288,13 +371,13 @@ class DagBag(BaseDagBag, LoggingMixin):
             self,
             dag_folder=None,
             executor=None,
-            include_examples=configuration.conf.getboolean('core', 'LOAD_EXAMPLES')):
+            include_examples=configuration.conf.getboolean('core', 'LOAD_EXAMPLES'),
+            store_serialized_dags=False):
 
         # do not use default arg in signature, to fix import cycle on plugin load
         if executor is None:
             executor = GetDefaultExecutor()
         dag_folder = dag_folder or settings.DAGS_FOLDER
-        self.log.info("Filling up the DagBag from %s", dag_folder)
         self.dag_folder = dag_folder
         self.dags = {}
         # the file's last modified timestamp when we last read it
@@ -302,8 +385,14 @@ class DagBag(BaseDagBag, LoggingMixin):
         self.executor = executor
         self.import_errors = {}
         self.has_logged = False
+        self.store_serialized_dags = store_serialized_dags
 
-        self.collect_dags(dag_folder, include_examples)
+        if store_serialized_dags:
+            self.log.info("Filling up the DagBag from the serialized DAGs")
+            self.collect_dags_from_db()
+        else:
+            self.log.info("Filling up the DagBag from %s", dag_folder)
+            self.collect_dags(dag_folder, include_examples)
 
     def size(self):
         """
@@ -315,6 +404,9 @@ class DagBag(BaseDagBag, LoggingMixin):
         """
         Gets the DAG out of the dictionary, and refreshes it if expired
         """
+        if self.store_serialized_dags:
+            return self._get_serialized_dag(dag_id)
+
         # If asking for a known subdag, we want to refresh the parent
         root_dag_id = dag_id
         if dag_id in self.dags:
@@ -342,6 +434,54 @@ class DagBag(BaseDagBag, LoggingMixin):
                 del self.dags[dag_id]
         return self.dags.get(dag_id)
 
+    def _get_serialized_dag(self, dag_id):
+        """
+        Gets the DAG out of the dictionary, reloading its root DAG from the
+        database when the stored version is newer.
+        """
+        root_dag = self.dags.get(dag_id)
+        while root_dag is not None and root_dag.is_subdag:
+            root_dag = root_dag.parent_dag
+        root_dag_id = root_dag.dag_id if root_dag is not None else dag_id
+
+        last_updated = SerializedDagModel.get_last_updated(root_dag_id)
+        if last_updated is None:
+            if root_dag is not None:
+                for subdag in root_dag.subdags:
+                    self.dags.pop(subdag.dag_id, None)
+                self.dags.pop(root_dag_id, None)
+        elif root_dag is None or root_dag.last_loaded < last_updated:
+            serialized_dag = SerializedDagModel.get(root_dag_id)
+            if serialized_dag:
+                self._bag_serialized_dag(serialized_dag)
+        return self.dags.get(dag_id)
+
+    def _bag_serialized_dag(self, serialized_dag):
+        dag = serialized_dag.dag
+        dag.last_loaded = serialized_dag.last_updated
+        self.dags[dag.dag_id] = dag
+        for subdag in dag.subdags:
+            subdag.last_loaded = serialized_dag.last_updated
+            self.dags[subdag.dag_id] = subdag
+
+    @provide_session
+    def collect_dags_from_db(self, session=None):
+        """
+        Fills up the dagbag with the serialized DAGs stored in the database.
+        """
+        start_dttm = timezone.utcnow()
+        for serialized_dag in session.query(SerializedDagModel):
+            try:
+                self._bag_serialized_dag(serialized_dag)
+            except Exception:
+                self.log.exception("Failed to load serialized DAG %s",
+                                   serialized_dag.dag_id)
+        Stats.gauge(
+            'collect_db_dags', (timezone.utcnow() - start_dttm).total_seconds(), 1)
+        Stats.gauge(
+            'dagbag_size', len(self.dags), 1)
+        self.dagbag_stats = []
+
     def process_file(self, filepath, only_if_updated=True, safe_mode=True):
         """
         Given a path to a python module or zip file, this method imports
@@ -474,6 +614,10 @@ class DagBag(BaseDagBag, LoggingMixin):
         Fail given zombie tasks, which are tasks that haven't
         had a heartbeat for too long, in the current DagBag.
 
+        Zombies that are no longer running were already set up for retry or
+        failed by the DagFileProcessorManager, only their failure is recorded
+        and their emails and callbacks are sent.
+
         :param zombies: zombie task instances to kill.
         :type zombies: SimpleTaskInstance
         :param session: DB session.
@@ -491,8 +635,20 @@ class DagBag(BaseDagBag, LoggingMixin):
                     ti.try_number = zombie.try_number
                     ti.state = zombie.state
                     ti.test_mode = configuration.getboolean('core', 'unit_test_mode')
-                    ti.handle_failure("{} detected as zombie".format(ti),
-                                      ti.test_mode, ti.get_template_context())
+                    error = "{} detected as zombie".format(ti)
+                    if zombie.state == State.RUNNING:
+                        ti.handle_failure(error, ti.test_mode,
+                                          ti.get_template_context())
+                    else:
+                        ti.log.error(error)
+                        Stats.incr('ti_failures')
+                        if not ti.test_mode:
+                            session.add(Log(State.FAILED, ti))
+                        session.add(TaskFail(task, ti.execution_date,
+                                             ti.start_date, ti.end_date))
+                        context = ti.get_template_context()
+                        context['exception'] = error
+                        ti.alert_failure(error, context)
                     self.log.info(
                         'Marked zombie job %s as %s', ti, ti.state)
                     Stats.incr('zombies_killed')
@@ -667,6 +823,9 @@ class TaskInstance(Base, LoggingMixin):
         Index('ti_state_lkp', dag_id, task_id, execution_date, state),
         Index('ti_pool', pool, state, priority_weight),
         Index('ti_job_id', job_id),
+        Index('ti_state_dag_task', state, dag_id, task_id, execution_date),
+        Index('ti_state_job_id', state, job_id,
+              postgresql_where=text("state = 'running'")),
     )
 
     def __init__(self, task, execution_date, state=None):
@@ -1535,24 +1694,39 @@ class TaskInstance(Base, LoggingMixin):
             context['exception'] = error
 
         # Let's go deeper
+        # Since this function is called only when the TI state is running,
+        # try_number contains the current try_number (not the next). We
+        # only mark task instance as FAILED if the next task instance
+        # try_number exceeds the max_tries.
+        if self.is_eligible_to_retry():
+            self.state = State.UP_FOR_RETRY
+            self.log.info('Marking task as UP_FOR_RETRY')
+        else:
+            self.state = State.FAILED
+            if task.retries:
+                self.log.info('All retries failed; marking task as FAILED')
+            else:
+                self.log.info('Marking task as FAILED.')
+
+        self.alert_failure(error, context)
+
+        if not test_mode:
+            session.merge(self)
+        session.commit()
+
+    def alert_failure(self, error, context=None):
+        """
+        Sends the emails and runs the callbacks of the task for a failure,
+        according to the state the task instance was set to: UP_FOR_RETRY
+        or FAILED.
+        """
+        task = self.task
         try:
-            # Since this function is called only when the TI state is running,
-            # try_number contains the current try_number (not the next). We
-            # only mark task instance as FAILED if the next task instance
-            # try_number exceeds the max_tries.
-            if self.is_eligible_to_retry():
-                self.state = State.UP_FOR_RETRY
-                self.log.info('Marking task as UP_FOR_RETRY')
+            if self.state == State.UP_FOR_RETRY:
                 if task.email_on_retry and task.email:
                     self.email_alert(error)
-            else:
-                self.state = State.FAILED
-                if task.retries:
-                    self.log.info('All retries failed; marking task as FAILED')
-                else:
-                    self.log.info('Marking task as FAILED.')
-                if task.email_on_failure and task.email:
-                    self.email_alert(error)
+            elif task.email_on_failure and task.email:
+                self.email_alert(error)
         except Exception as e2:
             self.log.error('Failed to send email to: %s', task.email)
             self.log.exception(e2)
@@ -1567,10 +1741,6 @@ class TaskInstance(Base, LoggingMixin):
             self.log.error("Failed at executing callback")
             self.log.exception(e3)
 
-        if not test_mode:
-            session.merge(self)
-        session.commit()
-
     def is_eligible_to_retry(self):
         """Is task instance is eligible for retry"""
         return self.task.retries and self.try_number <= self.max_tries
@@ -2733,28 +2903,22 @@ class BaseOperator(LoggingMixin):
         the parameters specified.
         """
         TI = TaskInstance
-        qry = session.query(TI).filter(TI.dag_id == self.dag_id)
-
-        if start_date:
-            qry = qry.filter(TI.execution_date >= start_date)
-        if end_date:
-            qry = qry.filter(TI.execution_date <= end_date)
-
-        tasks = [self.task_id]
-
+        task_ids = {self.task_id}
         if upstream:
-            tasks += [
-                t.task_id for t in self.get_flat_relatives(upstream=True)]
-
+            task_ids.update(self.get_flat_relative_ids(upstream=True))
         if downstream:
-            tasks += [
-                t.task_id for t in self.get_flat_relatives(upstream=False)]
+            task_ids.update(self.get_flat_relative_ids(upstream=False))
 
-        qry = qry.filter(TI.task_id.in_(tasks))
+        condition = and_(TI.dag_id == self.dag_id, TI.task_id.in_(task_ids))
+        if start_date:
+            condition = and_(condition, TI.execution_date >= start_date)
+        if end_date:
+            condition = and_(condition, TI.execution_date <= end_date)
 
-        count = qry.count()
+        count = session.query(TI).filter(condition).count()
 
-        clear_task_instances(qry.all(), session, dag=self.dag)
+        bulk_clear_task_instances(condition, session,
+                                  dags=[self.dag] if self.has_dag() else [])
 
         session.commit()
 
@@ -2781,6 +2945,15 @@ class BaseOperator(LoggingMixin):
 
         if not found_descendants:
             found_descendants = set()
+
+        if self.has_dag():
+            graph_index = self._dag.graph_index
+            if (self.task_id in graph_index.positions and
+                    graph_index.topological_order is not None):
+                found_descendants.update(
+                    graph_index.relative_ids(self.task_id, upstream))
+                return found_descendants
+
         relative_ids = self.get_direct_relative_ids(upstream)
 
         for relative_id in relative_ids:
@@ -2903,6 +3076,7 @@ class BaseOperator(LoggingMixin):
             else:
                 self.add_only_new(self._downstream_task_ids, task.task_id)
                 task.add_only_new(task._upstream_task_ids, self.task_id)
+        dag.clear_graph_index()
 
     def set_downstream(self, task_or_task_list):
         """
@@ -3182,6 +3356,7 @@ class DAG(BaseDag, LoggingMixin):
         # set file location to caller source path
         self.fileloc = sys._getframe().f_back.f_code.co_filename
         self.task_dict = dict()
+        self._graph_index = None
 
         # set timezone
         if start_date and start_date.tzinfo:
@@ -3314,16 +3489,20 @@ class DAG(BaseDag, LoggingMixin):
 
         :return: True if the schedule has a fixed time, False if not.
         """
+        # The answer only depends on the cron expression, keep it
+        cached = getattr(self, '_fixed_time_schedule', None)
+        if cached is not None and cached[0] == self._schedule_interval:
+            return cached[1]
+
         now = datetime.now()
         cron = croniter(self._schedule_interval, now)
 
         start = cron.get_next(datetime)
         cron_next = cron.get_next(datetime)
 
-        if cron_next.minute == start.minute and cron_next.hour == start.hour:
-            return True
-
-        return False
+        is_fixed = cron_next.minute == start.minute and cron_next.hour == start.hour
+        self._fixed_time_schedule = (self._schedule_interval, is_fixed)
+        return is_fixed
 
     def following_schedule(self, dttm):
         """
@@ -3332,26 +3511,49 @@ class DAG(BaseDag, LoggingMixin):
         :param dttm: utc datetime
         :return: utc datetime
         """
+        return next(self.iter_following_schedules(dttm), None)
+
+    def iter_following_schedules(self, dttm):
+        """
+        Iterates over the schedules of this dag following ``dttm``, in UTC.
+        Each value is the ``following_schedule`` of the previous one, but the
+        cron expression is only parsed again when a DST transition moves the
+        schedule off the cron times.
+
+        :param dttm: utc datetime
+        :return: an iterator of utc datetimes, empty if the dag has no
+            schedule interval
+        """
         if isinstance(self._schedule_interval, six.string_types):
             # we don't want to rely on the transitions created by
             # croniter as they are not always correct
             dttm = pendulum.instance(dttm)
             naive = timezone.make_naive(dttm, self.timezone)
             cron = croniter(self._schedule_interval, naive)
-
-            # We assume that DST transitions happen on the minute/hour
-            if not self.is_fixed_time_schedule():
-                # relative offset (eg. every 5 minutes)
-                delta = cron.get_next(datetime) - naive
-                following = dttm.in_timezone(self.timezone).add_timedelta(delta)
-            else:
-                # absolute (e.g. 3 AM)
-                naive = cron.get_next(datetime)
-                tz = pendulum.timezone(self.timezone.name)
-                following = timezone.make_aware(naive, tz)
-            return timezone.convert_to_utc(following)
+            is_fixed = self.is_fixed_time_schedule()
+            tz = pendulum.timezone(self.timezone.name) if is_fixed else None
+
+            while True:
+                cron_next = cron.get_next(datetime)
+                # We assume that DST transitions happen on the minute/hour
+                if not is_fixed:
+                    # relative offset (eg. every 5 minutes)
+                    following = dttm.in_timezone(self.timezone).add_timedelta(
+                        cron_next - naive)
+                else:
+                    # absolute (e.g. 3 AM)
+                    following = timezone.make_aware(cron_next, tz)
+                following = timezone.convert_to_utc(following)
+                yield following
+
+                dttm = pendulum.instance(following)
+                naive = timezone.make_naive(dttm, self.timezone)
+                if naive != cron_next:
+                    cron = croniter(self._schedule_interval, naive)
         elif self._schedule_interval is not None:
-            return dttm + self._schedule_interval
+            while True:
+                dttm = dttm + self._schedule_interval
+                yield dttm
 
     def previous_schedule(self, dttm):
         """
@@ -3407,9 +3609,12 @@ class DAG(BaseDag, LoggingMixin):
         next_run_date = (self.normalize_schedule(using_start_date)
                          if not self.is_subdag else using_start_date)
 
-        while next_run_date and next_run_date <= using_end_date:
+        if next_run_date and next_run_date <= using_end_date:
             run_dates.append(next_run_date)
-            next_run_date = self.following_schedule(next_run_date)
+            for next_run_date in self.iter_following_schedules(next_run_date):
+                if next_run_date > using_end_date:
+                    break
+                run_dates.append(next_run_date)
 
         return run_dates
 
@@ -3699,51 +3904,15 @@ class DAG(BaseDag, LoggingMixin):
         Sorts tasks in topographical order, such that a task comes after any of its
         upstream dependencies.
 
-        Heavily inspired by:
-        http://blog.jupo.org/2012/04/06/topological-sorting-acyclic-directed-graphs/
-
         :return: list of tasks in topological order
         """
 
-        # convert into an OrderedDict to speedup lookup while keeping order the same
-        graph_unsorted = OrderedDict((task.task_id, task) for task in self.tasks)
-
-        graph_sorted = []
-
-        # special case
-        if len(self.tasks) == 0:
-            return tuple(graph_sorted)
-
-        # Run until the unsorted graph is empty.
-        while graph_unsorted:
-            # Go through each of the node/edges pairs in the unsorted
-            # graph. If a set of edges doesn't contain any nodes that
-            # haven't been resolved, that is, that are still in the
-            # unsorted graph, remove the pair from the unsorted graph,
-            # and append it to the sorted graph. Note here that by using
-            # using the items() method for iterating, a copy of the
-            # unsorted graph is used, allowing us to modify the unsorted
-            # graph as we move through it. We also keep a flag for
-            # checking that that graph is acyclic, which is true if any
-            # nodes are resolved during each pass through the graph. If
-            # not, we need to bail out as the graph therefore can't be
-            # sorted.
-            acyclic = False
-            for node in list(graph_unsorted.values()):
-                for edge in node.upstream_list:
-                    if edge.task_id in graph_unsorted:
-                        break
-                # no edges in upstream tasks
-                else:
-                    acyclic = True
-                    del graph_unsorted[node.task_id]
-                    graph_sorted.append(node)
-
-            if not acyclic:
-                raise AirflowException("A cyclic dependency occurred in dag: {}"
-                                       .format(self.dag_id))
-
-        return tuple(graph_sorted)
+        graph_index = self.graph_index
+        order = graph_index.topological_order
+        if order is None:
+            raise AirflowException("A cyclic dependency occurred in dag: {}"
+                                   .format(self.dag_id))
+        return tuple(self.task_dict[graph_index.task_ids[i]] for i in order)
 
     @provide_session
     def set_dag_runs_state(
@@ -3753,49 +3922,40 @@ class DAG(BaseDag, LoggingMixin):
             start_date=None,
             end_date=None,
     ):
-        query = session.query(DagRun).filter_by(dag_id=self.dag_id)
+        query = session.query(DagRun).filter(
+            DagRun.dag_id == self.dag_id,
+            or_(DagRun._state != state, DagRun._state.is_(None)))
         if start_date:
             query = query.filter(DagRun.execution_date >= start_date)
         if end_date:
             query = query.filter(DagRun.execution_date <= end_date)
-        drs = query.all()
+        query.update({
+            DagRun._state: state,
+            DagRun.end_date: timezone.utcnow() if state in State.finished() else None,
+        }, synchronize_session='fetch')
 
-        dirty_ids = []
-        for dr in drs:
-            dr.state = state
-            dirty_ids.append(dr.dag_id)
-
-    @provide_session
-    def clear(
+    def _get_clear_filter(
             self, start_date=None, end_date=None,
             only_failed=False,
             only_running=False,
-            confirm_prompt=False,
             include_subdags=True,
             include_parentdag=True,
-            reset_dag_runs=True,
-            dry_run=False,
-            session=None,
-            get_tis=False,
     ):
         """
-        Clears a set of task instances associated with the current dag for
-        a specified date range.
+        Returns the filter selecting the task instances cleared by
+        :meth:`clear`, and the DAGs of these task instances.
         """
         TI = TaskInstance
-        tis = session.query(TI)
         if include_subdags:
             # Crafting the right filter for dag_id and task_ids combo
-            conditions = []
-            for dag in self.subdags + [self]:
-                conditions.append(
-                    TI.dag_id.like(dag.dag_id) &
-                    TI.task_id.in_(dag.task_ids)
-                )
-            tis = tis.filter(or_(*conditions))
+            dags = self.subdags + [self]
+            condition = or_(*[
+                TI.dag_id.like(dag.dag_id) & TI.task_id.in_(dag.task_ids)
+                for dag in dags])
         else:
-            tis = session.query(TI).filter(TI.dag_id == self.dag_id)
-            tis = tis.filter(TI.task_id.in_(self.task_ids))
+            dags = [self]
+            condition = and_(TI.dag_id == self.dag_id,
+                             TI.task_id.in_(self.task_ids))
 
         if include_parentdag and self.is_subdag:
 
@@ -3804,28 +3964,53 @@ class DAG(BaseDag, LoggingMixin):
                 include_upstream=False,
                 include_downstream=True)
 
-            tis = tis.union(p_dag.clear(
-                start_date=start_date, end_date=end_date,
-                only_failed=only_failed,
-                only_running=only_running,
-                confirm_prompt=confirm_prompt,
+            p_condition, p_dags = p_dag._get_clear_filter(
                 include_subdags=include_subdags,
                 include_parentdag=False,
-                reset_dag_runs=reset_dag_runs,
-                get_tis=True,
-                session=session,
-            ))
+            )
+            condition = or_(condition, p_condition)
+            dags += p_dags
 
         if start_date:
-            tis = tis.filter(TI.execution_date >= start_date)
+            condition = and_(condition, TI.execution_date >= start_date)
         if end_date:
-            tis = tis.filter(TI.execution_date <= end_date)
+            condition = and_(condition, TI.execution_date <= end_date)
         if only_failed:
-            tis = tis.filter(or_(
+            condition = and_(condition, or_(
                 TI.state == State.FAILED,
                 TI.state == State.UPSTREAM_FAILED))
         if only_running:
-            tis = tis.filter(TI.state == State.RUNNING)
+            condition = and_(condition, TI.state == State.RUNNING)
+        return condition, dags
+
+    @provide_session
+    def clear(
+            self, start_date=None, end_date=None,
+            only_failed=False,
+            only_running=False,
+            confirm_prompt=False,
+            include_subdags=True,
+            include_parentdag=True,
+            reset_dag_runs=True,
+            dry_run=False,
+            session=None,
+            get_tis=False,
+    ):
+        """
+        Clears a set of task instances associated with the current dag for
+        a specified date range.
+
+        The task instances are cleared with a few UPDATE statements, see
+        :func:`bulk_clear_task_instances`.
+        """
+        condition, dags = self._get_clear_filter(
+            start_date=start_date, end_date=end_date,
+            only_failed=only_failed,
+            only_running=only_running,
+            include_subdags=include_subdags,
+            include_parentdag=include_parentdag,
+        )
+        tis = session.query(TaskInstance).filter(condition)
 
         if get_tis:
             return tis
@@ -3848,10 +4033,7 @@ class DAG(BaseDag, LoggingMixin):
             do_it = utils.helpers.ask_yesno(question)
 
         if do_it:
-            clear_task_instances(tis.all(),
-                                 session,
-                                 dag=self,
-                                 )
+            bulk_clear_task_instances(condition, session, dags=dags)
             if reset_dag_runs:
                 self.set_dag_runs_state(session=session,
                                         start_date=start_date,
@@ -3930,9 +4112,11 @@ class DAG(BaseDag, LoggingMixin):
         result = cls.__new__(cls)
         memo[id(self)] = result
         for k, v in list(self.__dict__.items()):
-            if k not in ('user_defined_macros', 'user_defined_filters', 'params'):
+            if k not in ('user_defined_macros', 'user_defined_filters', 'params',
+                         '_graph_index'):
                 setattr(result, k, copy.deepcopy(v, memo))
 
+        result._graph_index = None
         result.user_defined_macros = self.user_defined_macros
         result.user_defined_filters = self.user_defined_filters
         result.params = self.params
@@ -3941,37 +4125,42 @@ class DAG(BaseDag, LoggingMixin):
     def sub_dag(self, task_regex, include_downstream=False,
                 include_upstream=True):
         """
-        Returns a subset of the current dag as a deep copy of the current dag
-        based on a regex that should match one or many tasks, and includes
-        upstream and downstream neighbours based on the flag passed.
-        """
+        Returns a subset of the current dag based on a regex that should
+        match one or many tasks, and includes upstream and downstream
+        neighbours based on the flag passed.
 
-        # deep-copying self.task_dict takes a long time, and we don't want all
-        # the tasks anyway, so we copy the tasks manually later
-        task_dict = self.task_dict
-        self.task_dict = {}
-        dag = copy.deepcopy(self)
-        self.task_dict = task_dict
-
-        regex_match = [
-            t for t in self.tasks if re.findall(task_regex, t.task_id)]
-        also_include = []
-        for t in regex_match:
+        The subset is a copy-on-write view of the current dag: the dag and
+        the tasks that made the cut are shallow copies, which share their
+        attribute values (params, default_args, callables...) with the
+        originals instead of copying them. Assigning an attribute of the
+        subset or of its tasks leaves the current dag untouched, but shared
+        values have to be replaced rather than modified in place. Deep copy
+        the subset to get a dag independent from the current one.
+        """
+        regex = re.compile(task_regex)
+        task_ids = set()
+        for t in self.tasks:
+            if not regex.search(t.task_id):
+                continue
+            task_ids.add(t.task_id)
             if include_downstream:
-                also_include += t.get_flat_relatives(upstream=False)
+                task_ids.update(t.get_flat_relative_ids(upstream=False))
             if include_upstream:
-                also_include += t.get_flat_relatives(upstream=True)
+                task_ids.update(t.get_flat_relative_ids(upstream=True))
 
-        # Compiling the unique list of tasks that made the cut
-        # Make sure to not recursively deepcopy the dag while copying the task
-        dag.task_dict = {t.task_id: copy.deepcopy(t, {id(t.dag): t.dag})
-                         for t in regex_match + also_include}
-        for t in dag.tasks:
+        dag = copy.copy(self)
+        dag._graph_index = None
+        dag.task_dict = {}
+        for task_id, t in self.task_dict.items():
+            if task_id not in task_ids:
+                continue
             # Removing upstream/downstream references to tasks that did not
             # made the cut
-            t._upstream_task_ids = t._upstream_task_ids.intersection(dag.task_dict.keys())
-            t._downstream_task_ids = t._downstream_task_ids.intersection(
-                dag.task_dict.keys())
+            task = copy.copy(t)
+            task._dag = dag
+            task._upstream_task_ids = t._upstream_task_ids & task_ids
+            task._downstream_task_ids = t._downstream_task_ids & task_ids
+            dag.task_dict[task_id] = task
 
         if len(dag.tasks) < len(self.tasks):
             dag.partial = True
@@ -3979,7 +4168,28 @@ class DAG(BaseDag, LoggingMixin):
         return dag
 
     def has_task(self, task_id):
-        return task_id in (t.task_id for t in self.tasks)
+        return task_id in self.task_dict
+
+    @property
+    def graph_index(self):
+        """
+        Index of the dependencies between the tasks of the DAG, built on
+        first use and rebuilt after tasks or dependencies are added.
+
+        :rtype: airflow.dag.graph_index.DagGraphIndex
+        """
+        graph_index = getattr(self, '_graph_index', None)
+        if graph_index is None or not graph_index.is_current(self.task_dict):
+            graph_index = DagGraphIndex(self.task_dict)
+            self._graph_index = graph_index
+        return graph_index
+
+    def clear_graph_index(self):
+        """
+        Drops the index of the dependencies between tasks, to be called when
+        they change.
+        """
+        self._graph_index = None
 
     def get_task(self, task_id):
         if task_id in self.task_dict:
@@ -4009,12 +4219,18 @@ class DAG(BaseDag, LoggingMixin):
         if dag and dag.pickle_id:
             dp = session.query(DagPickle).filter(
                 DagPickle.id == dag.pickle_id).first()
-        if not dp or dp.pickle != self:
+        # Compare content hashes rather than the unpickled DAGs, an unchanged
+        # DAG then keeps its pickle instead of getting a new one on each parse
+        if not dp or dp.pickle_hash != DagPickle.content_hash(self):
             dp = DagPickle(dag=self)
             session.add(dp)
             self.last_pickled = timezone.utcnow()
             session.commit()
-            self.pickle_id = dp.id
+            if dag:
+                dag.pickle_id = dp.id
+                dag.last_pickled = self.last_pickled
+                session.commit()
+        self.pickle_id = dp.id
 
         return dp
 
@@ -4067,6 +4283,7 @@ class DAG(BaseDag, LoggingMixin):
         else:
             self.task_dict[task.task_id] = task
             task.dag = self
+            self.clear_graph_index()
 
         self.task_count = len(self.task_dict)
 
@@ -4206,6 +4423,79 @@ class DAG(BaseDag, LoggingMixin):
 
         return run
 
+    @provide_session
+    def create_dagruns(self,
+                       run_id_prefix,
+                       execution_dates,
+                       state,
+                       start_date=None,
+                       external_trigger=False,
+                       session=None):
+        """
+        Creates several dag runs from this dag, including the tasks associated
+        with this dag, in one transaction. The task instances of all the runs
+        are inserted in bulk. Returns the dag runs.
+
+        :param run_id_prefix: the run id of each dag run is this prefix
+            followed by its execution date
+        :type run_id_prefix: str
+        :param execution_dates: the execution dates of the dag runs
+        :type execution_dates: list[datetime]
+        :param state: the state of the dag runs
+        :type state: State
+        :param start_date: the date these dag runs should be evaluated
+        :type start_date: datetime
+        :param external_trigger: whether these dag runs are externally triggered
+        :type external_trigger: bool
+        :param session: database session
+        :type session: Session
+        """
+        runs = [
+            DagRun(
+                dag_id=self.dag_id,
+                run_id=run_id_prefix + execution_date.isoformat(),
+                execution_date=execution_date,
+                start_date=start_date,
+                external_trigger=external_trigger,
+                state=state
+            )
+            for execution_date in execution_dates
+        ]
+        session.add_all(runs)
+
+        # The task instances of the new runs are created here with state None,
+        # as verify_integrity would create them, while the runs with task
+        # instances left over from deleted runs are reconciled by verify_integrity
+        TI = TaskInstance
+        existing_dates = set(
+            execution_date for execution_date, in session.query(TI.execution_date)
+            .filter(TI.dag_id == self.dag_id,
+                    TI.execution_date.in_(execution_dates))
+            .distinct()
+        )
+        run_dates = []
+        for run in runs:
+            run.dag = self
+            if run.execution_date in existing_dates:
+                session.flush()
+                run.verify_integrity(session=session)
+            else:
+                run_dates.append((run.execution_date, run.is_backfill))
+        tasks_by_dates = defaultdict(list)
+        for task in self.tasks:
+            if task.adhoc:
+                continue
+            dates = tuple(execution_date for execution_date, is_backfill in run_dates
+                          if task.start_date <= execution_date or is_backfill)
+            tasks_by_dates[dates].append(task)
+        mappings = []
+        for dates, tasks in tasks_by_dates.items():
+            mappings.extend(DagRun._get_task_instance_mappings(tasks, dates))
+        session.bulk_insert_mappings(TaskInstance, mappings)
+        session.commit()
+
+        return runs
+
     @provide_session
     def sync_to_db(self, owner=None, sync_time=None, session=None):
         """
@@ -4322,36 +4612,9 @@ class DAG(BaseDag, LoggingMixin):
         otherwise raises exception.
         """
 
-        # default of int is 0 which corresponds to CYCLE_NEW
-        visit_map = defaultdict(int)
-        for task_id in self.task_dict.keys():
-            # print('starting %s' % task_id)
-            if visit_map[task_id] == DagBag.CYCLE_NEW:
-                self._test_cycle_helper(visit_map, task_id)
+        self.graph_index.check_cycle()
         return False
 
-    def _test_cycle_helper(self, visit_map, task_id):
-        """
-        Checks if a cycle exists from the input task using DFS traversal
-        """
-
-        # print('Inspecting %s' % task_id)
-        if visit_map[task_id] == DagBag.CYCLE_DONE:
-            return False
-
-        visit_map[task_id] = DagBag.CYCLE_IN_PROGRESS
-
-        task = self.task_dict[task_id]
-        for descendant_id in task.get_direct_relative_ids():
-            if visit_map[descendant_id] == DagBag.CYCLE_IN_PROGRESS:
-                msg = "Cycle detected in DAG. Faulty task: {0} to {1}".format(
-                    task_id, descendant_id)
-                raise AirflowDagCycleException(msg)
-            else:
-                self._test_cycle_helper(visit_map, descendant_id)
-
-        visit_map[task_id] = DagBag.CYCLE_DONE
-
 
 class Chart(Base):
     __tablename__ = "chart"
@@ -4872,54 +5135,39 @@ class DagRun(Base, LoggingMixin):
         ).first()
 
     @provide_session
-    def update_state(self, session=None):
+    def update_state(self, session=None, tis=None):
         """
         Determines the overall state of the DagRun based on the state
         of its TaskInstances.
 
+        :param tis: the task instances of the DagRun, as returned by
+            :meth:`get_task_instances`, loaded if not given
+        :type tis: list[TaskInstance]
         :return: State
         """
 
         dag = self.get_dag()
 
-        tis = self.get_task_instances(session=session)
+        if tis is None:
+            tis = self.get_task_instances(session=session)
 
         self.log.debug("Updating state for %s considering %s task(s)", self, len(tis))
 
-        for ti in list(tis):
-            # skip in db?
-            if ti.state == State.REMOVED:
-                tis.remove(ti)
-            else:
-                ti.task = dag.get_task(ti.task_id)
+        # skip in db?
+        tis = [ti for ti in tis if ti.state != State.REMOVED]
+        for ti in tis:
+            ti.task = dag.get_task(ti.task_id)
 
         # pre-calculate
-        # db is faster
         start_dttm = timezone.utcnow()
-        unfinished_tasks = self.get_task_instances(
-            state=State.unfinished(),
-            session=session
-        )
+        unfinished_tasks = [ti for ti in tis if ti.state in State.unfinished()]
         none_depends_on_past = all(not t.task.depends_on_past for t in unfinished_tasks)
         none_task_concurrency = all(t.task.task_concurrency is None
                                     for t in unfinished_tasks)
         # small speed up
         if unfinished_tasks and none_depends_on_past and none_task_concurrency:
-            # todo: this can actually get pretty slow: one task costs between 0.01-015s
-            no_dependencies_met = True
-            for ut in unfinished_tasks:
-                # We need to flag upstream and check for changes because upstream
-                # failures/re-schedules can result in deadlock false positives
-                old_state = ut.state
-                deps_met = ut.are_dependencies_met(
-                    dep_context=DepContext(
-                        flag_upstream_failed=True,
-                        ignore_in_retry_period=True,
-                        ignore_in_reschedule_period=True),
-                    session=session)
-                if deps_met or old_state != ut.current_state(session=session):
-                    no_dependencies_met = False
-                    break
+            no_dependencies_met = self._are_dependencies_unmet(
+                unfinished_tasks, tis, session)
 
         duration = (timezone.utcnow() - start_dttm).total_seconds() * 1000
         Stats.timing("dagrun.dependency-check.{}".format(self.dag_id), duration)
@@ -4962,6 +5210,88 @@ class DagRun(Base, LoggingMixin):
 
         return self.state
 
+    # Dependencies of the tasks that _are_dependencies_unmet knows how to
+    # evaluate against the states of the upstream task instances.
+    _DEADLOCK_CHECKED_DEPS = (NotInRetryPeriodDep, PrevDagrunDep,
+                              ReadyToRescheduleDep, TriggerRuleDep)
+
+    def _are_dependencies_unmet(self, unfinished_tasks, tis, session):
+        """
+        Whether none of the unfinished task instances of the DagRun can run,
+        which means the DagRun is deadlocked. The trigger rules are checked
+        against the states of ``tis`` instead of querying the upstream task
+        instances of every unfinished one.
+
+        As with are_dependencies_met, upstream failures and skips are flagged
+        along the way, and a task instance changing state means progress.
+        """
+        states = {ti.task_id: ti.state for ti in tis}
+        trigger_rule_dep = TriggerRuleDep()
+        dep_context = DepContext(
+            flag_upstream_failed=True,
+            ignore_in_retry_period=True,
+            ignore_in_reschedule_period=True)
+        for ut in unfinished_tasks:
+            task = ut.task
+            old_state = ut.state
+            if any(type(dep) not in self._DEADLOCK_CHECKED_DEPS for dep in task.deps):
+                # We need to flag upstream and check for changes because upstream
+                # failures/re-schedules can result in deadlock false positives
+                deps_met = ut.are_dependencies_met(dep_context=dep_context,
+                                                   session=session)
+                if deps_met or old_state != ut.current_state(session=session):
+                    return False
+                continue
+
+            # The other dependencies pass for tasks not depending on past
+            # in this context.
+            if not task.upstream_task_ids or task.trigger_rule == TriggerRule.DUMMY:
+                return False
+            upstream_states = Counter(states.get(task_id)
+                                      for task_id in task.upstream_task_ids)
+            successes = upstream_states[State.SUCCESS]
+            skipped = upstream_states[State.SKIPPED]
+            failed = upstream_states[State.FAILED]
+            upstream_failed = upstream_states[State.UPSTREAM_FAILED]
+            failed_statuses = list(trigger_rule_dep._evaluate_trigger_rule(
+                ti=ut,
+                successes=successes,
+                skipped=skipped,
+                failed=failed,
+                upstream_failed=upstream_failed,
+                done=successes + skipped + failed + upstream_failed,
+                flag_upstream_failed=True,
+                session=session))
+            if not failed_statuses or old_state != ut.state:
+                return False
+        return True
+
+    @staticmethod
+    def get_task_instances_by_run(dag_runs, session):
+        """
+        Loads the task instances of several DagRuns of the same DAG with one
+        query.
+
+        :return: the task instances of each DagRun, keyed by execution date,
+            as returned by :meth:`get_task_instances`
+        :rtype: dict
+        """
+        tis_by_run = {dag_run.execution_date: [] for dag_run in dag_runs}
+        if not dag_runs:
+            return tis_by_run
+
+        dag = dag_runs[0].dag
+        TI = TaskInstance
+        tis = session.query(TI).filter(
+            TI.dag_id == dag_runs[0].dag_id,
+            TI.execution_date.in_(list(tis_by_run)),
+        )
+        if dag and dag.partial:
+            tis = tis.filter(TI.task_id.in_(dag.task_ids))
+        for ti in tis:
+            tis_by_run[ti.execution_date].append(ti)
+        return tis_by_run
+
     @provide_session
     def verify_integrity(self, session=None):
         """
@@ -4969,49 +5299,90 @@ class DagRun(Base, LoggingMixin):
         database yet. It will set state to removed or add the task if required.
         """
         dag = self.get_dag()
-        tis = self.get_task_instances(session=session)
+        TI = TaskInstance
+        qry = session.query(TI.task_id, TI.state).filter(
+            TI.dag_id == self.dag_id,
+            TI.execution_date == self.execution_date,
+        )
+        if dag.partial:
+            qry = qry.filter(TI.task_id.in_(dag.task_ids))
+        ti_states = dict(qry.all())
 
         # check for removed or restored tasks
-        task_ids = []
-        for ti in tis:
-            task_ids.append(ti.task_id)
-            task = None
-            try:
-                task = dag.get_task(ti.task_id)
-            except AirflowException:
-                if ti.state == State.REMOVED:
-                    pass  # ti has already been removed, just ignore it
-                elif self.state is not State.RUNNING and not dag.partial:
-                    self.log.warning("Failed to get task '{}' for dag '{}'. "
-                                     "Marking it as removed.".format(ti, dag))
-                    Stats.incr(
-                        "task_removed_from_dag.{}".format(dag.dag_id), 1, 1)
-                    ti.state = State.REMOVED
-
-            is_task_in_dag = task is not None
-            should_restore_task = is_task_in_dag and ti.state == State.REMOVED
-            if should_restore_task:
-                self.log.info("Restoring task '{}' which was previously "
-                              "removed from DAG '{}'".format(ti, dag))
-                Stats.incr("task_restored_to_dag.{}".format(dag.dag_id), 1, 1)
-                ti.state = State.NONE
+        removed_task_ids = {task_id for task_id, state in ti_states.items()
+                            if task_id not in dag.task_dict and state != State.REMOVED}
+        if removed_task_ids and self.state is not State.RUNNING and not dag.partial:
+            for task_id in sorted(removed_task_ids):
+                self.log.warning("Failed to get task '%s' for dag '%s'. "
+                                 "Marking it as removed.", task_id, dag)
+            Stats.incr("task_removed_from_dag.{}".format(dag.dag_id),
+                       len(removed_task_ids), 1)
+            self._set_task_instances_state(removed_task_ids, State.REMOVED, session)
+
+        restored_task_ids = {task_id for task_id, state in ti_states.items()
+                             if task_id in dag.task_dict and state == State.REMOVED}
+        if restored_task_ids:
+            for task_id in sorted(restored_task_ids):
+                self.log.info("Restoring task '%s' which was previously "
+                              "removed from DAG '%s'", task_id, dag)
+            Stats.incr("task_restored_to_dag.{}".format(dag.dag_id),
+                       len(restored_task_ids), 1)
+            self._set_task_instances_state(restored_task_ids, State.NONE, session)
 
         # check for missing tasks
-        for task in six.itervalues(dag.task_dict):
-            if task.adhoc:
-                continue
-            if task.start_date > self.execution_date and not self.is_backfill:
-                continue
-
-            if task.task_id not in task_ids:
-                Stats.incr(
-                    "task_instance_created-{}".format(task.__class__.__name__),
-                    1, 1)
-                ti = TaskInstance(task, self.execution_date)
-                session.add(ti)
+        is_backfill = self.is_backfill
+        missing_tasks = [
+            task for task in six.itervalues(dag.task_dict)
+            if not task.adhoc and
+            (task.start_date <= self.execution_date or is_backfill) and
+            task.task_id not in ti_states
+        ]
+        if missing_tasks:
+            session.bulk_insert_mappings(TI, self._get_task_instance_mappings(
+                missing_tasks, [self.execution_date]))
 
         session.commit()
 
+    @staticmethod
+    def _get_task_instance_mappings(tasks, execution_dates):
+        """
+        Returns the rows of the new task instances of the tasks for each of
+        the execution dates, to be inserted with bulk_insert_mappings.
+        """
+        created = defaultdict(int)
+        unixname = getpass.getuser()
+        mappings = []
+        for task in tasks:
+            if not execution_dates:
+                continue
+            created[task.__class__.__name__] += len(execution_dates)
+            mapping = {
+                'dag_id': task.dag_id,
+                'task_id': task.task_id,
+                'queue': task.queue,
+                'pool': task.pool,
+                'priority_weight': task.priority_weight_total,
+                '_try_number': 0,
+                'max_tries': task.retries,
+                'unixname': unixname,
+                'run_as_user': task.run_as_user,
+                'hostname': '',
+                'executor_config': task.executor_config,
+            }
+            for execution_date in execution_dates:
+                mappings.append(dict(mapping, execution_date=execution_date))
+        for operator, count in created.items():
+            Stats.incr("task_instance_created-{}".format(operator), count, 1)
+        return mappings
+
+    def _set_task_instances_state(self, task_ids, state, session):
+        TI = TaskInstance
+        session.query(TI).filter(
+            TI.dag_id == self.dag_id,
+            TI.execution_date == self.execution_date,
+            TI.task_id.in_(task_ids),
+        ).update({TI.state: state}, synchronize_session='fetch')
+
     @staticmethod
     def get_run(session, dag_id, execution_date):
         """
@@ -22,6 +22,8 @@ from sqlalchemy.ext.declarative import declarative_base
 
 import airflow
 
+ID_LEN = 250
+
 SQL_ALCHEMY_SCHEMA = airflow.configuration.get("core", "SQL_ALCHEMY_SCHEMA")
 
 if not SQL_ALCHEMY_SCHEMA or SQL_ALCHEMY_SCHEMA.isspace():
@@ -17,13 +17,41 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import types
+from tempfile import mkstemp
+
 import dill
-from sqlalchemy import Column, Integer, PickleType, Text
+import six
+from sqlalchemy import Column, Integer, PickleType, String
 
 from airflow.models.base import Base
 from airflow.utils import timezone
+from airflow.utils.db import provide_session
+from airflow.utils.file import make_private_dir, private_temp_dir, remove_stale_files
+from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.sqlalchemy import UtcDateTime
 
+# Locally cached pickles not used for this long, in seconds, are removed
+CACHE_MAX_AGE = 7 * 24 * 60 * 60
+
+_CONTENT_HASH_RE = re.compile(r'^[0-9a-f]{40}$')
+
+# Attributes that change between two parses of the same DAG, or only cache
+# what can be derived from the others
+_VOLATILE_ATTRIBUTES = frozenset([
+    '_log', 'last_loaded', 'last_pickled', '_pickle_id', 'template_env',
+    '_graph_index', '_old_context_manager_dags', '_fixed_time_schedule',
+])
+
+log = LoggingMixin().log
+
 
 class DagPickle(Base):
     """
@@ -35,12 +63,17 @@ class DagPickle(Base):
 
     The executors pick up the DagPickle id and read the dag definition from
     the database.
+
+    ``pickle_hash`` is the content hash of the DAG, see :meth:`content_hash`.
+    An unchanged DAG reuses its latest pickle instead of storing a new one,
+    and workers keep the pickles they loaded in a local cache keyed by that
+    hash, so that they read each version of a DAG from the database once.
     """
 
     id = Column(Integer, primary_key=True)
     pickle = Column(PickleType(pickler=dill))
     created_dttm = Column(UtcDateTime, default=timezone.utcnow)
-    pickle_hash = Column(Text)
+    pickle_hash = Column(String(40))
 
     __tablename__ = "dag_pickle"
 
@@ -48,5 +81,201 @@ class DagPickle(Base):
         self.dag_id = dag.dag_id
         if hasattr(dag, 'template_env'):
             dag.template_env = None
-        self.pickle_hash = hash(dag)
+        self.pickle_hash = self.content_hash(dag)
         self.pickle = dag
+
+    @staticmethod
+    def content_hash(dag):
+        """
+        Deterministic hash of everything that goes into the pickle of a DAG:
+        the attributes of the DAG and of its tasks, followed through the
+        objects they hold, and the code of the functions and classes they
+        use, as well as the source of the DAG file. Values that differ
+        between two parses of an unchanged DAG, such as its load time, are
+        left out.
+        """
+        from airflow import settings
+        encoder = _StableEncoder([settings.DAGS_FOLDER,
+                                  os.path.dirname(dag.full_filepath or '')])
+        content = hashlib.sha1(
+            json.dumps(encoder.encode(dag), sort_keys=True).encode('utf-8'))
+        try:
+            with open(dag.full_filepath, 'rb') as dag_file:
+                content.update(dag_file.read())
+        except (IOError, OSError, TypeError):
+            pass
+        return content.hexdigest()
+
+    @classmethod
+    @provide_session
+    def load(cls, pickle_id, session=None):
+        """
+        Returns the DAG of a pickle, from the local cache when it holds the
+        pickle's content hash, otherwise from the database, caching it.
+
+        :param pickle_id: id of the pickle
+        :type pickle_id: int
+        :return: the DAG, or None if there is no such pickle
+        """
+        pickle_hash = (
+            session.query(cls.pickle_hash)
+            .filter(cls.id == pickle_id)
+            .scalar()
+        )
+        # Pickles written before the hash was a content hash are not cached,
+        # as their hash does not identify a single version of the DAG.
+        cache_path = None
+        if pickle_hash and _CONTENT_HASH_RE.match(pickle_hash):
+            cache_path = _cache_path(pickle_hash)
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'rb') as cache_file:
+                    dag = dill.load(cache_file)
+                os.utime(cache_path, None)
+                return dag
+            except Exception:
+                log.warning("Could not read the cached pickle %s", cache_path,
+                            exc_info=True)
+
+        dag_pickle = session.query(cls).filter(cls.id == pickle_id).first()
+        if not dag_pickle:
+            return None
+        if cache_path:
+            _write_cache(cache_path, dag_pickle.pickle)
+        return dag_pickle.pickle
+
+
+class _StableEncoder(object):
+    """
+    Encodes a value, and the objects it refers to, as JSON-compatible data
+    that only depends on their content. Objects met again are encoded as the
+    order in which they were first met, which also breaks reference cycles.
+    The code of functions and classes is followed when it comes from a
+    module under one of ``code_folders``, other code is only named. Values
+    without a stable encoding fall back on their repr, at worst making an
+    unchanged DAG look changed.
+    """
+
+    def __init__(self, code_folders):
+        self.code_folders = tuple(
+            os.path.join(os.path.realpath(folder), '')
+            for folder in code_folders if folder)
+        self.seen = {}
+
+    def encode(self, value):
+        if value is None or isinstance(value, (bool, float) + six.integer_types):
+            return value
+        elif isinstance(value, six.string_types):
+            return ['str', value]
+        elif isinstance(value, bytes):
+            return ['bytes', hashlib.sha1(value).hexdigest()]
+        elif isinstance(value, types.ModuleType):
+            return ['module', value.__name__]
+        elif isinstance(value, logging.Logger):
+            return ['logger', value.name]
+        elif isinstance(value, (datetime.datetime, datetime.date,
+                                datetime.timedelta, datetime.tzinfo)):
+            return ['repr', repr(value)]
+        elif (isinstance(value, (types.FunctionType, six.class_types)) and
+              not self._is_followed_code(value)):
+            return ['name', _qualified_name(value)]
+
+        if id(value) in self.seen:
+            return ['ref', self.seen[id(value)][0]]
+        # Keep the value alive, so that its id is not reused while encoding
+        self.seen[id(value)] = (len(self.seen), value)
+
+        if isinstance(value, (list, tuple)):
+            return [type(value).__name__, [self.encode(v) for v in value]]
+        elif isinstance(value, (set, frozenset)):
+            return ['set', sorted(json.dumps(self.encode(v), sort_keys=True)
+                                  for v in value)]
+        elif isinstance(value, dict):
+            return ['dict', self.encode_items(value)]
+        elif isinstance(value, types.MethodType):
+            return ['method', self.encode(value.__func__)]
+        elif isinstance(value, types.FunctionType):
+            code = value.__code__
+            return ['function', _qualified_name(value), {
+                'code': self.encode(code),
+                'defaults': self.encode(value.__defaults__),
+                'closure': [self.encode(cell.cell_contents)
+                            for cell in value.__closure__ or ()],
+                'globals': self.encode_items(
+                    {name: value.__globals__[name] for name in code.co_names
+                     if name in value.__globals__}),
+            }]
+        elif isinstance(value, types.CodeType):
+            return ['code', {
+                'code': hashlib.sha1(value.co_code).hexdigest(),
+                'consts': self.encode(value.co_consts),
+                'names': list(value.co_names),
+            }]
+        elif isinstance(value, (staticmethod, classmethod)):
+            return [type(value).__name__, self.encode(value.__func__)]
+        elif isinstance(value, property):
+            return ['property', [self.encode(value.fget), self.encode(value.fset),
+                                 self.encode(value.fdel)]]
+        elif isinstance(value, six.class_types):
+            return ['class', _qualified_name(value), {
+                'bases': [self.encode(base) for base in value.__bases__],
+                'attributes': self.encode_items(
+                    {k: v for k, v in vars(value).items()
+                     if not k.startswith('__')}),
+            }]
+        elif hasattr(value, '__dict__'):
+            return ['object', self.encode(type(value)), self.encode_items(
+                {k: v for k, v in vars(value).items()
+                 if k not in _VOLATILE_ATTRIBUTES})]
+        return ['repr', repr(value)]
+
+    def encode_items(self, mapping):
+        keys = sorted((json.dumps(self.encode(key), sort_keys=True), key)
+                      for key in mapping)
+        return [[encoded_key, self.encode(mapping[key])]
+                for encoded_key, key in keys]
+
+    def _is_followed_code(self, value):
+        module = sys.modules.get(value.__module__)
+        module_file = getattr(module, '__file__', None)
+        if not module_file:
+            # Not importable, so pickled by value
+            return value.__module__ != 'builtins'
+        return os.path.realpath(module_file).startswith(self.code_folders)
+
+
+def _qualified_name(value):
+    return '{}.{}'.format(getattr(value, '__module__', ''),
+                          getattr(value, '__qualname__', value.__name__))
+
+
+def _cache_dir():
+    return private_temp_dir('airflow-dag-pickles')
+
+
+def _cache_path(pickle_hash):
+    """
+    Path of the cached pickle with this content hash, or None if the cache
+    directory can not be used safely.
+    """
+    cache_dir = _cache_dir()
+    if not make_private_dir(cache_dir):
+        return None
+    return os.path.join(cache_dir, pickle_hash + '.pkl')
+
+
+def _write_cache(cache_path, dag):
+    cache_dir = os.path.dirname(cache_path)
+    temp_path = None
+    try:
+        temp_fd, temp_path = mkstemp(dir=cache_dir)
+        with os.fdopen(temp_fd, 'wb') as temp_file:
+            dill.dump(dag, temp_file)
+        os.rename(temp_path, cache_path)
+    except Exception:
+        log.warning("Could not cache the pickle %s", cache_path, exc_info=True)
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+        return
+
+    remove_stale_files(cache_dir, CACHE_MAX_AGE)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+from sqlalchemy import Column, String, Text
+
+from airflow.models.base import Base, ID_LEN
+from airflow.utils import timezone
+from airflow.utils.db import provide_session
+from airflow.utils.sqlalchemy import UtcDateTime
+
+
+class SerializedDagModel(Base):
+    """
+    A DAG in its serialized JSON form, written by the scheduler after it
+    parses the DAG file. This lets the webserver show DAGs without parsing
+    and executing DAG files itself. Subdags are stored within their parent.
+
+    ``dag_hash`` is the content hash of ``data``, so rewriting an unchanged
+    DAG is skipped and ``last_updated`` only moves when the DAG changed.
+    """
+
+    __tablename__ = 'serialized_dag'
+
+    dag_id = Column(String(ID_LEN), primary_key=True)
+    fileloc = Column(String(2000), nullable=False)
+    data = Column(Text, nullable=False)
+    dag_hash = Column(String(40), nullable=False)
+    last_updated = Column(UtcDateTime, nullable=False)
+
+    def __init__(self, dag):
+        from airflow.dag.serialization import SerializedDAG
+        self.dag_id = dag.dag_id
+        self.fileloc = dag.full_filepath
+        self.data = SerializedDAG.to_json(dag)
+        self.dag_hash = SerializedDAG.hash(self.data)
+        self.last_updated = timezone.utcnow()
+
+    @property
+    def dag(self):
+        from airflow.dag.serialization import SerializedDAG
+        return SerializedDAG.from_json(self.data)
+
+    @classmethod
+    @provide_session
+    def write_dag(cls, dag, session=None):
+        """
+        Serializes a root DAG and stores it, unless the stored version is
+        identical.
+
+        :return: whether the stored DAG was written
+        :rtype: bool
+        """
+        new = cls(dag)
+        old_hash = (
+            session.query(cls.dag_hash)
+            .filter(cls.dag_id == dag.dag_id)
+            .scalar()
+        )
+        if old_hash == new.dag_hash:
+            return False
+        session.merge(new)
+        session.commit()
+        return True
+
+    @classmethod
+    @provide_session
+    def get(cls, dag_id, session=None):
+        return session.query(cls).filter(cls.dag_id == dag_id).first()
+
+    @classmethod
+    @provide_session
+    def get_last_updated(cls, dag_id, session=None):
+        return (
+            session.query(cls.last_updated)
+            .filter(cls.dag_id == dag_id)
+            .scalar()
+        )
+
+    @classmethod
+    @provide_session
+    def remove_deleted_dags(cls, alive_dag_filelocs, session=None):
+        """
+        Deletes the DAGs whose file is no longer in the DAGs folder.
+
+        :param alive_dag_filelocs: paths of the current DAG files
+        :type alive_dag_filelocs: list
+        """
+        alive_dag_filelocs = set(alive_dag_filelocs)
+        stale_dag_ids = [
+            dag_id for dag_id, fileloc in session.query(cls.dag_id, cls.fileloc)
+            if fileloc not in alive_dag_filelocs
+        ]
+        if stale_dag_ids:
+            (session.query(cls)
+             .filter(cls.dag_id.in_(stale_dag_ids))
+             .delete(synchronize_session=False))
+            session.commit()
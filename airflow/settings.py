@@ -101,6 +101,7 @@ SIMPLE_LOG_FORMAT = conf.get('core', 'simple_log_format')
 
 AIRFLOW_HOME = None
 SQL_ALCHEMY_CONN = None
+TASK_SQL_ALCHEMY_CONN = None
 DAGS_FOLDER = None
 
 engine = None
@@ -137,23 +138,26 @@ def policy(task_instance):
 def configure_vars():
     global AIRFLOW_HOME
     global SQL_ALCHEMY_CONN
+    global TASK_SQL_ALCHEMY_CONN
     global DAGS_FOLDER
     AIRFLOW_HOME = os.path.expanduser(conf.get('core', 'AIRFLOW_HOME'))
     SQL_ALCHEMY_CONN = conf.get('core', 'SQL_ALCHEMY_CONN')
+    TASK_SQL_ALCHEMY_CONN = conf.get('core', 'TASK_SQL_ALCHEMY_CONN') or SQL_ALCHEMY_CONN
     DAGS_FOLDER = os.path.expanduser(conf.get('core', 'DAGS_FOLDER'))
 
 
-def configure_orm(disable_connection_pool=False):
+def configure_orm(disable_connection_pool=False, sql_alchemy_conn=None):
     log.debug("Setting up DB connection pool (PID %s)" % os.getpid())
     global engine
     global Session
     engine_args = {}
+    sql_alchemy_conn = sql_alchemy_conn or SQL_ALCHEMY_CONN
 
     pool_connections = conf.getboolean('core', 'SQL_ALCHEMY_POOL_ENABLED')
     if disable_connection_pool or not pool_connections:
         engine_args['poolclass'] = NullPool
         log.debug("settings.configure_orm(): Using NullPool")
-    elif 'sqlite' not in SQL_ALCHEMY_CONN:
+    elif 'sqlite' not in sql_alchemy_conn:
         # Pool size engine args not supported by sqlite.
         # If no config value is defined for the pool size, select a reasonable value.
         # 0 means no limit, which could lead to exceeding the Database connection limit.
@@ -186,7 +190,7 @@ def configure_orm(disable_connection_pool=False):
     # For Python2 we get back a newstr and need a str
     engine_args['encoding'] = engine_args['encoding'].__str__()
 
-    engine = create_engine(SQL_ALCHEMY_CONN, **engine_args)
+    engine = create_engine(sql_alchemy_conn, **engine_args)
     reconnect_timeout = conf.getint('core', 'SQL_ALCHEMY_RECONNECT_TIMEOUT')
     setup_event_handlers(engine, reconnect_timeout)
 
@@ -276,3 +280,10 @@ KILOBYTE = 1024
 MEGABYTE = KILOBYTE * KILOBYTE
 WEB_COLORS = {'LIGHTBLUE': '#4d9de0',
               'LIGHTORANGE': '#FF9933'}
+
+# Whether the scheduler stores serialized DAGs in the database, for the
+# webserver to read them instead of parsing the DAG files.
+try:
+    STORE_SERIALIZED_DAGS = conf.getboolean('core', 'store_serialized_dags')
+except conf.AirflowConfigException:
+    STORE_SERIALIZED_DAGS = False
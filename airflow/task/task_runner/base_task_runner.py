@@ -19,19 +19,28 @@
 
 from __future__ import unicode_literals
 
+import codecs
 import getpass
+import logging
 import os
 import subprocess
 import threading
+import time
 
 from airflow.utils.log.logging_mixin import LoggingMixin
 
 from airflow import configuration as conf
-from airflow.utils.configuration import tmp_configuration_copy
+from airflow.settings import Stats
+from airflow.utils.configuration import (cached_configuration_copy,
+                                         is_configuration_snapshot,
+                                         tmp_configuration_copy)
 
 
 PYTHONPATH_VAR = 'PYTHONPATH'
 
+# Size of the chunks of task output copied to the log file
+LOG_COPY_CHUNK_SIZE = 64 * 1024
+
 
 class BaseTaskRunner(LoggingMixin):
     """
@@ -58,13 +67,12 @@ class BaseTaskRunner(LoggingMixin):
             except conf.AirflowConfigException:
                 self.run_as_user = None
 
-        # Always provide a copy of the configuration file settings
-        cfg_path = tmp_configuration_copy()
-
         # Add sudo commands to change user if we need to. Needed to handle SubDagOperator
         # case using a SequentialExecutor.
         self.log.debug("Planning to run as the %s user", self.run_as_user)
         if self.run_as_user and (self.run_as_user != getpass.getuser()):
+            # Always provide a copy of the configuration file settings
+            cfg_path = tmp_configuration_copy()
             # Give ownership of file to user; only they can read and write
             subprocess.call(
                 ['sudo', 'chown', self.run_as_user, cfg_path],
@@ -77,6 +85,10 @@ class BaseTaskRunner(LoggingMixin):
 
             if pythonpath_value:
                 popen_prepend.append('{}={}'.format(PYTHONPATH_VAR, pythonpath_value))
+        else:
+            # Always provide a copy of the configuration file settings, shared
+            # by the tasks while the configuration is unchanged
+            cfg_path = cached_configuration_copy()
 
         self._cfg_path = cfg_path
         self._command = popen_prepend + self._task_instance.command_as_list(
@@ -90,15 +102,74 @@ class BaseTaskRunner(LoggingMixin):
         self.process = None
 
     def _read_task_logs(self, stream):
+        num_bytes = 0
+        start = time.time()
         while True:
             line = stream.readline()
-            if isinstance(line, bytes):
-                line = line.decode('utf-8')
             if len(line) == 0:
                 break
+            if isinstance(line, bytes):
+                num_bytes += len(line)
+                line = line.decode('utf-8')
+            else:
+                # Count the bytes the task wrote, as in raw mode
+                num_bytes += len(line.encode(getattr(stream, 'encoding', None) or 'utf-8'))
             self.log.info('Job %s: Subtask %s %s',
                           self._task_instance.job_id, self._task_instance.task_id,
                           line.rstrip('\n'))
+        self._record_log_volume(num_bytes, time.time() - start)
+
+    def _log_file_handlers(self):
+        """
+        :return: the handlers the records of the logger of this runner go to,
+            paired with the file handlers writing them
+        :rtype: list[tuple[logging.Handler, logging.FileHandler]]
+        """
+        file_handlers = []
+        logger = self.log
+        while logger:
+            for handler in logger.handlers:
+                # FileTaskHandler and its subclasses delegate to a file handler
+                file_handler = getattr(handler, 'handler', handler)
+                if isinstance(file_handler, logging.FileHandler):
+                    file_handlers.append((handler, file_handler))
+            if not logger.propagate:
+                break
+            logger = logger.parent
+        return file_handlers
+
+    def _copy_task_logs(self, stream, file_handlers):
+        """
+        Copies the output of the task to the log files as is, by chunks.
+        """
+        num_bytes = 0
+        start = time.time()
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        fd = stream.fileno()
+        while True:
+            chunk = os.read(fd, LOG_COPY_CHUNK_SIZE)
+            num_bytes += len(chunk)
+            text = decoder.decode(chunk, final=not chunk)
+            if text:
+                for handler, file_handler in file_handlers:
+                    # Hold the lock of the handler so that the records logged
+                    # meanwhile are not written in the middle of the output
+                    handler.acquire()
+                    try:
+                        file_handler.stream.write(text)
+                        file_handler.flush()
+                    finally:
+                        handler.release()
+            if not chunk:
+                break
+        stream.close()
+        self._record_log_volume(num_bytes, time.time() - start)
+
+    def _record_log_volume(self, num_bytes, duration):
+        ti = self._task_instance
+        Stats.incr('ti.log_bytes.{}.{}'.format(ti.dag_id, ti.task_id), num_bytes)
+        self.log.info('Forwarded %s bytes of task output in %.2f seconds (%.1f kB/s)',
+                      num_bytes, duration, num_bytes / 1024.0 / max(duration, 0.001))
 
     def run_command(self, run_with=None, join_args=False):
         """
@@ -127,15 +198,24 @@ class BaseTaskRunner(LoggingMixin):
             env=os.environ.copy(),
             preexec_fn=os.setsid
         )
+        self._start_log_reader(proc.stdout)
+        return proc
 
+    def _start_log_reader(self, stream):
         # Start daemon thread to read subprocess logging output
+        target, args = self._read_task_logs, (stream,)
+        if conf.getboolean('core', 'raw_task_log_forwarding'):
+            file_handlers = [(handler, file_handler)
+                             for handler, file_handler in self._log_file_handlers()
+                             if file_handler.stream is not None]
+            if file_handlers:
+                target, args = self._copy_task_logs, (stream, file_handlers)
         log_reader = threading.Thread(
-            target=self._read_task_logs,
-            args=(proc.stdout,),
+            target=target,
+            args=args,
         )
         log_reader.daemon = True
         log_reader.start()
-        return proc
 
     def start(self):
         """
@@ -151,6 +231,21 @@ class BaseTaskRunner(LoggingMixin):
         """
         raise NotImplementedError()
 
+    def wait(self, timeout):
+        """
+        Wait for the task instance to be done, for at most `timeout` seconds.
+
+        :return: The return code associated with running the task instance or
+        None if the task is not yet done.
+        :rtype int:
+        """
+        deadline = time.time() + timeout
+        return_code = self.return_code()
+        while return_code is None and time.time() < deadline:
+            time.sleep(min(0.1, max(0, deadline - time.time())))
+            return_code = self.return_code()
+        return return_code
+
     def terminate(self):
         """
         Kill the running task instance.
@@ -161,5 +256,7 @@ class BaseTaskRunner(LoggingMixin):
         """
         A callback that should be called when this is done running.
         """
+        if self._cfg_path and is_configuration_snapshot(self._cfg_path):
+            return
         if self._cfg_path and os.path.isfile(self._cfg_path):
             subprocess.call(['sudo', 'rm', self._cfg_path], close_fds=True)
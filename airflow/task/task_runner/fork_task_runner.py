@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import getpass
+import os
+import signal
+import sys
+import traceback
+
+import psutil
+
+from airflow.task.task_runner.standard_task_runner import StandardTaskRunner
+from airflow.utils.cli import run_in_process
+from airflow.utils.helpers import reap_process_group
+
+
+class ForkTaskRunner(StandardTaskRunner):
+    """
+    Runs the raw Airflow task in a child forked from the process of the
+    LocalTaskJob, rather than in a new `airflow run --raw` process. The child
+    already has Airflow imported and the DAG parsed, which saves starting an
+    interpreter and parsing the DAG file for every task instance.
+
+    Like the command, the child leads its own process group and its output
+    is logged by this process. Tasks running as another user are still run
+    with the command, as well as all tasks on platforms without fork.
+    """
+    def __init__(self, local_task_job):
+        super(ForkTaskRunner, self).__init__(local_task_job)
+        self._forked = False
+        self._return_code = None
+
+    def _can_fork(self):
+        return (
+            hasattr(os, 'fork') and
+            hasattr(self._task_instance, 'task') and
+            (not self.run_as_user or self.run_as_user == getpass.getuser())
+        )
+
+    def start(self):
+        if not self._can_fork():
+            super(ForkTaskRunner, self).start()
+            return
+
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            self._run_forked(write_fd)
+
+        os.close(write_fd)
+        self.log.info('Running: %s in forked process %s', self._command, pid)
+        self._forked = True
+        self.process = psutil.Process(pid)
+        self._start_log_reader(os.fdopen(read_fd, 'r'))
+
+    def _run_forked(self, write_fd):
+        """
+        Runs the task in the forked child, as `airflow run --raw` would, and
+        exits.
+        """
+        return_code = 1
+        try:
+            os.setsid()
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+            # `airflow run` redirects sys.stdout and sys.stderr to its logger
+            # when it is not interactive, so the descriptors are replaced
+            # directly and the child writes to the real streams again.
+            for stream in (sys.stdout, sys.stderr, sys.__stdout__, sys.__stderr__):
+                stream.flush()
+            os.dup2(write_fd, 1)
+            os.dup2(write_fd, 2)
+            os.close(write_fd)
+            sys.stdout = sys.__stdout__
+            sys.stderr = sys.__stderr__
+
+            # The command sets up its own database engine and loggers, but
+            # uses the DAG already parsed instead of parsing its file again.
+            return_code = run_in_process(self._command,
+                                         dag=self._task_instance.task.dag)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(return_code)
+
+    def return_code(self):
+        if not self._forked:
+            return super(ForkTaskRunner, self).return_code()
+        if self._return_code is None:
+            try:
+                self._return_code = self.process.wait(timeout=0)
+            except psutil.TimeoutExpired:
+                pass
+        return self._return_code
+
+    def wait(self, timeout):
+        if not self._forked:
+            return super(ForkTaskRunner, self).wait(timeout)
+        if self._return_code is None:
+            try:
+                self._return_code = self.process.wait(timeout)
+            except psutil.TimeoutExpired:
+                pass
+        return self._return_code
+
+    def terminate(self):
+        if not self._forked:
+            super(ForkTaskRunner, self).terminate()
+            return
+        if self.return_code() is not None:
+            return
+        reap_process_group(self.process.pid, self.log)
+        if self.return_code() is None:
+            # The child was waited for by reap_process_group, its return code
+            # is lost.
+            self._return_code = -signal.SIGTERM
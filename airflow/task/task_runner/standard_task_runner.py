@@ -36,6 +36,19 @@ class StandardTaskRunner(BaseTaskRunner):
     def return_code(self):
         return self.process.poll()
 
+    def wait(self, timeout):
+        if self.process.returncode is not None:
+            return self.process.returncode
+        try:
+            return_code = psutil.Process(self.process.pid).wait(timeout)
+        except psutil.TimeoutExpired:
+            return None
+        except psutil.NoSuchProcess:
+            return self.process.poll()
+        # The process was reaped by psutil, record its return code
+        self.process.returncode = return_code
+        return return_code
+
     def terminate(self):
         if self.process and psutil.pid_exists(self.process.pid):
             reap_process_group(self.process.pid, self.log)
@@ -25,12 +25,16 @@ from __future__ import absolute_import
 import functools
 import getpass
 import json
+import os
+import signal
 import socket
 import sys
+import traceback
 from argparse import Namespace
 from datetime import datetime
 
 import airflow.models
+from airflow import configuration
 from airflow.utils import cli_action_loggers
 
 
@@ -115,3 +119,76 @@ def _build_metrics(func_name, namespace):
         execution_date=metrics.get('execution_date'))
     metrics['log'] = log
     return metrics
+
+
+def can_fork_command(command):
+    """
+    Whether the command can be run in a child forked from the worker, which
+    already has Airflow imported, instead of in a new Python interpreter.
+    """
+    return (
+        hasattr(os, 'fork') and
+        isinstance(command, (list, tuple)) and
+        len(command) > 1 and command[0] == 'airflow' and
+        not configuration.conf.getboolean('core', 'execute_tasks_new_python_interpreter')
+    )
+
+
+def run_in_process(command, **kwargs):
+    """
+    Runs an `airflow` command in this process, as the command line would but
+    without starting a new interpreter. The command sets up the process for
+    itself, so this is meant to be called in a process dedicated to it.
+
+    :param command: the command, starting with `airflow`
+    :type command: list[str]
+    :param kwargs: extra keyword arguments for the function of the sub-command
+    :return: the exit code of the command
+    :rtype: int
+    """
+    from airflow import settings
+    from airflow.bin import cli
+
+    # The command replaces the engine of the process. Keep the inherited one
+    # referenced, so that its connections, still used by the parent, are not
+    # closed when it is garbage collected.
+    inherited_engine = settings.engine  # noqa: F841
+    sys.argv = list(command)
+    try:
+        args = cli.CLIFactory.get_parser().parse_args(command[1:])
+        args.func(args, **kwargs)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    return 0
+
+
+def fork_and_run(command):
+    """
+    Runs an `airflow` command in a child forked from this process, which
+    already has Airflow imported, and waits for it to finish.
+
+    :param command: the command, starting with `airflow`
+    :type command: list[str]
+    :return: the exit code of the command, or minus the signal that killed it
+    :rtype: int
+    """
+    pid = os.fork()
+    if pid:
+        _, status = os.waitpid(pid, 0)
+        if os.WIFSIGNALED(status):
+            return -os.WTERMSIG(status)
+        return os.WEXITSTATUS(status)
+
+    return_code = 1
+    try:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        return_code = run_in_process(command)
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(return_code)
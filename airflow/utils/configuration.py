@@ -19,11 +19,20 @@
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
+import hashlib
 import os
 import json
+import time
 from tempfile import mkstemp
 
 from airflow import configuration as conf
+from airflow.utils.file import (
+    is_private, make_private_dir, private_temp_dir, remove_stale_files
+)
+
+# Snapshots of the configuration older than this, in seconds, are not reused,
+# so that the options read from commands are run again once in a while
+SNAPSHOT_MAX_AGE = 300
 
 
 def tmp_configuration_copy(chmod=0o600):
@@ -41,3 +50,63 @@ def tmp_configuration_copy(chmod=0o600):
         json.dump(cfg_dict, temp_file)
 
     return cfg_path
+
+
+def _snapshot_dir():
+    return private_temp_dir('airflow-cfg-snapshots')
+
+
+def _configuration_version():
+    """
+    Digest of what the configuration settings are made of: the options read
+    from the config files or set in this process, and the environment
+    variables. Computing it does not run the commands of the options read
+    from commands.
+    """
+    version = hashlib.sha256()
+    for config in (conf.conf.airflow_defaults, conf.conf):
+        version.update(json.dumps(config._sections, sort_keys=True).encode('utf-8'))
+    env_vars = sorted((k, v) for k, v in os.environ.items() if k.startswith('AIRFLOW__'))
+    version.update(json.dumps(env_vars).encode('utf-8'))
+    return version.hexdigest()
+
+
+def is_configuration_snapshot(cfg_path):
+    """
+    Whether the path is a snapshot returned by cached_configuration_copy,
+    which is not to be removed by the commands using it.
+    """
+    return os.path.dirname(os.path.abspath(cfg_path)) == _snapshot_dir()
+
+
+def cached_configuration_copy():
+    """
+    Returns a path for a file including a full copy of the configuration
+    settings, as tmp_configuration_copy does. The file is a snapshot shared
+    by all the callers for as long as the configuration is unchanged, and is
+    named after the digest of the configuration. Falls back on a temporary
+    copy if the snapshot directory cannot be used safely.
+
+    Snapshots are removed once they are older than twice SNAPSHOT_MAX_AGE,
+    so the path is meant for commands started right away. Commands that can
+    wait in a queue get their own tmp_configuration_copy instead.
+    :return: a path to the snapshot file
+    """
+    snapshot_dir = _snapshot_dir()
+    if not make_private_dir(snapshot_dir):
+        return tmp_configuration_copy()
+    try:
+        cfg_path = os.path.join(snapshot_dir, _configuration_version() + '.json')
+        if (os.path.exists(cfg_path) and is_private(cfg_path) and
+                time.time() - os.path.getmtime(cfg_path) < SNAPSHOT_MAX_AGE):
+            return cfg_path
+
+        temp_path = tmp_configuration_copy()
+        os.rename(temp_path, cfg_path)
+    except OSError:
+        return tmp_configuration_copy()
+
+    # Remove the snapshots of earlier configurations, once the tasks started
+    # with them had time to read them
+    remove_stale_files(snapshot_dir, 2 * SNAPSHOT_MAX_AGE)
+    return cfg_path
@@ -27,6 +27,7 @@ import multiprocessing
 import os
 import re
 import signal
+import stat
 import sys
 import time
 import zipfile
@@ -38,7 +39,7 @@ from importlib import import_module
 
 import psutil
 from six.moves import range, reload_module
-from sqlalchemy import or_
+from sqlalchemy import and_, or_
 from tabulate import tabulate
 
 # To avoid circular imports
@@ -47,8 +48,9 @@ from airflow import configuration as conf
 from airflow.dag.base_dag import BaseDag, BaseDagBag
 from airflow.exceptions import AirflowException
 from airflow.models import errors
-from airflow.settings import logging_class_path
-from airflow.utils import timezone
+from airflow.models.serialized_dag import SerializedDagModel
+from airflow.settings import logging_class_path, STORE_SERIALIZED_DAGS
+from airflow.utils import helpers, timezone
 from airflow.utils.db import provide_session
 from airflow.utils.log.logging_mixin import LoggingMixin
 from airflow.utils.state import State
@@ -78,6 +80,8 @@ class SimpleDag(BaseDag):
             special_args = {}
             if task.task_concurrency is not None:
                 special_args['task_concurrency'] = task.task_concurrency
+            if task.retries:
+                special_args['retries'] = task.retries
             if len(special_args) > 0:
                 self._task_special_args[task.task_id] = special_args
 
@@ -237,6 +241,67 @@ class SimpleTaskInstance(object):
         return ti
 
 
+class TaskInstanceRow(object):
+    """
+    Compact projection of the columns of a task instance the scheduler needs
+    to pick the task instances to run. Rows are loaded with column queries,
+    which skips building ORM objects and unpickling their executor_config.
+    """
+
+    __slots__ = ('dag_id', 'task_id', 'execution_date', 'state', '_try_number',
+                 'pool', 'priority_weight', 'queue')
+
+    def __init__(self, dag_id, task_id, execution_date, state, _try_number,
+                 pool, priority_weight, queue):
+        self.dag_id = dag_id
+        self.task_id = task_id
+        self.execution_date = execution_date
+        self.state = state
+        self._try_number = _try_number
+        self.pool = pool
+        self.priority_weight = priority_weight
+        self.queue = queue
+
+    @staticmethod
+    def columns():
+        """
+        The columns to query, in the order of the constructor arguments.
+        """
+        TI = airflow.models.TaskInstance
+        return (TI.dag_id, TI.task_id, TI.execution_date, TI.state,
+                TI._try_number, TI.pool, TI.priority_weight, TI.queue)
+
+    @classmethod
+    def query(cls, session):
+        """
+        Returns a query of the task instance table selecting the columns of
+        the rows, to be filtered and then passed to :meth:`from_query`.
+        """
+        return session.query(*cls.columns())
+
+    @classmethod
+    def from_query(cls, query):
+        return [cls(*row) for row in query]
+
+    @property
+    def try_number(self):
+        # Same as TaskInstance.try_number, so that the keys match the ones
+        # known by the executor.
+        if self.state == State.RUNNING:
+            return self._try_number
+        return self._try_number + 1
+
+    @property
+    def key(self):
+        return self.dag_id, self.task_id, self.execution_date, self.try_number
+
+    def __repr__(self):
+        return (
+            "<TaskInstance: {ti.dag_id}.{ti.task_id} "
+            "{ti.execution_date} [{ti.state}]>"
+        ).format(ti=self)
+
+
 class SimpleDagBag(BaseDagBag):
     """
     A collection of SimpleDag objects with some convenience methods.
@@ -276,11 +341,74 @@ class SimpleDagBag(BaseDagBag):
         return self.dag_id_to_simple_dag[dag_id]
 
 
+# Size of the chunks read to look for the words of the DAG file heuristic
+_HEURISTIC_CHUNK_SIZE = 64 * 1024
+
+# Whether list_py_file_paths lists the files it examined, keyed by path, with
+# the modification time and size of the file and the safe mode of the listing
+_examined_files = {}
+
+
+def _read_ignore_patterns(ignore_file):
+    """
+    :return: the compiled regular expressions of an .airflowignore file
+    :rtype: list
+    """
+    with open(ignore_file, 'r') as f:
+        return [re.compile(p) for p in f.read().split('\n') if p]
+
+
+def _file_contains_words(file_path, words):
+    """
+    Reads the file by chunks until all the words are found, so that only the
+    beginning of most DAG files is read.
+    """
+    words = set(words)
+    overlap = max(len(word) for word in words) - 1
+    tail = b''
+    with open(file_path, 'rb') as f:
+        while words:
+            chunk = f.read(_HEURISTIC_CHUNK_SIZE)
+            if not chunk:
+                return False
+            # Keep the end of the previous chunk for the words split over two
+            content = tail + chunk
+            words = set(word for word in words if word not in content)
+            tail = content[-overlap:]
+    return True
+
+
+def _is_dag_file(file_path, stat_result, safe_mode):
+    """
+    Whether the file is a Python or zip file that might define DAGs. The
+    result of the previous examination of the file is returned if the file
+    was not modified since.
+    """
+    version = (stat_result.st_mtime, stat_result.st_size, safe_mode)
+    examined = _examined_files.get(file_path)
+    if examined and examined[0] == version:
+        return examined[1]
+
+    is_dag_file = True
+    is_zipfile = zipfile.is_zipfile(file_path)
+    if not file_path.endswith('.py') and not is_zipfile:
+        is_dag_file = False
+    elif safe_mode and not is_zipfile:
+        # Heuristic that guesses whether a Python file contains an Airflow DAG
+        # definition.
+        is_dag_file = _file_contains_words(file_path, (b'DAG', b'airflow'))
+    _examined_files[file_path] = (version, is_dag_file)
+    return is_dag_file
+
+
 def list_py_file_paths(directory, safe_mode=True,
                        include_examples=conf.getboolean('core', 'LOAD_EXAMPLES')):
     """
     Traverse a directory and look for Python files.
 
+    The results of the examination of the files are kept until they are
+    modified, so that listing the same directory again only stats the files.
+
     :param directory: the directory to traverse
     :type directory: unicode
     :param safe_mode: whether to use a heuristic to determine whether a file
@@ -295,14 +423,14 @@ def list_py_file_paths(directory, safe_mode=True,
         return [directory]
     elif os.path.isdir(directory):
         patterns_by_dir = {}
+        seen_files = set()
         for root, dirs, files in os.walk(directory, followlinks=True):
             patterns = patterns_by_dir.get(root, [])
             ignore_file = os.path.join(root, '.airflowignore')
             if os.path.isfile(ignore_file):
-                with open(ignore_file, 'r') as f:
-                    # If we have new patterns create a copy so we don't change
-                    # the previous list (which would affect other subdirs)
-                    patterns = patterns + [p for p in f.read().split('\n') if p]
+                # If we have new patterns create a copy so we don't change
+                # the previous list (which would affect other subdirs)
+                patterns = patterns + _read_ignore_patterns(ignore_file)
 
             # If we can ignore any subdirs entirely we should - fewer paths
             # to walk is better. We have to modify the ``dirs`` array in
@@ -310,7 +438,7 @@ def list_py_file_paths(directory, safe_mode=True,
             dirs[:] = [
                 d
                 for d in dirs
-                if not any(re.search(p, os.path.join(root, d)) for p in patterns)
+                if not any(p.search(os.path.join(root, d)) for p in patterns)
             ]
 
             # We want patterns defined in a parent folder's .airflowignore to
@@ -321,31 +449,23 @@ def list_py_file_paths(directory, safe_mode=True,
             for f in files:
                 try:
                     file_path = os.path.join(root, f)
-                    if not os.path.isfile(file_path):
-                        continue
-                    mod_name, file_ext = os.path.splitext(
-                        os.path.split(file_path)[-1])
-                    if file_ext != '.py' and not zipfile.is_zipfile(file_path):
+                    stat_result = os.stat(file_path)
+                    if not stat.S_ISREG(stat_result.st_mode):
                         continue
-                    if any([re.findall(p, file_path) for p in patterns]):
-                        continue
-
-                    # Heuristic that guesses whether a Python file contains an
-                    # Airflow DAG definition.
-                    might_contain_dag = True
-                    if safe_mode and not zipfile.is_zipfile(file_path):
-                        with open(file_path, 'rb') as f:
-                            content = f.read()
-                            might_contain_dag = all(
-                                [s in content for s in (b'DAG', b'airflow')])
-
-                    if not might_contain_dag:
+                    seen_files.add(file_path)
+                    if any(p.search(file_path) for p in patterns):
                         continue
-
-                    file_paths.append(file_path)
+                    if _is_dag_file(file_path, stat_result, safe_mode):
+                        file_paths.append(file_path)
                 except Exception:
                     log = LoggingMixin().log
                     log.exception("Error while examining %s", f)
+
+        # Forget the files removed from the directory
+        prefix = os.path.join(directory, '')
+        for file_path in list(_examined_files):
+            if file_path.startswith(prefix) and file_path not in seen_files:
+                del _examined_files[file_path]
     if include_examples:
         import airflow.example_dags
         example_dag_folder = airflow.example_dags.__path__[0]
@@ -751,6 +871,14 @@ class DagFileProcessorManager(LoggingMixin):
         self.last_stat_print_time = timezone.datetime(2000, 1, 1)
         # TODO: Remove magic number
         self._zombie_query_interval = 10
+        self._max_tis_per_query = conf.getint('scheduler', 'max_tis_per_query')
+        # Map from the DAG IDs found by the processors to their file path
+        self._dag_id_to_file_path = {}
+        # Map from the DAG IDs found by the processors to their SimpleDag
+        self._simple_dags = {}
+        # Map from file path to the reaped zombies the next processor of the
+        # file handles
+        self._zombies_by_file = defaultdict(list)
         # Map from file path to the number of runs
         self._run_count = defaultdict(int)
         # Manager heartbeat key.
@@ -912,6 +1040,12 @@ class DagFileProcessorManager(LoggingMixin):
             except Exception:
                 self.log.exception("Error removing old import errors")
 
+            if STORE_SERIALIZED_DAGS:
+                try:
+                    SerializedDagModel.remove_deleted_dags(self._file_paths)
+                except Exception:
+                    self.log.exception("Error removing deleted serialized DAGs")
+
     def _print_stat(self):
         """
         Occasionally print out stats about how fast the files are getting processed
@@ -1078,6 +1212,9 @@ class DagFileProcessorManager(LoggingMixin):
         self._file_paths = new_file_paths
         self._file_path_queue = [x for x in self._file_path_queue
                                  if x in new_file_paths]
+        for file_path in list(self._zombies_by_file):
+            if file_path not in new_file_paths:
+                del self._zombies_by_file[file_path]
         # Stop processors that are working on deleted files
         filtered_processors = {}
         for file_path, processor in self._processors.items():
@@ -1147,7 +1284,11 @@ class DagFileProcessorManager(LoggingMixin):
                 )
             else:
                 for simple_dag in processor.result:
-                    simple_dags.append(simple_dag)
+                    self._dag_id_to_file_path[simple_dag.dag_id] = file_path
+                    self._simple_dags[simple_dag.dag_id] = simple_dag
+                    # Only return DAGs that are not paused
+                    if not simple_dag.is_paused:
+                        simple_dags.append(simple_dag)
 
         # Generate more file paths to process if we processed all the files
         # already.
@@ -1186,12 +1327,13 @@ class DagFileProcessorManager(LoggingMixin):
 
             self._file_path_queue.extend(files_paths_to_queue)
 
-        zombies = self._find_zombies()
+        self._reap_zombies(self._find_zombies())
 
         # Start more processors if we have enough slots and files to process
         while (self._parallelism - len(self._processors) > 0 and
                len(self._file_path_queue) > 0):
             file_path = self._file_path_queue.pop(0)
+            zombies = self._zombies_by_file.pop(file_path, [])
             processor = self._processor_factory(file_path, zombies)
 
             processor.start()
@@ -1242,6 +1384,80 @@ class DagFileProcessorManager(LoggingMixin):
 
         return zombies
 
+    @provide_session
+    def _reap_zombies(self, zombies, session=None):
+        """
+        Fails the zombie task instances, or sets them up for retry, in bulk.
+        The reaped zombies are handled by the next processor of the file of
+        their DAG only, which records their failure and sends their emails
+        and callbacks. Since they are no longer running, the next queries do
+        not find them again. Zombies of DAGs no processor has found yet are
+        left running until one does, as whether they can be retried depends
+        on their task.
+
+        :param zombies: zombie task instances
+        :type zombies: list[SimpleTaskInstance]
+        """
+        zombies_by_key = dict((zombie.key[:3], zombie) for zombie in zombies
+                              if zombie.dag_id in self._simple_dags)
+        if not zombies_by_key:
+            return
+        TI = airflow.models.TaskInstance
+
+        def filter_for_keys(keys):
+            return or_(*[and_(TI.dag_id == dag_id,
+                              TI.task_id == task_id,
+                              TI.execution_date == execution_date)
+                         for dag_id, task_id, execution_date in keys])
+
+        def reap(result, keys):
+            running = (
+                session
+                .query(TI.dag_id, TI.task_id, TI.execution_date,
+                       TI._try_number, TI.max_tries)
+                .filter(filter_for_keys(keys), TI.state == State.RUNNING)
+                .with_for_update()
+                .all())
+            if not running:
+                return result
+
+            # As TaskInstance.handle_failure does, through is_eligible_to_retry
+            keys_by_state = {State.UP_FOR_RETRY: [], State.FAILED: []}
+            for dag_id, task_id, execution_date, try_number, max_tries in running:
+                retries = self._simple_dags[dag_id].get_task_special_arg(
+                    task_id, 'retries')
+                if retries and try_number <= max_tries:
+                    state = State.UP_FOR_RETRY
+                else:
+                    state = State.FAILED
+                keys_by_state[state].append((dag_id, task_id, execution_date))
+
+            now = timezone.utcnow()
+            for state, state_keys in keys_by_state.items():
+                if not state_keys:
+                    continue
+                session.query(TI).filter(
+                    filter_for_keys(state_keys),
+                    TI.state == State.RUNNING,
+                ).update({TI.state: state, TI.end_date: now},
+                         synchronize_session=False)
+                result += [(key, state, now) for key in state_keys]
+            return result
+
+        reaped = helpers.reduce_in_chunks(reap,
+                                          list(zombies_by_key),
+                                          [],
+                                          self._max_tis_per_query)
+        session.commit()
+
+        for key, state, end_date in reaped:
+            zombie = zombies_by_key[key]
+            zombie._state = state
+            zombie._end_date = end_date
+            file_path = self._dag_id_to_file_path[zombie.dag_id]
+            self._zombies_by_file[file_path].append(zombie)
+        self.log.info("Reaped %s zombie task instances", len(reaped))
+
     def max_runs_reached(self):
         """
         :return: whether all file paths have been processed max_runs times
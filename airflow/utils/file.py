@@ -23,7 +23,9 @@ from __future__ import unicode_literals
 import errno
 import os
 import shutil
-from tempfile import mkdtemp
+import stat
+import time
+from tempfile import gettempdir, mkdtemp
 
 from contextlib import contextmanager
 
@@ -60,3 +62,68 @@ def mkdirs(path, mode):
             raise
     finally:
         os.umask(o_umask)
+
+
+def private_temp_dir(name):
+    """
+    Returns the path of the temporary directory of the current user named
+    after name, for files only this user is to read and write. The directory
+    is created by make_private_dir.
+
+    :param name: The prefix of the directory name, followed by the user id
+    :type name: str
+    """
+    return os.path.join(gettempdir(), '{}-{}'.format(name, os.geteuid()))
+
+
+def is_private(path, file_type=stat.S_ISREG):
+    """
+    Whether path is of the given file type, is not a symbolic link, is owned
+    by the current user and can not be accessed by anyone else.
+
+    :param path: The path to check
+    :type path: str
+    :param file_type: The stat function checking the file type e.g. stat.S_ISDIR
+    :type file_type: callable
+    """
+    path_stat = os.lstat(path)
+    return (file_type(path_stat.st_mode) and
+            path_stat.st_uid == os.geteuid() and
+            not path_stat.st_mode & 0o077)
+
+
+def make_private_dir(path):
+    """
+    Creates the directory specified by path with mode 0o700 if it does not
+    exist. Returns whether the directory can be used safely, i.e. whether
+    it is private to the current user, so that its files can not have been
+    planted or read by someone else.
+
+    :param path: The directory to create
+    :type path: str
+    """
+    try:
+        if not os.path.exists(path):
+            os.mkdir(path, 0o700)
+        return is_private(path, stat.S_ISDIR)
+    except OSError:
+        return False
+
+
+def remove_stale_files(directory, max_age):
+    """
+    Removes the files of directory that were not modified for more than
+    max_age seconds, ignoring the ones that can not be removed.
+
+    :param directory: The directory to clean up
+    :type directory: str
+    :param max_age: The age in seconds after which files are removed
+    :type max_age: int
+    """
+    for file_name in os.listdir(directory):
+        path = os.path.join(directory, file_name)
+        try:
+            if time.time() - os.path.getmtime(path) > max_age:
+                os.remove(path)
+        except OSError:
+            pass
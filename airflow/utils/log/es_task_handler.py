@@ -31,6 +31,7 @@ from airflow.utils.log.logging_mixin import LoggingMixin
 class ElasticsearchTaskHandler(FileTaskHandler, LoggingMixin):
     PAGE = 0
     MAX_LINE_PER_PAGE = 1000
+    raw_log_chunks = False
 
     """
     ElasticsearchTaskHandler is a python log handler that
@@ -25,6 +25,10 @@ from airflow import configuration as conf
 from airflow.configuration import AirflowConfigException
 from airflow.utils.file import mkdirs
 from airflow.utils.helpers import parse_template_string
+from airflow.utils.state import State
+
+# Used when [webserver] log_fetch_chunk_size is not configured.
+DEFAULT_LOG_CHUNK_SIZE = 1024 * 1024
 
 
 class FileTaskHandler(logging.Handler):
@@ -35,6 +39,10 @@ class FileTaskHandler(logging.Handler):
     It reads logs from task instance's host machine.
     """
 
+    # Whether the chunks returned by read are consecutive parts of the raw
+    # log, as opposed to lines without their trailing newlines.
+    raw_log_chunks = True
+
     def __init__(self, base_log_folder, filename_template):
         """
         :param base_log_folder: Base log folder to place logs.
@@ -87,6 +95,7 @@ class FileTaskHandler(logging.Handler):
         :param try_number: current try_number to read log from
         :param metadata: log metadata,
                          can be used for steaming log reading and auto-tailing.
+                         ``offset`` is the byte offset to resume reading from.
         :return: log message as a string and metadata.
         """
         # Task instance here might be different from task instance when
@@ -94,17 +103,25 @@ class FileTaskHandler(logging.Handler):
         # is needed to get correct log path.
         log_relative_path = self._render_filename(ti, try_number)
         location = os.path.join(self.local_base, log_relative_path)
+        offset = (metadata or {}).get('offset', 0)
+        # Logs of the running try keep growing, so reaching the end of
+        # the file does not mean the end of the log.
+        running = ti.state == State.RUNNING and try_number == ti.try_number
 
         log = ""
 
         if os.path.exists(location):
             try:
-                with open(location) as f:
+                chunk, metadata = self._read_chunk(
+                    lambda start, length: self._read_local_range(location, start, length),
+                    offset, running)
+                if offset == 0:
                     log += "*** Reading local file: {}\n".format(location)
-                    log += "".join(f.readlines())
+                log += chunk
             except Exception as e:
                 log = "*** Failed to load local log file: {}\n".format(location)
                 log += "*** {}\n".format(str(e))
+                metadata = {'end_of_log': True}
         else:
             url = os.path.join(
                 "http://{ti.hostname}:{worker_log_server_port}/log", log_relative_path
@@ -112,8 +129,9 @@ class FileTaskHandler(logging.Handler):
                 ti=ti,
                 worker_log_server_port=conf.get('celery', 'WORKER_LOG_SERVER_PORT')
             )
-            log += "*** Log file does not exist: {}\n".format(location)
-            log += "*** Fetching from: {}\n".format(url)
+            if offset == 0:
+                log += "*** Log file does not exist: {}\n".format(location)
+                log += "*** Fetching from: {}\n".format(url)
             try:
                 timeout = None  # No timeout
                 try:
@@ -121,16 +139,152 @@ class FileTaskHandler(logging.Handler):
                 except (AirflowConfigException, ValueError):
                     pass
 
-                response = requests.get(url, timeout=timeout)
-
-                # Check if the resource was properly fetched
-                response.raise_for_status()
-
-                log += '\n' + response.text
+                chunk, metadata = self._read_chunk(
+                    lambda start, length: self._fetch_worker_range(url, start, length, timeout),
+                    offset, running)
+                if offset == 0:
+                    log += '\n'
+                log += chunk
             except Exception as e:
                 log += "*** Failed to fetch log file from worker. {}\n".format(str(e))
+                metadata = {'end_of_log': True}
+
+        return log, metadata
+
+    @staticmethod
+    def _get_chunk_size():
+        """
+        Maximum number of bytes of a log returned by a single read.
+        """
+        try:
+            return conf.getint('webserver', 'log_fetch_chunk_size')
+        except (AirflowConfigException, ValueError):
+            return DEFAULT_LOG_CHUNK_SIZE
+
+    def _read_chunk(self, read_range, offset, running=False):
+        """
+        Read the next chunk of a log starting at ``offset``.
+        :param read_range: callable taking a byte offset and a length and
+                           returning the raw bytes read and the total size
+                           of the log in bytes.
+        :param offset: byte offset to start reading from.
+        :param running: whether the log may still grow.
+        :return: log chunk as a string, ending where the next chunk starts,
+                 and the metadata to read the next chunk.
+        """
+        data, size = read_range(offset, self._get_chunk_size())
+        end = offset + len(data)
+        newline = data.rfind(b'\n')
+        if end < size or running:
+            # Only hand out complete lines, the rest is read with the next
+            # chunk. This also avoids splitting multi-byte characters.
+            if newline != -1:
+                data = data[:newline + 1]
+            else:
+                # A line longer than a chunk is split, but not within a
+                # character.
+                data = self._trim_partial_character(data) or data
+        next_offset = offset + len(data)
+        return data.decode('utf-8', 'replace'), {
+            'offset': next_offset,
+            'end_of_log': next_offset >= size and not running,
+        }
+
+    @staticmethod
+    def _trim_partial_character(data):
+        """
+        Drop the bytes of a UTF-8 character cut off at the end of data.
+        """
+        for i in range(1, min(4, len(data)) + 1):
+            lead = bytearray(data[-i:])[0]
+            if lead & 0xC0 != 0x80:
+                # First byte of the last character, tells its length
+                if lead >= 0xF0:
+                    length = 4
+                elif lead >= 0xE0:
+                    length = 3
+                elif lead >= 0xC0:
+                    length = 2
+                else:
+                    length = 1
+                return data if length <= i else data[:-i]
+        return data
+
+    @staticmethod
+    def _segment_location(location, index):
+        """
+        Location of the index-th segment of a log. Logs appended to remote
+        storage are uploaded as numbered segments next to the first upload,
+        so that appending never rewrites what was uploaded before.
+        """
+        return location if index == 0 else '{}.{}'.format(location, index)
+
+    @staticmethod
+    def _segment_index(location, segment_location):
+        """
+        Index of segment_location among the segments of the log at location,
+        or None if it is not one of them.
+        """
+        if segment_location == location:
+            return 0
+        prefix = location + '.'
+        suffix = segment_location[len(prefix):]
+        if segment_location.startswith(prefix) and suffix.isdigit():
+            return int(suffix)
+        return None
+
+    @staticmethod
+    def _read_segments_range(segments, read_segment, offset, length):
+        """
+        Read a byte range of a log stored as consecutive segments.
+        :param segments: list of (location, size) of the segments in log order.
+        :param read_segment: callable taking a segment location, a byte offset
+                             and a length and returning the raw bytes read.
+        :param offset: byte offset in the whole log to start reading from.
+        :param length: maximum number of bytes to read.
+        :return: the raw bytes read and the total size of the log.
+        """
+        data = []
+        start = 0
+        for location, size in segments:
+            end = start + size
+            if length > 0 and start <= offset < end:
+                read = read_segment(location, offset - start,
+                                    min(end - offset, length))
+                data.append(read)
+                offset += len(read)
+                length -= len(read)
+            start = end
+        return b''.join(data), start
+
+    @staticmethod
+    def _read_local_range(location, offset, length):
+        with open(location, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(offset)
+            return f.read(length), size
+
+    @staticmethod
+    def _fetch_worker_range(url, offset, length, timeout=None):
+        response = requests.get(url, timeout=timeout, headers={
+            'Range': 'bytes={}-{}'.format(offset, offset + length - 1)
+        })
+        if response.status_code == 416:
+            # Nothing was written past offset yet.
+            content_range = response.headers.get('Content-Range', '')
+            size = content_range.rsplit('/', 1)[-1]
+            return b'', int(size) if size.isdigit() else offset
+
+        # Check if the resource was properly fetched
+        response.raise_for_status()
 
-        return log, {'end_of_log': True}
+        if response.status_code == 206:
+            size = int(response.headers['Content-Range'].rsplit('/', 1)[-1])
+            return response.content, size
+        # The log server ignored the range and sent the whole file. Hand out
+        # all of it at once rather than downloading it again for each chunk.
+        return response.content[offset:], len(response.content)
 
     def read(self, task_instance, try_number=None, metadata=None):
         """
@@ -161,9 +315,10 @@ class FileTaskHandler(logging.Handler):
         logs = [''] * len(try_numbers)
         metadatas = [{}] * len(try_numbers)
         for i, try_number in enumerate(try_numbers):
-            log, metadata = self._read(task_instance, try_number, metadata)
+            # Offsets are per try, every try starts from the given metadata.
+            log, metadatas[i] = self._read(task_instance, try_number,
+                                           dict(metadata) if metadata else {})
             logs[i] += log
-            metadatas[i] = metadata
 
         return logs, metadatas
 
@@ -109,16 +109,21 @@ class GCSTaskHandler(FileTaskHandler, LoggingMixin):
         log_relative_path = self._render_filename(ti, try_number)
         remote_loc = os.path.join(self.remote_base, log_relative_path)
 
+        offset = (metadata or {}).get('offset', 0)
         try:
-            remote_log = self.gcs_read(remote_loc)
-            log = '*** Reading remote log from {}.\n{}\n'.format(
-                remote_loc, remote_log)
-            return log, {'end_of_log': True}
+            remote_log, metadata = self._read_chunk(
+                lambda start, length: self.gcs_read_range(remote_loc, start, length),
+                offset)
+            if offset == 0:
+                remote_log = '*** Reading remote log from {}.\n{}'.format(
+                    remote_loc, remote_log)
+            return remote_log, metadata
         except Exception as e:
             log = '*** Unable to read remote log from {}\n*** {}\n\n'.format(
                 remote_loc, str(e))
             self.log.error(log)
-            local_log, metadata = super(GCSTaskHandler, self)._read(ti, try_number)
+            local_log, metadata = super(GCSTaskHandler, self)._read(
+                ti, try_number, metadata)
             log += local_log
             return log, metadata
 
@@ -131,6 +136,23 @@ class GCSTaskHandler(FileTaskHandler, LoggingMixin):
         bkt, blob = self.parse_gcs_url(remote_log_location)
         return self.hook.download(bkt, blob).decode('utf-8')
 
+    def gcs_read_range(self, remote_log_location, offset, length):
+        """
+        Returns at most length bytes of the log found at the
+        remote_log_location starting at offset, and the total size of the log.
+        :param remote_log_location: the log's location in remote storage
+        :type remote_log_location: str (path)
+        :param offset: byte offset to start reading from
+        :type offset: int
+        :param length: maximum number of bytes to read
+        :type length: int
+        """
+        bkt, blob = self.parse_gcs_url(remote_log_location)
+        size = int(self.hook.get_size(bkt, blob))
+        if offset >= size:
+            return b'', size
+        return self.hook.download(bkt, blob, offset=offset, length=length), size
+
     def gcs_write(self, log, remote_log_location, append=True):
         """
         Writes the log to the remote_log_location. Fails silently if no hook
@@ -143,27 +165,49 @@ class GCSTaskHandler(FileTaskHandler, LoggingMixin):
             the new log is appended to any existing logs.
         :type append: bool
         """
-        if append:
-            try:
-                old_log = self.gcs_read(remote_log_location)
-                log = '\n'.join([old_log, log]) if old_log else log
-            except Exception as e:
-                if not hasattr(e, 'resp') or e.resp.get('status') != '404':
-                    log = '*** Previous log discarded: {}\n\n'.format(str(e)) + log
-
         try:
             bkt, blob = self.parse_gcs_url(remote_log_location)
-            from tempfile import NamedTemporaryFile
-            with NamedTemporaryFile(mode='w+') as tmpfile:
-                tmpfile.write(log)
-                # Force the file to be flushed, since we're doing the
-                # upload from within the file context (it hasn't been
-                # closed).
-                tmpfile.flush()
-                self.hook.upload(bkt, blob, tmpfile.name)
+            if append and self.hook.exists(bkt, blob):
+                # Only upload the new bytes and let GCS concatenate them to
+                # the existing log, instead of downloading and re-uploading it.
+                try:
+                    self._gcs_append(bkt, blob, log)
+                    return
+                except Exception as e:
+                    self.log.warning('Could not append logs to %s, rewriting: %s',
+                                     remote_log_location, e)
+                    log = self._gcs_merge_previous_log(remote_log_location, log)
+            self._gcs_upload(bkt, blob, log)
         except Exception as e:
             self.log.error('Could not write logs to %s: %s', remote_log_location, e)
 
+    def _gcs_append(self, bkt, blob, log):
+        appended_blob = '{}.append'.format(blob)
+        self._gcs_upload(bkt, appended_blob, '\n' + log)
+        try:
+            self.hook.compose(bkt, [blob, appended_blob], blob)
+        finally:
+            self.hook.delete(bkt, appended_blob)
+
+    def _gcs_merge_previous_log(self, remote_log_location, log):
+        try:
+            old_log = self.gcs_read(remote_log_location)
+            return '\n'.join([old_log, log]) if old_log else log
+        except Exception as e:
+            if not hasattr(e, 'resp') or e.resp.get('status') != '404':
+                log = '*** Previous log discarded: {}\n\n'.format(str(e)) + log
+            return log
+
+    def _gcs_upload(self, bkt, blob, log):
+        from tempfile import NamedTemporaryFile
+        with NamedTemporaryFile(mode='w+') as tmpfile:
+            tmpfile.write(log)
+            # Force the file to be flushed, since we're doing the
+            # upload from within the file context (it hasn't been
+            # closed).
+            tmpfile.flush()
+            self.hook.upload(bkt, blob, tmpfile.name)
+
     @staticmethod
     def parse_gcs_url(gsurl):
         """
@@ -108,12 +108,21 @@ class S3TaskHandler(FileTaskHandler, LoggingMixin):
             # If S3 remote file exists, we do not fetch logs from task instance
             # local machine even if there are errors reading remote logs, as
             # returned remote_log will contain error messages.
-            remote_log = self.s3_read(remote_loc, return_error=True)
-            log = '*** Reading remote log from {}.\n{}\n'.format(
-                remote_loc, remote_log)
-            return log, {'end_of_log': True}
+            offset = (metadata or {}).get('offset', 0)
+            try:
+                remote_log, metadata = self._read_chunk(
+                    lambda start, length: self.s3_read_range(remote_loc, start, length),
+                    offset)
+            except Exception:
+                remote_log = 'Could not read logs from {}'.format(remote_loc)
+                self.log.exception(remote_log)
+                metadata = {'end_of_log': True}
+            if offset == 0:
+                remote_log = '*** Reading remote log from {}.\n{}'.format(
+                    remote_loc, remote_log)
+            return remote_log, metadata
         else:
-            return super(S3TaskHandler, self)._read(ti, try_number)
+            return super(S3TaskHandler, self)._read(ti, try_number, metadata)
 
     def s3_log_exists(self, remote_log_location):
         """
@@ -138,7 +147,9 @@ class S3TaskHandler(FileTaskHandler, LoggingMixin):
         :type return_error: bool
         """
         try:
-            return self.hook.read_key(remote_log_location)
+            segments = self._s3_log_segments(remote_log_location) or \
+                [(0, remote_log_location, None)]
+            return ''.join(self.hook.read_key(location) for _, location, _ in segments)
         except Exception:
             msg = 'Could not read logs from {}'.format(remote_log_location)
             self.log.exception(msg)
@@ -146,6 +157,41 @@ class S3TaskHandler(FileTaskHandler, LoggingMixin):
             if return_error:
                 return msg
 
+    def s3_read_range(self, remote_log_location, offset, length):
+        """
+        Returns at most length bytes of the log found at the
+        remote_log_location starting at offset, and the total size of the log.
+        :param remote_log_location: the log's location in remote storage
+        :type remote_log_location: str (path)
+        :param offset: byte offset to start reading from
+        :type offset: int
+        :param length: maximum number of bytes to read
+        :type length: int
+        """
+        def read_segment(location, start, size):
+            bucket, key = self.hook.parse_s3_url(location)
+            byte_range = 'bytes={}-{}'.format(start, start + size - 1)
+            return self.hook.get_conn().get_object(
+                Bucket=bucket, Key=key, Range=byte_range)['Body'].read()
+
+        segments = [(location, size) for _, location, size
+                    in self._s3_log_segments(remote_log_location)]
+        return self._read_segments_range(segments, read_segment, offset, length)
+
+    def _s3_log_segments(self, remote_log_location):
+        """
+        Returns the index, location and size of the objects the log at
+        remote_log_location is stored in, in log order.
+        """
+        bucket, key = self.hook.parse_s3_url(remote_log_location)
+        segments = []
+        for obj in self.hook.get_bucket(bucket).objects.filter(Prefix=key):
+            index = self._segment_index(key, obj.key)
+            if index is not None:
+                location = 's3://{}/{}'.format(bucket, obj.key)
+                segments.append((index, location, obj.size))
+        return sorted(segments)
+
     def s3_write(self, log, remote_log_location, append=True):
         """
         Writes the log to the remote_log_location. Fails silently if no hook
@@ -158,11 +204,25 @@ class S3TaskHandler(FileTaskHandler, LoggingMixin):
             the new log is appended to any existing logs.
         :type append: bool
         """
-        if append and self.s3_log_exists(remote_log_location):
-            old_log = self.s3_read(remote_log_location)
-            log = '\n'.join([old_log, log]) if old_log else log
-
         try:
+            segments = self._s3_log_segments(remote_log_location)
+            if append:
+                # Upload the new log as the next segment rather than
+                # downloading and re-uploading the existing log.
+                if segments:
+                    remote_log_location = self._segment_location(
+                        remote_log_location, segments[-1][0] + 1)
+                    log = '\n' + log
+            else:
+                # Segments appended to the log being overwritten would be
+                # read back after the new log.
+                appended = [location for index, location, _ in segments if index]
+                if appended:
+                    bucket, _ = self.hook.parse_s3_url(remote_log_location)
+                    self.hook.delete_objects(
+                        bucket, [self.hook.parse_s3_url(location)[1]
+                                 for location in appended])
+
             self.hook.load_string(
                 log,
                 key=remote_log_location,
@@ -116,12 +116,21 @@ class WasbTaskHandler(FileTaskHandler, LoggingMixin):
             # If Wasb remote file exists, we do not fetch logs from task instance
             # local machine even if there are errors reading remote logs, as
             # returned remote_log will contain error messages.
-            remote_log = self.wasb_read(remote_loc, return_error=True)
-            log = '*** Reading remote log from {}.\n{}\n'.format(
-                remote_loc, remote_log)
-            return log, {'end_of_log': True}
+            offset = (metadata or {}).get('offset', 0)
+            try:
+                remote_log, metadata = self._read_chunk(
+                    lambda start, length: self.wasb_read_range(remote_loc, start, length),
+                    offset)
+            except AzureHttpError:
+                remote_log = 'Could not read logs from {}'.format(remote_loc)
+                self.log.exception(remote_log)
+                metadata = {'end_of_log': True}
+            if offset == 0:
+                remote_log = '*** Reading remote log from {}.\n{}'.format(
+                    remote_loc, remote_log)
+            return remote_log, metadata
         else:
-            return super(WasbTaskHandler, self)._read(ti, try_number)
+            return super(WasbTaskHandler, self)._read(ti, try_number, metadata)
 
     def wasb_log_exists(self, remote_log_location):
         """
@@ -146,7 +155,10 @@ class WasbTaskHandler(FileTaskHandler, LoggingMixin):
         :type return_error: bool
         """
         try:
-            return self.hook.read_file(self.wasb_container, remote_log_location)
+            segments = self._wasb_log_segments(remote_log_location) or \
+                [(0, remote_log_location, None)]
+            return ''.join(self.hook.read_file(self.wasb_container, location)
+                           for _, location, _ in segments)
         except AzureHttpError:
             msg = 'Could not read logs from {}'.format(remote_log_location)
             self.log.exception(msg)
@@ -154,6 +166,39 @@ class WasbTaskHandler(FileTaskHandler, LoggingMixin):
             if return_error:
                 return msg
 
+    def wasb_read_range(self, remote_log_location, offset, length):
+        """
+        Returns at most length bytes of the log found at the
+        remote_log_location starting at offset, and the total size of the log.
+        :param remote_log_location: the log's location in remote storage
+        :type remote_log_location: str (path)
+        :param offset: byte offset to start reading from
+        :type offset: int
+        :param length: maximum number of bytes to read
+        :type length: int
+        """
+        def read_segment(location, start, size):
+            return self.hook.connection.get_blob_to_bytes(
+                self.wasb_container, location,
+                start_range=start, end_range=start + size - 1).content
+
+        segments = [(location, size) for _, location, size
+                    in self._wasb_log_segments(remote_log_location)]
+        return self._read_segments_range(segments, read_segment, offset, length)
+
+    def _wasb_log_segments(self, remote_log_location):
+        """
+        Returns the index, location and size of the blobs the log at
+        remote_log_location is stored in, in log order.
+        """
+        segments = []
+        for blob in self.hook.connection.list_blobs(self.wasb_container,
+                                                    prefix=remote_log_location):
+            index = self._segment_index(remote_log_location, blob.name)
+            if index is not None:
+                segments.append((index, blob.name, blob.properties.content_length))
+        return sorted(segments)
+
     def wasb_write(self, log, remote_log_location, append=True):
         """
         Writes the log to the remote_log_location. Fails silently if no hook
@@ -166,11 +211,23 @@ class WasbTaskHandler(FileTaskHandler, LoggingMixin):
             the new log is appended to any existing logs.
         :type append: bool
         """
-        if append and self.wasb_log_exists(remote_log_location):
-            old_log = self.wasb_read(remote_log_location)
-            log = '\n'.join([old_log, log]) if old_log else log
-
         try:
+            segments = self._wasb_log_segments(remote_log_location)
+            if append:
+                # Upload the new log as the next segment rather than
+                # downloading and re-uploading the existing log.
+                if segments:
+                    remote_log_location = self._segment_location(
+                        remote_log_location, segments[-1][0] + 1)
+                    log = '\n' + log
+            else:
+                # Segments appended to the log being overwritten would be
+                # read back after the new log.
+                for index, location, _ in segments:
+                    if index:
+                        self.hook.delete_file(self.wasb_container, location,
+                                              ignore_if_missing=True)
+
             self.hook.load_string(
                 log,
                 self.wasb_container,
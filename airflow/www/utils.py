@@ -234,6 +234,26 @@ def make_cache_key(*args, **kwargs):
     return (path + args).encode('ascii', 'ignore')
 
 
+_ttl_cache = {}
+
+
+def ttl_cached(key, ttl, compute):
+    """
+    Returns the result of ``compute()``, reusing it for ``ttl`` seconds for
+    the same key. The cache is local to the webserver process.
+    """
+    now = time.time()
+    cached = _ttl_cache.get(key)
+    if ttl > 0 and cached is not None and now < cached[0]:
+        return cached[1]
+    result = compute()
+    if ttl > 0:
+        for expired_key in [k for k, (expiry, _) in _ttl_cache.items() if expiry <= now]:
+            _ttl_cache.pop(expired_key, None)
+        _ttl_cache[key] = (now + ttl, result)
+    return result
+
+
 def task_instance_link(attr):
     dag_id = bleach.clean(attr.get('dag_id')) if attr.get('dag_id') else None
     task_id = bleach.clean(attr.get('task_id')) if attr.get('task_id') else None
@@ -350,8 +370,10 @@ def get_attr_renderer():
         'doc_rst': lambda x: render(x, lexers.RstLexer),
         'doc_yaml': lambda x: render(x, lexers.YamlLexer),
         'doc_md': wrapped_markdown,
+        # Serialized DAGs already hold the source of their callables
         'python_callable': lambda x: render(
-            inspect.getsource(x), lexers.PythonLexer),
+            x if isinstance(x, basestring) else inspect.getsource(x),
+            lexers.PythonLexer),
     }
     return attr_renderer
 
@@ -361,7 +383,7 @@ def recurse_tasks(tasks, task_ids, dag_ids, task_id_to_dag):
         for task in tasks:
             recurse_tasks(task, task_ids, dag_ids, task_id_to_dag)
         return
-    if isinstance(tasks, SubDagOperator):
+    if isinstance(tasks, SubDagOperator) or getattr(tasks, 'subdag', None) is not None:
         subtasks = tasks.subdag.tasks
         dag_ids.append(tasks.subdag.dag_id)
         for subtask in subtasks:
@@ -19,7 +19,6 @@
 #
 
 import copy
-import itertools
 import json
 import logging
 import math
@@ -36,7 +35,7 @@ import pendulum
 import sqlalchemy as sqla
 from flask import (
     redirect, request, Markup, Response, render_template,
-    make_response, flash, jsonify, send_file, escape, url_for)
+    make_response, flash, jsonify, escape, url_for, stream_with_context)
 from flask._compat import PY2
 from flask_appbuilder import BaseView, ModelView, expose, has_access
 from flask_appbuilder.actions import action
@@ -54,6 +53,7 @@ from airflow import models, jobs
 from airflow import settings
 from airflow.api.common.experimental.mark_tasks import (set_dag_run_state_to_success,
                                                         set_dag_run_state_to_failed)
+from airflow.exceptions import AirflowConfigException
 from airflow.models import XCom, DagRun, errors
 from airflow.models.connection import Connection
 from airflow.ti_deps.dep_context import DepContext, QUEUE_DEPS, SCHEDULER_DEPS
@@ -70,18 +70,325 @@ from airflow.www.forms import (DateTimeForm, DateTimeWithNumRunsForm,
                                DateTimeWithNumRunsWithDagRunsForm,
                                DagRunForm, ConnectionForm)
 from airflow.www.widgets import AirflowModelListWidget
-if PY2:
-    from cStringIO import StringIO
-else:
-    from io import StringIO
 
 
 PAGE_SIZE = conf.getint('webserver', 'page_size')
 if os.environ.get('SKIP_DAGS_PARSING') != 'True':
-    dagbag = models.DagBag(settings.DAGS_FOLDER)
+    dagbag = models.DagBag(settings.DAGS_FOLDER,
+                           store_serialized_dags=settings.STORE_SERIALIZED_DAGS)
 else:
     dagbag = models.DagBag
 
+# Seconds the DAG and task state counts of the home page are cached for.
+try:
+    STATS_CACHE_TTL = conf.getint('webserver', 'stats_cache_ttl')
+except (AirflowConfigException, ValueError):
+    STATS_CACHE_TTL = 5
+
+# Seconds a chart of task instance history is cached for. Charts are also
+# recomputed as soon as the task instances they plot change.
+try:
+    CHART_CACHE_TTL = conf.getint('webserver', 'chart_cache_ttl')
+except (AirflowConfigException, ValueError):
+    CHART_CACHE_TTL = 60
+
+
+@provide_session
+def get_dag_ids(session=None):
+    return [dag_id for dag_id, in session.query(models.DagModel.dag_id)]
+
+
+@provide_session
+def get_dag_state_counts(session=None):
+    """
+    Counts the DagRuns of every DAG by state.
+
+    :return: the counts keyed by dag_id, then by state
+    :rtype: dict
+    """
+    dr = models.DagRun
+    dag_state_stats = session.query(dr.dag_id, dr.state, sqla.func.count(dr.state))\
+        .group_by(dr.dag_id, dr.state)
+
+    data = {}
+    for dag_id, state, count in dag_state_stats:
+        data.setdefault(dag_id, {})[state] = count
+    return data
+
+
+@provide_session
+def get_task_state_counts(session=None):
+    """
+    Counts by state the task instances of the running DagRuns of every active
+    DAG, or of its most recent DagRun if none is running.
+
+    :return: the counts keyed by dag_id, then by state
+    :rtype: dict
+    """
+    TI = models.TaskInstance
+    DagRun = models.DagRun
+    Dag = models.DagModel
+
+    LastDagRun = (
+        session.query(
+            DagRun.dag_id,
+            sqla.func.max(DagRun.execution_date).label('execution_date')
+        )
+        .join(Dag, Dag.dag_id == DagRun.dag_id)
+        .filter(DagRun.state != State.RUNNING, Dag.is_active)
+        .group_by(DagRun.dag_id)
+        .subquery('last_dag_run')
+    )
+    RunningDagRun = (
+        session.query(DagRun.dag_id, DagRun.execution_date)
+               .join(Dag, Dag.dag_id == DagRun.dag_id)
+               .filter(DagRun.state == State.RUNNING, Dag.is_active)
+               .subquery('running_dag_run')
+    )
+
+    # Select all task_instances from active dag_runs.
+    # If no dag_run is active, return task instances from most recent dag_run.
+    LastTI = (
+        session.query(TI.dag_id.label('dag_id'), TI.state.label('state'))
+               .join(LastDagRun,
+                     and_(LastDagRun.c.dag_id == TI.dag_id,
+                          LastDagRun.c.execution_date == TI.execution_date))
+    )
+    RunningTI = (
+        session.query(TI.dag_id.label('dag_id'), TI.state.label('state'))
+               .join(RunningDagRun,
+                     and_(RunningDagRun.c.dag_id == TI.dag_id,
+                          RunningDagRun.c.execution_date == TI.execution_date))
+    )
+
+    UnionTI = union_all(LastTI, RunningTI).alias('union_ti')
+    qry = (
+        session.query(UnionTI.c.dag_id, UnionTI.c.state, sqla.func.count())
+               .group_by(UnionTI.c.dag_id, UnionTI.c.state)
+    )
+
+    data = {}
+    for dag_id, state, count in qry:
+        data.setdefault(dag_id, {})[state] = count
+    return data
+
+
+def _ti_window_filters(dag, start_date, end_date):
+    TI = models.TaskInstance
+    return (
+        TI.dag_id == dag.dag_id,
+        TI.execution_date >= start_date,
+        TI.execution_date <= end_date,
+        TI.task_id.in_(dag.task_ids),
+    )
+
+
+@provide_session
+def get_chart_version(dag, start_date, end_date, session=None):
+    """
+    Summarizes the task instances and task failures of a DAG in a date
+    window. The summary changes whenever a task instance of the window
+    changes state, starts or ends, so it is used to invalidate the cached
+    charts.
+    """
+    TI = models.TaskInstance
+    TF = models.TaskFail
+    ti_version = (
+        session.query(TI.state, func.count(), func.max(TI.start_date),
+                      func.max(TI.end_date), func.sum(TI._try_number))
+        .filter(*_ti_window_filters(dag, start_date, end_date))
+        .group_by(TI.state)
+        .order_by(TI.state)
+        .all()
+    )
+    tf_version = (
+        session.query(func.count(), func.max(TF.id))
+        .filter(TF.dag_id == dag.dag_id,
+                TF.execution_date >= start_date,
+                TF.execution_date <= end_date)
+        .one()
+    )
+    return tuple(tuple(row) for row in ti_version), tuple(tf_version)
+
+
+@provide_session
+def get_cached_chart(name, dag, start_date, end_date, compute, session=None):
+    """
+    Returns ``compute()``, cached for the DAG, date window and current
+    version of its task instances.
+    """
+    key = (name, dag.dag_id, tuple(dag.task_ids), start_date, end_date,
+           get_chart_version(dag, start_date, end_date, session=session))
+    return wwwutils.ttl_cached(key, CHART_CACHE_TTL, compute)
+
+
+@provide_session
+def get_max_execution_date(dag, start_date, end_date, session=None):
+    TI = models.TaskInstance
+    return (
+        session.query(func.max(TI.execution_date))
+        .filter(*_ti_window_filters(dag, start_date, end_date))
+        .scalar()
+    )
+
+
+@provide_session
+def get_duration_charts(dag, start_date, end_date, chart_height, session=None):
+    """
+    Builds the task duration charts, with and without the time spent in
+    failed tries.
+    """
+    TI = models.TaskInstance
+    TF = models.TaskFail
+
+    chart = nvd3.lineChart(
+        name="lineChart", x_is_date=True, height=chart_height, width="1200")
+    cum_chart = nvd3.lineChart(
+        name="cumLineChart", x_is_date=True, height=chart_height, width="1200")
+
+    y = defaultdict(list)
+    x = defaultdict(list)
+    cum_y = defaultdict(list)
+
+    tis = (
+        session.query(TI.task_id, TI.execution_date, TI.duration)
+        .filter(TI.duration.isnot(None), *_ti_window_filters(dag, start_date, end_date))
+        .order_by(TI.execution_date)
+    )
+    fails_totals = dict(
+        ((task_id, execution_date), total) for task_id, execution_date, total in (
+            session.query(TF.task_id, TF.execution_date, func.sum(TF.duration))
+            .filter(TF.dag_id == dag.dag_id,
+                    TF.execution_date >= start_date,
+                    TF.execution_date <= end_date,
+                    TF.task_id.in_(dag.task_ids))
+            .group_by(TF.task_id, TF.execution_date)
+        )
+    )
+
+    for task_id, execution_date, duration in tis:
+        if duration:
+            dttm = wwwutils.epoch(execution_date)
+            x[task_id].append(dttm)
+            y[task_id].append(float(duration))
+            fails_total = fails_totals.get((task_id, execution_date)) or 0
+            cum_y[task_id].append(float(duration + fails_total))
+
+    # determine the most relevant time unit for the set of task instance
+    # durations for the DAG
+    y_unit = infer_time_unit([d for t in y.values() for d in t])
+    cum_y_unit = infer_time_unit([d for t in cum_y.values() for d in t])
+    # update the y Axis on both charts to have the correct time units
+    chart.create_y_axis('yAxis', format='.02f', custom_format=False,
+                        label='Duration ({})'.format(y_unit))
+    chart.axislist['yAxis']['axisLabelDistance'] = '40'
+    cum_chart.create_y_axis('yAxis', format='.02f', custom_format=False,
+                            label='Duration ({})'.format(cum_y_unit))
+    cum_chart.axislist['yAxis']['axisLabelDistance'] = '40'
+
+    for task in dag.tasks:
+        if x[task.task_id]:
+            chart.add_serie(name=task.task_id, x=x[task.task_id],
+                            y=scale_time_units(y[task.task_id], y_unit))
+            cum_chart.add_serie(name=task.task_id, x=x[task.task_id],
+                                y=scale_time_units(cum_y[task.task_id],
+                                                   cum_y_unit))
+
+    chart.buildcontent()
+    cum_chart.buildcontent()
+    s_index = cum_chart.htmlcontent.rfind('});')
+    cum_chart.htmlcontent = (cum_chart.htmlcontent[:s_index] +
+                             "$( document ).trigger('chartload')" +
+                             cum_chart.htmlcontent[s_index:])
+
+    return {
+        'chart': chart.htmlcontent,
+        'cum_chart': cum_chart.htmlcontent,
+        'max_date': get_max_execution_date(dag, start_date, end_date, session=session),
+    }
+
+
+@provide_session
+def get_tries_chart(dag, start_date, end_date, chart_height, session=None):
+    """
+    Builds the chart of the number of tries of each task.
+    """
+    TI = models.TaskInstance
+
+    chart = nvd3.lineChart(
+        name="lineChart", x_is_date=True, y_axis_format='d', height=chart_height,
+        width="1200")
+
+    y = defaultdict(list)
+    x = defaultdict(list)
+    max_date = None
+    tis = (
+        session.query(TI.task_id, TI.execution_date, TI.state, TI._try_number)
+        .filter(*_ti_window_filters(dag, start_date, end_date))
+        .order_by(TI.execution_date)
+    )
+    for task_id, execution_date, state, try_number in tis:
+        x[task_id].append(wwwutils.epoch(execution_date))
+        # Same as TaskInstance.try_number
+        y[task_id].append(try_number if state == State.RUNNING else try_number + 1)
+        max_date = execution_date
+
+    for task in dag.tasks:
+        if x[task.task_id]:
+            chart.add_serie(name=task.task_id, x=x[task.task_id], y=y[task.task_id])
+
+    chart.buildcontent()
+
+    return {'chart': chart.htmlcontent, 'max_date': max_date}
+
+
+@provide_session
+def get_landing_times_chart(dag, start_date, end_date, chart_height, session=None):
+    """
+    Builds the chart of the time between the end of the schedule period of
+    each task instance and its completion.
+    """
+    TI = models.TaskInstance
+
+    chart = nvd3.lineChart(
+        name="lineChart", x_is_date=True, height=chart_height, width="1200")
+    y = defaultdict(list)
+    x = defaultdict(list)
+
+    period_ends = {}
+    tis = (
+        session.query(TI.task_id, TI.execution_date, TI.end_date)
+        .filter(TI.end_date.isnot(None), *_ti_window_filters(dag, start_date, end_date))
+        .order_by(TI.execution_date)
+    )
+    for task_id, execution_date, ti_end_date in tis:
+        if execution_date not in period_ends:
+            ts = execution_date
+            if dag.schedule_interval and dag.following_schedule(ts):
+                ts = dag.following_schedule(ts)
+            period_ends[execution_date] = ts
+        x[task_id].append(wwwutils.epoch(execution_date))
+        y[task_id].append((ti_end_date - period_ends[execution_date]).total_seconds())
+
+    # determine the most relevant time unit for the set of landing times
+    # for the DAG
+    y_unit = infer_time_unit([d for t in y.values() for d in t])
+    # update the y Axis to have the correct time units
+    chart.create_y_axis('yAxis', format='.02f', custom_format=False,
+                        label='Landing Time ({})'.format(y_unit))
+    chart.axislist['yAxis']['axisLabelDistance'] = '40'
+    for task in dag.tasks:
+        if x[task.task_id]:
+            chart.add_serie(name=task.task_id, x=x[task.task_id],
+                            y=scale_time_units(y[task.task_id], y_unit))
+
+    chart.buildcontent()
+
+    return {
+        'chart': chart.htmlcontent,
+        'max_date': get_max_execution_date(dag, start_date, end_date, session=session),
+    }
+
 
 def get_date_time_num_runs_dag_runs_form_data(request, session, dag):
     dttm = request.args.get('execution_date')
@@ -135,6 +442,44 @@ def get_date_time_num_runs_dag_runs_form_data(request, session, dag):
     }
 
 
+def _stream_logs(handler, ti, try_number):
+    """
+    Yield the logs of a task instance chunk by chunk, following the
+    metadata returned by the handler, so that the whole log is never
+    held in memory.
+    """
+    if ti is None:
+        yield "*** Task instance did not exist in the DB\n"
+        return
+
+    if try_number is None:
+        try_numbers = list(range(1, ti.next_try_number))
+    else:
+        try_numbers = [try_number]
+
+    # Chunks of raw logs are joined as they are, they may end mid-line
+    separator = '' if getattr(handler, 'raw_log_chunks', False) else '\n'
+    for i, try_number in enumerate(try_numbers):
+        if i:
+            yield '\n'
+        metadata = {}
+        first = True
+        while True:
+            logs, metadatas = handler.read(ti, try_number, metadata=metadata)
+            metadata = metadatas[0]
+            log = logs[0]
+            if PY2 and not isinstance(log, unicode):
+                log = log.decode('utf-8')
+            if not first and log:
+                yield separator
+            yield log
+            first = False
+            # Stop at the end of the log, or at the current end of a log
+            # that is still being written.
+            if metadata.get('end_of_log') or not log:
+                break
+
+
 ######################################################################################
 #                                    BaseViews
 ######################################################################################
@@ -286,27 +631,14 @@ class Airflow(AirflowBaseView):
 
     @expose('/dag_stats')
     @has_access
-    @provide_session
-    def dag_stats(self, session=None):
-        dr = models.DagRun
-
+    def dag_stats(self):
         filter_dag_ids = appbuilder.sm.get_accessible_dag_ids()
 
-        dag_state_stats = session.query(dr.dag_id, dr.state, sqla.func.count(dr.state))\
-            .group_by(dr.dag_id, dr.state)
-
         payload = {}
         if filter_dag_ids:
-            if 'all_dags' not in filter_dag_ids:
-                dag_state_stats = dag_state_stats.filter(dr.dag_id.in_(filter_dag_ids))
-            data = {}
-            for dag_id, state, count in dag_state_stats:
-                if dag_id not in data:
-                    data[dag_id] = {}
-                data[dag_id][state] = count
-
+            data = wwwutils.ttl_cached('dag_stats', STATS_CACHE_TTL, get_dag_state_counts)
             if 'all_dags' in filter_dag_ids:
-                filter_dag_ids = [dag_id for dag_id, in session.query(models.DagModel.dag_id)]
+                filter_dag_ids = wwwutils.ttl_cached('dag_ids', STATS_CACHE_TTL, get_dag_ids)
 
             for dag_id in filter_dag_ids:
                 payload[dag_id] = []
@@ -322,66 +654,16 @@ class Airflow(AirflowBaseView):
 
     @expose('/task_stats')
     @has_access
-    @provide_session
-    def task_stats(self, session=None):
-        TI = models.TaskInstance
-        DagRun = models.DagRun
-        Dag = models.DagModel
-
+    def task_stats(self):
         filter_dag_ids = appbuilder.sm.get_accessible_dag_ids()
 
         payload = {}
         if not filter_dag_ids:
             return
 
-        LastDagRun = (
-            session.query(
-                DagRun.dag_id,
-                sqla.func.max(DagRun.execution_date).label('execution_date')
-            )
-            .join(Dag, Dag.dag_id == DagRun.dag_id)
-            .filter(DagRun.state != State.RUNNING, Dag.is_active)
-            .group_by(DagRun.dag_id)
-            .subquery('last_dag_run')
-        )
-        RunningDagRun = (
-            session.query(DagRun.dag_id, DagRun.execution_date)
-                   .join(Dag, Dag.dag_id == DagRun.dag_id)
-                   .filter(DagRun.state == State.RUNNING, Dag.is_active)
-                   .subquery('running_dag_run')
-        )
-
-        # Select all task_instances from active dag_runs.
-        # If no dag_run is active, return task instances from most recent dag_run.
-        LastTI = (
-            session.query(TI.dag_id.label('dag_id'), TI.state.label('state'))
-                   .join(LastDagRun,
-                         and_(LastDagRun.c.dag_id == TI.dag_id,
-                              LastDagRun.c.execution_date == TI.execution_date))
-        )
-        RunningTI = (
-            session.query(TI.dag_id.label('dag_id'), TI.state.label('state'))
-                   .join(RunningDagRun,
-                         and_(RunningDagRun.c.dag_id == TI.dag_id,
-                              RunningDagRun.c.execution_date == TI.execution_date))
-        )
-
-        UnionTI = union_all(LastTI, RunningTI).alias('union_ti')
-        qry = (
-            session.query(UnionTI.c.dag_id, UnionTI.c.state, sqla.func.count())
-                   .group_by(UnionTI.c.dag_id, UnionTI.c.state)
-        )
-
-        data = {}
-        for dag_id, state, count in qry:
-            if 'all_dags' in filter_dag_ids or dag_id in filter_dag_ids:
-                if dag_id not in data:
-                    data[dag_id] = {}
-                data[dag_id][state] = count
-        session.commit()
-
+        data = wwwutils.ttl_cached('task_stats', STATS_CACHE_TTL, get_task_state_counts)
         if 'all_dags' in filter_dag_ids:
-            filter_dag_ids = [dag_id for dag_id, in session.query(models.DagModel.dag_id)]
+            filter_dag_ids = wwwutils.ttl_cached('dag_ids', STATS_CACHE_TTL, get_dag_ids)
         for dag_id in filter_dag_ids:
             payload[dag_id] = []
             for state in State.task_states:
@@ -557,27 +839,34 @@ class Airflow(AirflowBaseView):
             models.TaskInstance.task_id == task_id,
             models.TaskInstance.execution_date == dttm).first()
         try:
+            if ti is not None:
+                dag = dagbag.get_dag(dag_id)
+                ti.task = dag.get_task(ti.task_id)
+
+            if response_format != 'json':
+                filename_template = conf.get('core', 'LOG_FILENAME_TEMPLATE')
+                attachment_filename = render_log_filename(ti, try_number, filename_template)
+                return Response(
+                    stream_with_context(_stream_logs(handler, ti, try_number)),
+                    mimetype='text/plain',
+                    headers={'Content-Disposition':
+                             'attachment; filename={}'.format(attachment_filename)})
+
             if ti is None:
                 logs = ["*** Task instance did not exist in the DB\n"]
                 metadata['end_of_log'] = True
             else:
-                dag = dagbag.get_dag(dag_id)
-                ti.task = dag.get_task(ti.task_id)
                 logs, metadatas = handler.read(ti, try_number, metadata=metadata)
                 metadata = metadatas[0]
             for i, log in enumerate(logs):
                 if PY2 and not isinstance(log, unicode):
-                    logs[i] = log.decode('utf-8')
-
-            if response_format == 'json':
-                message = logs[0] if try_number is not None else logs
-                return jsonify(message=message, metadata=metadata)
+                    logs[i] = log = log.decode('utf-8')
+                # The log page ends each message with a newline
+                if getattr(handler, 'raw_log_chunks', False) and log.endswith('\n'):
+                    logs[i] = log[:-1]
 
-            file_obj = StringIO('\n'.join(logs))
-            filename_template = conf.get('core', 'LOG_FILENAME_TEMPLATE')
-            attachment_filename = render_log_filename(ti, try_number, filename_template)
-            return send_file(file_obj, as_attachment=True,
-                             attachment_filename=attachment_filename)
+            message = logs[0] if try_number is not None else logs
+            return jsonify(message=message, metadata=metadata)
         except AttributeError as e:
             error_message = ["Task log handler {} does not support read logs.\n{}\n"
                              .format(task_log_reader, str(e))]
@@ -1414,74 +1703,16 @@ class Airflow(AirflowBaseView):
                 include_downstream=False)
 
         chart_height = wwwutils.get_chart_height(dag)
-        chart = nvd3.lineChart(
-            name="lineChart", x_is_date=True, height=chart_height, width="1200")
-        cum_chart = nvd3.lineChart(
-            name="cumLineChart", x_is_date=True, height=chart_height, width="1200")
-
-        y = defaultdict(list)
-        x = defaultdict(list)
-        cum_y = defaultdict(list)
-
-        tis = dag.get_task_instances(
-            session, start_date=min_date, end_date=base_date)
-        TF = models.TaskFail
-        ti_fails = (
-            session.query(TF)
-                   .filter(TF.dag_id == dag.dag_id,
-                           TF.execution_date >= min_date,
-                           TF.execution_date <= base_date,
-                           TF.task_id.in_([t.task_id for t in dag.tasks]))
-                   .all()  # noqa
-        )
-
-        fails_totals = defaultdict(int)
-        for tf in ti_fails:
-            dict_key = (tf.dag_id, tf.task_id, tf.execution_date)
-            fails_totals[dict_key] += tf.duration
-
-        for ti in tis:
-            if ti.duration:
-                dttm = wwwutils.epoch(ti.execution_date)
-                x[ti.task_id].append(dttm)
-                y[ti.task_id].append(float(ti.duration))
-                fails_dict_key = (ti.dag_id, ti.task_id, ti.execution_date)
-                fails_total = fails_totals[fails_dict_key]
-                cum_y[ti.task_id].append(float(ti.duration + fails_total))
-
-        # determine the most relevant time unit for the set of task instance
-        # durations for the DAG
-        y_unit = infer_time_unit([d for t in y.values() for d in t])
-        cum_y_unit = infer_time_unit([d for t in cum_y.values() for d in t])
-        # update the y Axis on both charts to have the correct time units
-        chart.create_y_axis('yAxis', format='.02f', custom_format=False,
-                            label='Duration ({})'.format(y_unit))
-        chart.axislist['yAxis']['axisLabelDistance'] = '40'
-        cum_chart.create_y_axis('yAxis', format='.02f', custom_format=False,
-                                label='Duration ({})'.format(cum_y_unit))
-        cum_chart.axislist['yAxis']['axisLabelDistance'] = '40'
-
-        for task in dag.tasks:
-            if x[task.task_id]:
-                chart.add_serie(name=task.task_id, x=x[task.task_id],
-                                y=scale_time_units(y[task.task_id], y_unit))
-                cum_chart.add_serie(name=task.task_id, x=x[task.task_id],
-                                    y=scale_time_units(cum_y[task.task_id],
-                                                       cum_y_unit))
-
-        dates = sorted(list({ti.execution_date for ti in tis}))
-        max_date = max([ti.execution_date for ti in tis]) if dates else None
+        charts = get_cached_chart(
+            'duration', dag, min_date, base_date,
+            lambda: get_duration_charts(dag, min_date, base_date, chart_height,
+                                        session=session),
+            session=session)
 
         session.commit()
 
-        form = DateTimeWithNumRunsForm(data={'base_date': max_date,
+        form = DateTimeWithNumRunsForm(data={'base_date': charts['max_date'],
                                              'num_runs': num_runs})
-        chart.buildcontent()
-        cum_chart.buildcontent()
-        s_index = cum_chart.htmlcontent.rfind('});')
-        cum_chart.htmlcontent = (cum_chart.htmlcontent[:s_index] +
-                                 "$( document ).trigger('chartload')" +
-                                 cum_chart.htmlcontent[s_index:])
 
         return self.render(
             'airflow/duration_chart.html',
@@ -1489,8 +1720,8 @@ class Airflow(AirflowBaseView):
             demo_mode=conf.getboolean('webserver', 'demo_mode'),
             root=root,
             form=form,
-            chart=chart.htmlcontent,
-            cum_chart=cum_chart.htmlcontent
+            chart=charts['chart'],
+            cum_chart=charts['cum_chart']
         )
 
     @expose('/tries')
@@ -1522,40 +1753,24 @@ class Airflow(AirflowBaseView):
                 include_downstream=False)
 
         chart_height = wwwutils.get_chart_height(dag)
-        chart = nvd3.lineChart(
-            name="lineChart", x_is_date=True, y_axis_format='d', height=chart_height,
-            width="1200")
-
-        for task in dag.tasks:
-            y = []
-            x = []
-            for ti in task.get_task_instances(session, start_date=min_date,
-                                              end_date=base_date):
-                dttm = wwwutils.epoch(ti.execution_date)
-                x.append(dttm)
-                y.append(ti.try_number)
-            if x:
-                chart.add_serie(name=task.task_id, x=x, y=y)
-
-        tis = dag.get_task_instances(
-            session, start_date=min_date, end_date=base_date)
-        tries = sorted(list({ti.try_number for ti in tis}))
-        max_date = max([ti.execution_date for ti in tis]) if tries else None
+        charts = get_cached_chart(
+            'tries', dag, min_date, base_date,
+            lambda: get_tries_chart(dag, min_date, base_date, chart_height,
+                                    session=session),
+            session=session)
 
         session.commit()
 
-        form = DateTimeWithNumRunsForm(data={'base_date': max_date,
+        form = DateTimeWithNumRunsForm(data={'base_date': charts['max_date'],
                                              'num_runs': num_runs})
 
-        chart.buildcontent()
-
         return self.render(
             'airflow/chart.html',
             dag=dag,
             demo_mode=conf.getboolean('webserver', 'demo_mode'),
             root=root,
             form=form,
-            chart=chart.htmlcontent
+            chart=charts['chart']
         )
 
     @expose('/landing_times')
@@ -1587,50 +1802,20 @@ class Airflow(AirflowBaseView):
                 include_downstream=False)
 
         chart_height = wwwutils.get_chart_height(dag)
-        chart = nvd3.lineChart(
-            name="lineChart", x_is_date=True, height=chart_height, width="1200")
-        y = {}
-        x = {}
-        for task in dag.tasks:
-            y[task.task_id] = []
-            x[task.task_id] = []
-            for ti in task.get_task_instances(session, start_date=min_date,
-                                              end_date=base_date):
-                ts = ti.execution_date
-                if dag.schedule_interval and dag.following_schedule(ts):
-                    ts = dag.following_schedule(ts)
-                if ti.end_date:
-                    dttm = wwwutils.epoch(ti.execution_date)
-                    secs = (ti.end_date - ts).total_seconds()
-                    x[ti.task_id].append(dttm)
-                    y[ti.task_id].append(secs)
-
-        # determine the most relevant time unit for the set of landing times
-        # for the DAG
-        y_unit = infer_time_unit([d for t in y.values() for d in t])
-        # update the y Axis to have the correct time units
-        chart.create_y_axis('yAxis', format='.02f', custom_format=False,
-                            label='Landing Time ({})'.format(y_unit))
-        chart.axislist['yAxis']['axisLabelDistance'] = '40'
-        for task in dag.tasks:
-            if x[task.task_id]:
-                chart.add_serie(name=task.task_id, x=x[task.task_id],
-                                y=scale_time_units(y[task.task_id], y_unit))
-
-        tis = dag.get_task_instances(
-            session, start_date=min_date, end_date=base_date)
-        dates = sorted(list({ti.execution_date for ti in tis}))
-        max_date = max([ti.execution_date for ti in tis]) if dates else None
+        charts = get_cached_chart(
+            'landing_times', dag, min_date, base_date,
+            lambda: get_landing_times_chart(dag, min_date, base_date, chart_height,
+                                            session=session),
+            session=session)
 
         session.commit()
 
-        form = DateTimeWithNumRunsForm(data={'base_date': max_date,
+        form = DateTimeWithNumRunsForm(data={'base_date': charts['max_date'],
                                              'num_runs': num_runs})
-        chart.buildcontent()
         return self.render(
             'airflow/chart.html',
             dag=dag,
-            chart=chart.htmlcontent,
+            chart=charts['chart'],
             height=str(chart_height + 100) + "px",
             demo_mode=conf.getboolean('webserver', 'demo_mode'),
             root=root,
@@ -1686,9 +1871,13 @@ class Airflow(AirflowBaseView):
     @has_access
     @action_logging
     def refresh_all(self):
-        dagbag.collect_dags(only_if_updated=False)
+        if settings.STORE_SERIALIZED_DAGS:
+            dagbag.collect_dags_from_db()
+        else:
+            dagbag.collect_dags(only_if_updated=False)
         # sync permissions for all dags
-        appbuilder.sm.sync_perm_for_dag()
+        for dag_id in dagbag.dags:
+            appbuilder.sm.sync_perm_for_dag(dag_id)
         flash("All DAGs are now up to date")
         return redirect('/')
 
@@ -1715,19 +1904,24 @@ class Airflow(AirflowBaseView):
         form = DateTimeWithNumRunsWithDagRunsForm(data=dt_nr_dr_data)
         form.execution_date.choices = dt_nr_dr_data['dr_choices']
 
-        tis = [
-            ti for ti in dag.get_task_instances(session, dttm, dttm)
-            if ti.start_date]
-        tis = sorted(tis, key=lambda ti: ti.start_date)
-        TF = models.TaskFail
-        ti_fails = list(itertools.chain(*[(
-            session
-            .query(TF)
-            .filter(TF.dag_id == ti.dag_id,
-                    TF.task_id == ti.task_id,
-                    TF.execution_date == ti.execution_date)
+        TI = models.TaskInstance
+        tis = (
+            session.query(TI.task_id, TI.start_date, TI.end_date, TI.state)
+            .filter(TI.start_date.isnot(None), *_ti_window_filters(dag, dttm, dttm))
+            .order_by(TI.start_date)
             .all()
-        ) for ti in tis]))
+        )
+        TF = models.TaskFail
+        started_task_ids = {ti.task_id for ti in tis}
+        ti_fails = [
+            tf for tf in (
+                session.query(TF.task_id, TF.start_date, TF.end_date)
+                .filter(TF.dag_id == dag.dag_id,
+                        TF.execution_date == dttm,
+                        TF.task_id.in_(dag.task_ids))
+            )
+            if tf.task_id in started_task_ids
+        ]
 
         # determine bars to show in the gantt chart
         gantt_bar_items = []
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Reports the latency and the query plans of the queries the scheduler runs
+against the metadata database on every loop.
+
+The metadata database configured for Airflow (SQLite, MySQL or Postgres) is
+seeded with the DAG runs and task instances of generated DAGs, whose ids
+start with ``perf_query_dag_``. The scheduler methods are then called on
+these DAGs, the statements they run are captured and timed, and the plan of
+every statement is printed. Statements scanning the whole task_instance
+table are flagged, so that a change dropping an index or a query no longer
+matching one is noticed.
+
+To Run:
+    $ python scripts/perf/scheduler_query_plans.py [--dags 100] [--runs 50]
+        [--tasks 20] [--repeat 3] [--skip-seed] [--fail-on-scan]
+
+The seeded rows are replaced at each run, unless --skip-seed is given to
+reuse the rows of the previous run.
+"""
+
+import argparse
+import logging
+import re
+import sys
+import time
+from datetime import timedelta
+
+from sqlalchemy import event, func
+
+from airflow import settings
+from airflow.jobs import BaseJob, SchedulerJob
+from airflow.models import DAG, DagModel, DagRun, Pool, TaskInstance
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.utils import timezone
+from airflow.utils.dag_processing import (DagFileProcessorManager, SimpleDag,
+                                          SimpleDagBag)
+from airflow.utils.db import create_session
+from airflow.utils.state import State
+
+DAG_ID_PREFIX = 'perf_query_dag_'
+POOLS = ['perf_query_pool_1', 'perf_query_pool_2']
+START_DATE = timezone.datetime(2019, 1, 1)
+# Number of most recent runs of each DAG that are still running
+RUNNING_RUNS = 3
+# States of the task instances of running DAG runs, assigned in turn
+RUNNING_RUN_TI_STATES = [State.SCHEDULED, State.QUEUED, State.RUNNING, State.NONE,
+                         State.SUCCESS, State.UP_FOR_RETRY]
+INSERT_CHUNK_SIZE = 10000
+
+FULL_SCAN_PATTERNS = [
+    # SQLite, lookups are reported as SEARCH and full scans as SCAN, even
+    # when they read an index
+    re.compile(r'\bSCAN (TABLE )?task_instance\b'),
+    # Postgres
+    re.compile(r'Seq Scan on task_instance'),
+]
+
+
+def make_dags(num_dags, num_tasks):
+    dags = []
+    for i in range(num_dags):
+        dag = DAG(DAG_ID_PREFIX + str(i), start_date=START_DATE,
+                  schedule_interval=timedelta(days=1))
+        for j in range(num_tasks):
+            DummyOperator(task_id='task_{}'.format(j), pool=POOLS[j % len(POOLS)],
+                          dag=dag)
+        dags.append(dag)
+    return dags
+
+
+def _insert(table, rows):
+    for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+        settings.engine.execute(table.insert(), rows[i:i + INSERT_CHUNK_SIZE])
+
+
+def clear_perf_data():
+    """
+    Remove the rows seeded by a previous run.
+    """
+    with create_session() as session:
+        for model in (TaskInstance, DagRun, DagModel, BaseJob):
+            session.query(model).filter(
+                model.dag_id.like(DAG_ID_PREFIX + '%')
+            ).delete(synchronize_session=False)
+        session.query(Pool).filter(Pool.pool.in_(POOLS)).delete(
+            synchronize_session=False)
+
+
+def seed(dags, num_runs):
+    """
+    Insert the DAG runs of the DAGs, the first ones finished and the last
+    RUNNING_RUNS ones running, with their task instances. Running task
+    instances get a job, one out of ten of them without a recent heartbeat.
+    """
+    clear_perf_data()
+    now = timezone.utcnow()
+    with create_session() as session:
+        for pool in POOLS:
+            session.add(Pool(pool=pool, slots=128))
+        next_job_id = (session.query(func.max(BaseJob.id)).scalar() or 0) + 1
+
+    dag_models, dag_runs, task_instances, jobs = [], [], [], []
+    for dag in dags:
+        dag_models.append({'dag_id': dag.dag_id, 'is_paused': False,
+                           'is_active': True, 'is_subdag': False})
+        for run in range(num_runs):
+            execution_date = START_DATE + timedelta(days=run)
+            running = run >= num_runs - RUNNING_RUNS
+            dag_runs.append({
+                'dag_id': dag.dag_id,
+                'execution_date': execution_date,
+                'run_id': DagRun.ID_PREFIX + execution_date.isoformat(),
+                'state': State.RUNNING if running else State.SUCCESS,
+                'external_trigger': False,
+                'start_date': now,
+            })
+            for i, task in enumerate(dag.tasks):
+                state = (RUNNING_RUN_TI_STATES[i % len(RUNNING_RUN_TI_STATES)]
+                         if running else State.SUCCESS)
+                job_id = None
+                if state == State.RUNNING:
+                    job_id = next_job_id
+                    next_job_id += 1
+                    jobs.append({
+                        'id': job_id,
+                        'dag_id': dag.dag_id,
+                        'state': State.RUNNING,
+                        'job_type': 'LocalTaskJob',
+                        'start_date': now,
+                        'latest_heartbeat': (now - timedelta(hours=1)
+                                             if job_id % 10 == 0 else now),
+                    })
+                task_instances.append({
+                    'dag_id': dag.dag_id,
+                    'task_id': task.task_id,
+                    'execution_date': execution_date,
+                    'state': state,
+                    'try_number': 1,
+                    'max_tries': 0,
+                    'pool': task.pool,
+                    'queue': task.queue,
+                    'priority_weight': task.priority_weight_total,
+                    'job_id': job_id,
+                    'hostname': '',
+                    'unixname': '',
+                })
+
+    _insert(DagModel.__table__, dag_models)
+    _insert(DagRun.__table__, dag_runs)
+    _insert(BaseJob.__table__, jobs)
+    _insert(TaskInstance.__table__, task_instances)
+    print('Seeded {} DAG runs and {} task instances\n'.format(
+        len(dag_runs), len(task_instances)))
+
+
+class StatementRecorder(object):
+    """
+    Records the statements run by the engine, with their parameters and
+    duration.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.recording = False
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters,
+                              context, executemany):
+        conn.info['query_start_time'] = time.time()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters,
+                             context, executemany):
+        # Leave out the pings checking the pooled connections
+        if self.recording and statement != 'SELECT 1':
+            duration = time.time() - conn.info.pop('query_start_time')
+            self.statements.append((statement, parameters, duration))
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(self.engine, 'after_cursor_execute', self.after_cursor_execute)
+        self.recording = True
+        return self
+
+    def __exit__(self, *args):
+        self.recording = False
+        event.remove(self.engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.remove(self.engine, 'after_cursor_execute', self.after_cursor_execute)
+
+
+def explain(statement, parameters):
+    """
+    :return: the lines of the plan the database picks for the statement
+    :rtype: list[str]
+    """
+    sqlite = settings.engine.dialect.name == 'sqlite'
+    prefix = 'EXPLAIN QUERY PLAN ' if sqlite else 'EXPLAIN '
+    conn = settings.engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(prefix + statement, parameters)
+        columns = [column[0] for column in cursor.description]
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    lines = []
+    for row in rows:
+        if sqlite:
+            # The last column holds the description of the step
+            lines.append(row[-1])
+        elif len(row) == 1:
+            lines.append(row[0])
+        else:
+            lines.append(', '.join('{}={}'.format(column, value)
+                                   for column, value in zip(columns, row)))
+    return lines
+
+
+def is_full_scan(plan_line):
+    if any(pattern.search(plan_line) for pattern in FULL_SCAN_PATTERNS):
+        return True
+    # MySQL reports the access type of each table
+    return 'table=task_instance' in plan_line and 'type=ALL' in plan_line
+
+
+def scheduler_queries(dags):
+    """
+    :return: the scheduler operations to profile, as pairs of a name and a
+        function taking a session
+    """
+    scheduler = SchedulerJob(dag_ids=[dag.dag_id for dag in dags])
+    simple_dag_bag = SimpleDagBag([SimpleDag(dag) for dag in dags])
+    processor_manager = DagFileProcessorManager(
+        dag_directory='', file_paths=[], max_runs=1, processor_factory=None,
+        signal_conn=None, stat_queue=None, result_queue=None, async_mode=False)
+
+    def find_zombies(session):
+        # Run the query regardless of when it last ran
+        processor_manager._last_zombie_query_time = START_DATE
+        return processor_manager._find_zombies(session=session)
+
+    def pool_open_slots(session):
+        return [pool.open_slots(session=session)
+                for pool in session.query(Pool).filter(Pool.pool.in_(POOLS))]
+
+    return [
+        ('_find_executable_task_instances',
+         lambda session: scheduler._find_executable_task_instances(
+             simple_dag_bag, (State.SCHEDULED,), session=session)),
+        ('__get_task_concurrency_map',
+         lambda session: scheduler._SchedulerJob__get_task_concurrency_map(
+             states=[State.RUNNING, State.QUEUED], session=session)),
+        ('_change_state_for_tis_without_dagrun',
+         lambda session: scheduler._change_state_for_tis_without_dagrun(
+             simple_dag_bag, [State.UP_FOR_RETRY], State.NONE, session=session)),
+        ('Pool.open_slots', pool_open_slots),
+        ('_find_zombies', find_zombies),
+    ]
+
+
+def profile(queries, repeat):
+    """
+    Runs each operation `repeat` times and prints the statements of the
+    fastest run with their plans.
+
+    :return: the number of statements scanning the task_instance table
+    :rtype: int
+    """
+    full_scans = 0
+    for name, query in queries:
+        best = None
+        for _ in range(repeat):
+            with create_session() as session, \
+                    StatementRecorder(settings.engine) as recorder:
+                start = time.time()
+                query(session)
+                elapsed = time.time() - start
+            if best is None or elapsed < best[0]:
+                best = (elapsed, recorder.statements)
+
+        elapsed, statements = best
+        print('{}: {:.1f} ms, {} statements'.format(
+            name, elapsed * 1000, len(statements)))
+        for statement, parameters, duration in statements:
+            print('  {:.1f} ms  {}'.format(duration * 1000, ' '.join(statement.split())))
+            if not statement.lstrip().upper().startswith('SELECT'):
+                continue
+            for line in explain(statement, parameters):
+                if is_full_scan(line):
+                    full_scans += 1
+                    line = 'FULL SCAN  ' + line
+                print('      ' + line)
+        print('')
+    return full_scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--dags', type=int, default=100, help='number of DAGs')
+    parser.add_argument('--runs', type=int, default=50,
+                        help='number of DAG runs per DAG')
+    parser.add_argument('--tasks', type=int, default=20, help='number of tasks per DAG')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of times each query is run')
+    parser.add_argument('--skip-seed', action='store_true',
+                        help='reuse the rows seeded by a previous run')
+    parser.add_argument('--fail-on-scan', action='store_true',
+                        help='exit with an error if the task_instance table is scanned')
+    args = parser.parse_args()
+    # The scheduler methods log every task instance they look at
+    logging.getLogger('airflow').setLevel(logging.WARNING)
+
+    dags = make_dags(args.dags, args.tasks)
+    if not args.skip_seed:
+        seed(dags, args.runs)
+
+    full_scans = profile(scheduler_queries(dags), args.repeat)
+    if full_scans:
+        print('{} statements scan the task_instance table'.format(full_scans))
+        if args.fail_on_scan:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
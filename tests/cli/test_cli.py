@@ -19,7 +19,9 @@
 #
 
 from six import StringIO
+import shutil
 import sys
+import tempfile
 import unittest
 
 from datetime import datetime, timedelta, time
@@ -173,6 +175,92 @@ class TestCLI(unittest.TestCase):
             state = ti.current_state()
             self.assertEqual(state, State.SUCCESS)
 
+    def test_get_dag_from_fileloc(self):
+        dagbag = models.DagBag(dag_folder=TEST_DAG_FOLDER, include_examples=False)
+        dag = dagbag.dags['impersonation_subdag']
+        for dag_id in ['impersonation_subdag', 'impersonation_subdag.test_subdag_operation']:
+            dagbag.dags[dag_id].sync_to_db()
+        args = Namespace(dag_id='impersonation_subdag.test_subdag_operation',
+                         subdir=TEST_DAG_FOLDER)
+
+        with patch('airflow.bin.cli.DagBag', wraps=models.DagBag) as mock_dagbag:
+            self.assertEqual(args.dag_id, get_dag(args).dag_id)
+        mock_dagbag.assert_called_once_with(dag.fileloc, include_examples=False)
+
+        # The DAG is no longer defined in the file recorded
+        def set_fileloc(fileloc):
+            session = Session()
+            session.query(models.DagModel).filter(
+                models.DagModel.dag_id == 'impersonation_subdag'
+            ).update({'fileloc': fileloc})
+            session.commit()
+            session.close()
+
+        set_fileloc(os.path.join(TEST_DAG_FOLDER, 'test_mark_success.py'))
+        try:
+            with patch('airflow.bin.cli.DagBag', wraps=models.DagBag) as mock_dagbag:
+                self.assertEqual(args.dag_id, get_dag(args).dag_id)
+        finally:
+            set_fileloc(dag.fileloc)
+        self.assertEqual(2, mock_dagbag.call_count)
+        mock_dagbag.assert_called_with(TEST_DAG_FOLDER)
+
+    def test_run_task_sql_alchemy_conn(self):
+        args = create_mock_args(
+            task_id='print_the_context',
+            dag_id='example_python_operator',
+            subdir=None,
+            execution_date=timezone.parse('2018-01-01')
+        )
+        conn = 'postgresql://airflow@/airflow?host=/var/run/pgbouncer'
+        try:
+            with patch.dict('os.environ', AIRFLOW__CORE__TASK_SQL_ALCHEMY_CONN=conn), \
+                    patch('airflow.settings.configure_orm',
+                          side_effect=RuntimeError) as configure_orm:
+                settings.configure_vars()
+                self.assertRaises(RuntimeError, run, args)
+        finally:
+            settings.configure_vars()
+        configure_orm.assert_called_once_with(disable_connection_pool=True,
+                                              sql_alchemy_conn=conn)
+        self.assertEqual(settings.SQL_ALCHEMY_CONN, settings.TASK_SQL_ALCHEMY_CONN)
+
+    def test_serve_logs_range(self):
+        log_dir = tempfile.mkdtemp()
+        with open(os.path.join(log_dir, '1.log'), 'wb') as f:
+            f.write(b'first line\nsecond line\n')
+
+        import flask
+        apps = []
+        try:
+            with patch.dict('os.environ', AIRFLOW__CORE__BASE_LOG_FOLDER=log_dir), \
+                    patch.object(flask.Flask, 'run', autospec=True,
+                                 side_effect=lambda app, **kwargs: apps.append(app)):
+                cli.serve_logs(Namespace())
+                client = apps[0].test_client()
+
+                response = client.get('/log/1.log', headers={'Range': 'bytes=6-15'})
+                self.assertEqual(206, response.status_code)
+                self.assertEqual(b'line\nsecon', response.data)
+                self.assertEqual('bytes 6-15/23', response.headers['Content-Range'])
+
+                response = client.get('/log/1.log', headers={'Range': 'bytes=11-'})
+                self.assertEqual(206, response.status_code)
+                self.assertEqual(b'second line\n', response.data)
+
+                response = client.get('/log/1.log', headers={'Range': 'bytes=23-'})
+                self.assertEqual(416, response.status_code)
+                self.assertEqual('bytes */23', response.headers['Content-Range'])
+
+                response = client.get('/log/1.log')
+                self.assertEqual(200, response.status_code)
+                self.assertEqual(b'first line\nsecond line\n', response.data)
+
+                response = client.get('/log/../1.log', headers={'Range': 'bytes=0-'})
+                self.assertEqual(404, response.status_code)
+        finally:
+            shutil.rmtree(log_dir)
+
     def test_test(self):
         """Test the `airflow test` command"""
         args = create_mock_args(
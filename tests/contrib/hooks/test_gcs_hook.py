@@ -342,6 +342,45 @@ class TestGoogleCloudStorageHook(unittest.TestCase):
 
         self.assertFalse(response)
 
+    @mock.patch(GCS_STRING.format('GoogleCloudStorageHook.get_conn'))
+    def test_compose(self, mock_service):
+        test_bucket = 'test_bucket'
+        test_source_objects = ['test_object_1', 'test_object_2']
+        test_destination_object = 'test_object_composed'
+
+        method = mock_service.return_value.objects.return_value.compose
+
+        self.gcs_hook.compose(
+            bucket=test_bucket,
+            source_objects=test_source_objects,
+            destination_object=test_destination_object
+        )
+
+        body = {
+            'sourceObjects': [
+                {'name': 'test_object_1'},
+                {'name': 'test_object_2'},
+            ]
+        }
+        method.assert_called_once_with(
+            destinationBucket=test_bucket,
+            destinationObject=test_destination_object,
+            body=body
+        )
+
+    def test_compose_with_empty_source_objects(self):
+        with self.assertRaises(ValueError) as e:
+            self.gcs_hook.compose(
+                bucket='test_bucket',
+                source_objects=[],
+                destination_object='test_object_composed'
+            )
+
+        self.assertEqual(
+            str(e.exception),
+            'source_objects cannot be empty.'
+        )
+
 
 class TestGoogleCloudStorageHookUpload(unittest.TestCase):
     def setUp(self):
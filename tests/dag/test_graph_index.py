@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import unittest
+
+from airflow.exceptions import AirflowDagCycleException, AirflowException
+from airflow.models import DAG
+from airflow.operators.dummy_operator import DummyOperator
+from airflow.utils import timezone
+
+DEFAULT_DATE = timezone.datetime(2016, 1, 1)
+
+
+class DagGraphIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        # A -> B -> C
+        #      B -> D
+        # E
+        self.dag = DAG('test_graph_index', start_date=DEFAULT_DATE)
+        with self.dag:
+            self.a, self.b, self.c, self.d, self.e = [
+                DummyOperator(task_id=task_id) for task_id in 'ABCDE']
+            self.a >> self.b >> [self.c, self.d]
+
+    def test_relative_ids(self):
+        self.assertEqual({'B', 'C', 'D'}, self.a.get_flat_relative_ids())
+        self.assertEqual({'A', 'B'}, self.d.get_flat_relative_ids(upstream=True))
+        self.assertEqual(set(), self.e.get_flat_relative_ids())
+        self.assertEqual(set(), self.a.get_flat_relative_ids(upstream=True))
+
+    def test_topological_sort(self):
+        self.assertEqual([self.a, self.b, self.c, self.d, self.e],
+                         list(self.dag.topological_sort()))
+
+    def test_index_is_rebuilt_after_changes(self):
+        graph_index = self.dag.graph_index
+        self.assertIs(graph_index, self.dag.graph_index)
+        self.assertEqual({'B', 'C', 'D'}, self.a.get_flat_relative_ids())
+
+        self.d >> self.e
+        self.assertIsNot(graph_index, self.dag.graph_index)
+        self.assertEqual({'B', 'C', 'D', 'E'}, self.a.get_flat_relative_ids())
+
+        graph_index = self.dag.graph_index
+        f = DummyOperator(task_id='F', dag=self.dag)
+        self.assertIsNot(graph_index, self.dag.graph_index)
+        self.assertTrue(self.dag.has_task('F'))
+        self.e >> f
+        self.assertEqual({'B', 'C', 'D', 'E', 'F'}, self.a.get_flat_relative_ids())
+
+    def test_sub_dag(self):
+        self.a.get_flat_relative_ids()
+        sub_dag = self.dag.sub_dag('^C$', include_upstream=True)
+        self.assertEqual({'A', 'B', 'C'}, set(sub_dag.task_ids))
+        self.assertEqual(['A', 'B', 'C'],
+                         [t.task_id for t in sub_dag.topological_sort()])
+
+    def test_cycle(self):
+        self.d >> self.a
+        with self.assertRaises(AirflowDagCycleException):
+            self.dag.test_cycle()
+        with self.assertRaises(AirflowException):
+            self.dag.topological_sort()
+        # Relatives are still found by walking the tasks
+        self.assertEqual({'A', 'B', 'C', 'D'}, self.a.get_flat_relative_ids())
+
+    def test_long_chain(self):
+        dag = DAG('test_graph_index_chain', start_date=DEFAULT_DATE)
+        tasks = [DummyOperator(task_id='task_{}'.format(i), dag=dag)
+                 for i in range(5000)]
+        for upstream, downstream in zip(tasks, tasks[1:]):
+            upstream >> downstream
+
+        self.assertFalse(dag.test_cycle())
+        self.assertEqual(tasks, list(dag.topological_sort()))
+        self.assertEqual(4999, len(tasks[0].get_flat_relative_ids()))
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import datetime
+import unittest
+
+from dateutil.relativedelta import relativedelta, FR
+
+from airflow import models, settings
+from airflow.dag.serialization import (
+    SerializedBaseOperator, SerializedDAG, deserialize_value, serialize_value
+)
+from airflow.models import DAG, DagBag
+from airflow.models.serialized_dag import SerializedDagModel
+from airflow.operators.bash_operator import BashOperator
+from airflow.operators.python_operator import PythonOperator
+from airflow.operators.subdag_operator import SubDagOperator
+from airflow.utils import timezone
+
+DEFAULT_DATE = timezone.datetime(2016, 1, 1)
+
+
+def make_dag(dag_id='test_serialization'):
+    dag = DAG(dag_id, start_date=DEFAULT_DATE, schedule_interval='@daily',
+              default_args={'owner': 'airflow', 'retries': 1,
+                            'retry_delay': datetime.timedelta(minutes=5)})
+    with dag:
+        bash = BashOperator(task_id='bash', bash_command='echo {{ ds }}')
+        python = PythonOperator(task_id='python', python_callable=make_dag)
+        subdag = DAG(dag_id + '.section', start_date=DEFAULT_DATE,
+                     schedule_interval='@daily')
+        BashOperator(task_id='inner', bash_command='true', dag=subdag)
+        section = SubDagOperator(task_id='section', subdag=subdag)
+        bash >> python >> section
+    return dag
+
+
+class SerializeValueTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        values = [
+            None, 1, 1.5, 'a', True, [1, 'a'], {'a': [1, 2]}, (1, 2), {'a', 'b'},
+            timezone.datetime(2016, 1, 1, 12, 30),
+            datetime.timedelta(hours=1, seconds=3),
+            relativedelta(months=1, weekday=FR(-1)),
+        ]
+        for value in values:
+            self.assertEqual(value, deserialize_value(serialize_value(value)))
+
+    def test_unknown_types_are_strings(self):
+        self.assertEqual('abc', serialize_value(type('Unknown', (), {
+            '__str__': lambda self: 'abc'})()))
+
+
+class SerializedDAGTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        dag = make_dag()
+        serialized = SerializedDAG.from_json(SerializedDAG.to_json(dag))
+
+        self.assertIsInstance(serialized, SerializedDAG)
+        self.assertEqual(dag.dag_id, serialized.dag_id)
+        self.assertEqual(dag.schedule_interval, serialized.schedule_interval)
+        self.assertEqual(dag.start_date, serialized.start_date)
+        self.assertEqual(dag.timezone.name, serialized.timezone.name)
+        self.assertEqual(dag.default_args, serialized.default_args)
+        self.assertEqual(dag.full_filepath, serialized.full_filepath)
+        self.assertEqual(dag.following_schedule(DEFAULT_DATE),
+                         serialized.following_schedule(DEFAULT_DATE))
+        self.assertEqual(set(dag.task_dict), set(serialized.task_dict))
+        for task in dag.tasks:
+            serialized_task = serialized.get_task(task.task_id)
+            self.assertIsInstance(serialized_task, SerializedBaseOperator)
+            self.assertIs(serialized, serialized_task.dag)
+            self.assertEqual(task.task_type, serialized_task.task_type)
+            self.assertEqual(task.upstream_task_ids, serialized_task.upstream_task_ids)
+            self.assertEqual(task.downstream_task_ids, serialized_task.downstream_task_ids)
+            self.assertEqual(task.retry_delay, serialized_task.retry_delay)
+            self.assertEqual(task.ui_color, serialized_task.ui_color)
+            for field in task.template_fields:
+                self.assertEqual(getattr(task, field), getattr(serialized_task, field))
+
+        self.assertIn('def make_dag', serialized.get_task('python').python_callable)
+        self.assertEqual(['test_serialization.section'],
+                         [subdag.dag_id for subdag in serialized.subdags])
+        self.assertEqual(['inner'], serialized.subdags[0].task_ids)
+
+    def test_to_json_is_deterministic(self):
+        self.assertEqual(SerializedDAG.to_json(make_dag()),
+                         SerializedDAG.to_json(make_dag()))
+
+    def test_example_dags(self):
+        dagbag = DagBag(dag_folder='/dev/null', include_examples=True)
+        for dag in dagbag.dags.values():
+            if dag.is_subdag:
+                continue
+            serialized = SerializedDAG.from_json(SerializedDAG.to_json(dag))
+            self.assertEqual(set(dag.task_dict), set(serialized.task_dict))
+            self.assertEqual(dag.schedule_interval, serialized.schedule_interval)
+
+    def test_serialized_operator_can_not_execute(self):
+        task = SerializedDAG.from_json(SerializedDAG.to_json(make_dag())).get_task('bash')
+        with self.assertRaises(NotImplementedError):
+            task.execute({})
+
+
+class SerializedDagBagTest(unittest.TestCase):
+
+    def setUp(self):
+        session = settings.Session()
+        session.query(SerializedDagModel).delete()
+        session.commit()
+        session.close()
+
+    tearDown = setUp
+
+    def test_write_dag_skips_unchanged(self):
+        dag = make_dag()
+        self.assertTrue(SerializedDagModel.write_dag(dag))
+        self.assertFalse(SerializedDagModel.write_dag(dag))
+        dag.get_task('bash').bash_command = 'echo changed'
+        self.assertTrue(SerializedDagModel.write_dag(dag))
+
+    def test_get_dag(self):
+        SerializedDagModel.write_dag(make_dag())
+        dagbag = models.DagBag(store_serialized_dags=True)
+
+        self.assertEqual({'test_serialization', 'test_serialization.section'},
+                         set(dagbag.dags))
+        subdag = dagbag.get_dag('test_serialization.section')
+        self.assertTrue(subdag.is_subdag)
+        self.assertEqual('test_serialization', subdag.parent_dag.dag_id)
+
+        dag = make_dag()
+        dag.get_task('bash').bash_command = 'echo changed'
+        SerializedDagModel.write_dag(dag)
+        self.assertEqual('echo changed',
+                         dagbag.get_dag('test_serialization').get_task('bash').bash_command)
+
+        SerializedDagModel.remove_deleted_dags([])
+        self.assertIsNone(dagbag.get_dag('test_serialization'))
+        self.assertNotIn('test_serialization.section', dagbag.dags)
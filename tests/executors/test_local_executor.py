@@ -17,9 +17,11 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import multiprocessing
 import unittest
 
-from airflow.executors.local_executor import LocalExecutor
+from airflow import configuration
+from airflow.executors.local_executor import LocalExecutor, LocalWorker
 from airflow.utils.state import State
 from airflow.utils.timeout import timeout
 
@@ -74,6 +76,18 @@ class LocalExecutorTest(unittest.TestCase):
         test_parallelism = 2
         self.execution_parallelism(parallelism=test_parallelism)
 
+    def test_execute_work_forked(self):
+        configuration.conf.set('core', 'execute_tasks_new_python_interpreter', 'False')
+        try:
+            result_queue = multiprocessing.Queue()
+            worker = LocalWorker(result_queue)
+            worker.execute_work('success', ['airflow', 'version'])
+            self.assertEqual(('success', State.SUCCESS), result_queue.get(timeout=10))
+            worker.execute_work('fail', ['airflow', 'no_such_command'])
+            self.assertEqual(('fail', State.FAILED), result_queue.get(timeout=10))
+        finally:
+            configuration.conf.set('core', 'execute_tasks_new_python_interpreter', 'True')
+
 
 if __name__ == '__main__':
     unittest.main()
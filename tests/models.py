@@ -27,6 +27,7 @@ import inspect
 import logging
 import os
 import re
+import shutil
 import textwrap
 import time
 import unittest
@@ -35,6 +36,7 @@ import uuid
 from tempfile import NamedTemporaryFile, mkdtemp
 
 import pendulum
+from pendulum.tz.timezone import FixedTimezone
 import six
 from mock import ANY, Mock, mock_open, patch
 from parameterized import parameterized
@@ -53,8 +55,9 @@ from airflow.models import State as ST
 from airflow.models import TaskReschedule as TR
 from airflow.models import XCom
 from airflow.models import Variable
-from airflow.models import clear_task_instances
+from airflow.models import bulk_clear_task_instances, clear_task_instances
 from airflow.models.connection import Connection
+from airflow.models.dagpickle import DagPickle
 from airflow.operators.bash_operator import BashOperator
 from airflow.operators.dummy_operator import DummyOperator
 from airflow.operators.python_operator import PythonOperator
@@ -843,6 +846,76 @@ class DagTest(unittest.TestCase):
         self.assertEqual(prev_local.isoformat(), "2018-03-24T03:00:00+01:00")
         self.assertEqual(prev.isoformat(), "2018-03-24T02:00:00+00:00")
 
+    def test_iter_following_schedules(self):
+        """
+        Make sure the iterated schedules match following_schedule across
+        DST transitions
+        """
+        local_tz = pendulum.timezone('Europe/Zurich')
+        start = local_tz.convert(datetime.datetime(2018, 10, 28, 1, 10),
+                                 dst_rule=pendulum.PRE_TRANSITION)
+        utc = timezone.convert_to_utc(start)
+
+        for schedule_interval in ['*/20 * * * *', '0 3 * * *', '30 2 * * *',
+                                  '0 1-4 * * *', datetime.timedelta(hours=1)]:
+            dag = DAG('tz_dag', start_date=start, schedule_interval=schedule_interval)
+            expected = []
+            dttm = utc
+            for _ in range(50):
+                dttm = dag.following_schedule(dttm)
+                expected.append(dttm)
+
+            schedules = dag.iter_following_schedules(utc)
+            self.assertEqual(expected, [next(schedules) for _ in range(50)])
+
+        dag = DAG('tz_dag', start_date=start, schedule_interval='@once')
+        self.assertEqual([], list(dag.iter_following_schedules(utc)))
+        self.assertIsNone(dag.following_schedule(utc))
+
+    def test_following_schedule_fixed_offset_timezone(self):
+        start = datetime.datetime(2020, 1, 1, 1, tzinfo=FixedTimezone(3600))
+        dag = DAG('fixed_offset_dag', start_date=start,
+                  schedule_interval='*/5 * * * *')
+        utc = timezone.convert_to_utc(start)
+
+        _next = dag.following_schedule(utc)
+        self.assertEqual(_next.isoformat(), "2020-01-01T00:05:00+00:00")
+        schedules = dag.iter_following_schedules(utc)
+        self.assertEqual([next(schedules) for _ in range(2)],
+                         [_next, dag.following_schedule(_next)])
+
+    def test_sub_dag(self):
+        dag = DAG('test_sub_dag', start_date=DEFAULT_DATE,
+                  params={'key': 'value'})
+        with dag:
+            op1 = DummyOperator(task_id='op1', params={'size': [1, 2, 3]})
+            op2 = DummyOperator(task_id='op2')
+            op3 = DummyOperator(task_id='op3')
+            op1 >> op2 >> op3
+
+        sub_dag = dag.sub_dag('op2', include_upstream=True)
+        self.assertEqual(['op1', 'op2'], sub_dag.task_ids)
+        self.assertTrue(sub_dag.partial)
+        self.assertFalse(dag.partial)
+
+        sub_op1, sub_op2 = sub_dag.get_task('op1'), sub_dag.get_task('op2')
+        self.assertIs(sub_dag, sub_op2.dag)
+        self.assertEqual({'op1'}, sub_op2.upstream_task_ids)
+        self.assertEqual(set(), sub_op2.downstream_task_ids)
+        self.assertEqual({'op3'}, op2.downstream_task_ids)
+        self.assertIs(dag, op2.dag)
+
+        # Attribute values are shared, not copied
+        self.assertIs(dag.params, sub_dag.params)
+        self.assertIs(op1.params, sub_op1.params)
+
+        # Assigning attributes of the subset does not change the dag
+        sub_op1.params = {}
+        sub_dag.params = {}
+        self.assertEqual([1, 2, 3], op1.params['size'])
+        self.assertEqual('value', dag.params['key'])
+        self.assertEqual(3, len(dag.tasks))
+
     @patch('airflow.models.timezone.utcnow')
     def test_sync_to_db(self, mock_now):
         dag = DAG(
@@ -906,6 +979,73 @@ class DagTest(unittest.TestCase):
         self.assertIsNotNone(orm_dag.default_view)
         self.assertEqual(orm_dag.get_default_view(), "graph")
 
+    def test_pickle_unchanged_dag(self):
+        dag = DAG('test_pickle_unchanged_dag', start_date=DEFAULT_DATE)
+        with dag:
+            DummyOperator(task_id='task')
+        session = settings.Session()
+        session.query(DagModel).filter(DagModel.dag_id == dag.dag_id).delete()
+        session.add(DagModel(dag_id=dag.dag_id))
+        session.commit()
+
+        pickle_ids = []
+        try:
+            dp = dag.pickle(session=session)
+            pickle_ids.append(dp.id)
+            self.assertEqual(dp.pickle_hash, DagPickle.content_hash(dag))
+            self.assertEqual(dag.pickle(session=session).id, dp.id)
+
+            DummyOperator(task_id='other_task', dag=dag)
+            pickle_ids.append(dag.pickle(session=session).id)
+            self.assertNotEqual(pickle_ids[-1], dp.id)
+            self.assertEqual(session.query(DagModel.pickle_id).filter(
+                DagModel.dag_id == dag.dag_id).scalar(), dag.pickle_id)
+        finally:
+            session.query(DagModel).filter(DagModel.dag_id == dag.dag_id).delete()
+            session.query(DagPickle).filter(DagPickle.id.in_(pickle_ids)).delete(
+                synchronize_session=False)
+            session.commit()
+            session.close()
+
+    def test_dag_pickle_content_hash(self):
+        def make_dag(op_args):
+            dag = DAG('test_dag_pickle_content_hash', start_date=DEFAULT_DATE)
+            PythonOperator(task_id='task', python_callable=lambda x: x,
+                           op_args=op_args, dag=dag)
+            return dag
+
+        self.assertEqual(DagPickle.content_hash(make_dag([1])),
+                         DagPickle.content_hash(make_dag([1])))
+        self.assertNotEqual(DagPickle.content_hash(make_dag([1])),
+                            DagPickle.content_hash(make_dag([2])))
+
+    def test_dag_pickle_load_cache(self):
+        dag = DAG('test_dag_pickle_load_cache', start_date=DEFAULT_DATE)
+        with dag:
+            DummyOperator(task_id='task')
+        with create_session() as session:
+            dp = DagPickle(dag)
+            session.add(dp)
+            session.commit()
+            pickle_id = dp.id
+
+        cache_dir = mkdtemp()
+        try:
+            with patch('airflow.models.dagpickle._cache_dir',
+                       return_value=cache_dir):
+                self.assertEqual(DagPickle.load(pickle_id).dag_id, dag.dag_id)
+                self.assertEqual(os.listdir(cache_dir),
+                                 [dp.pickle_hash + '.pkl'])
+
+                with create_session() as session:
+                    session.query(DagPickle).filter(
+                        DagPickle.id == pickle_id).update(
+                        {DagPickle.pickle: None}, synchronize_session=False)
+                self.assertEqual(DagPickle.load(pickle_id).dag_id, dag.dag_id)
+                self.assertIsNone(DagPickle.load(pickle_id + 1))
+        finally:
+            shutil.rmtree(cache_dir)
+
 
 class DagRunTest(unittest.TestCase):
 
@@ -1117,6 +1257,44 @@ class DagRunTest(unittest.TestCase):
         dr.update_state()
         self.assertEqual(dr.state, State.FAILED)
 
+    def test_dagrun_update_state_with_task_instances_by_run(self):
+        dag = DAG('test_dagrun_update_state_with_task_instances_by_run',
+                  start_date=DEFAULT_DATE)
+        with dag:
+            op1 = DummyOperator(task_id='A')
+            op2 = DummyOperator(task_id='B')
+            op1 >> op2
+
+        dag.clear()
+        dr1 = dag.create_dagrun(run_id='test_update_state_1',
+                                state=State.RUNNING,
+                                execution_date=DEFAULT_DATE,
+                                start_date=DEFAULT_DATE)
+        dr2 = dag.create_dagrun(run_id='test_update_state_2',
+                                state=State.RUNNING,
+                                execution_date=DEFAULT_DATE + datetime.timedelta(days=1),
+                                start_date=DEFAULT_DATE)
+        session = settings.Session()
+        dr1.get_task_instance(task_id='A').set_state(State.FAILED, session)
+        dr2.get_task_instance(task_id='A').set_state(State.SUCCESS, session)
+
+        tis_by_run = DagRun.get_task_instances_by_run([dr1, dr2], session)
+        self.assertEqual({dr1.execution_date, dr2.execution_date}, set(tis_by_run))
+        self.assertEqual(['A', 'B'], sorted(ti.task_id
+                                            for ti in tis_by_run[dr1.execution_date]))
+
+        # B is flagged as upstream failed instead of being deadlocked
+        self.assertEqual(State.RUNNING, dr1.update_state(
+            session=session, tis=tis_by_run[dr1.execution_date]))
+        self.assertEqual(State.UPSTREAM_FAILED,
+                         dr1.get_task_instance(task_id='B').state)
+        self.assertEqual(State.FAILED, dr1.update_state(session=session))
+
+        self.assertEqual(State.RUNNING, dr2.update_state(
+            session=session, tis=tis_by_run[dr2.execution_date]))
+        self.assertEqual(State.NONE, dr2.get_task_instance(task_id='B').state)
+        session.close()
+
     def test_dagrun_no_deadlock_with_shutdown(self):
         session = settings.Session()
         dag = DAG('test_dagrun_no_deadlock_with_shutdown',
@@ -1436,6 +1614,37 @@ class DagRunTest(unittest.TestCase):
         flaky_ti.refresh_from_db()
         self.assertEqual(State.NONE, flaky_ti.state)
 
+    def test_verify_integrity(self):
+        dag = DAG('test_verify_integrity', start_date=DEFAULT_DATE)
+        with dag:
+            op1 = DummyOperator(task_id='op1', retries=2, queue='q1')
+            op2 = DummyOperator(task_id='op2')
+            DummyOperator(task_id='adhoc', adhoc=True)
+            DummyOperator(task_id='later',
+                          start_date=DEFAULT_DATE + datetime.timedelta(days=1))
+            op1 >> op2
+
+        dagrun = self.create_dag_run(dag, state=State.SUCCESS,
+                                     execution_date=DEFAULT_DATE)
+        tis = {ti.task_id: ti for ti in dagrun.get_task_instances()}
+        self.assertEqual({'op1', 'op2'}, set(tis))
+        self.assertEqual(State.NONE, tis['op1'].state)
+        self.assertEqual(1, tis['op1'].try_number)
+        self.assertEqual(2, tis['op1'].max_tries)
+        self.assertEqual('q1', tis['op1'].queue)
+        self.assertEqual(2, tis['op1'].priority_weight)
+
+        dagrun.dag = DAG(dag_id=dag.dag_id, start_date=DEFAULT_DATE)
+        dagrun.dag.add_task(DummyOperator(task_id='op1', owner='test'))
+        dagrun.verify_integrity()
+        states = {ti.task_id: ti.state for ti in dagrun.get_task_instances()}
+        self.assertEqual({'op1': State.NONE, 'op2': State.REMOVED}, states)
+
+        dagrun.dag.add_task(DummyOperator(task_id='op2', owner='test'))
+        dagrun.verify_integrity()
+        states = {ti.task_id: ti.state for ti in dagrun.get_task_instances()}
+        self.assertEqual({'op1': State.NONE, 'op2': State.NONE}, states)
+
 
 class DagBagTest(unittest.TestCase):
     @classmethod
@@ -1915,6 +2124,40 @@ class DagBagTest(unittest.TestCase):
                                                              'unit_test_mode'),
                                     ANY)
 
+    @patch.object(TI, 'alert_failure')
+    @patch.object(TI, 'handle_failure')
+    def test_kill_reaped_zombies(self, mock_ti_handle_failure, mock_ti_alert_failure):
+        """
+        Test that kill zombies only alerts for zombies that were already
+        set up for retry, without failing them again
+        """
+        dagbag = models.DagBag()
+        with create_session() as session:
+            session.query(TI).delete()
+            dag = dagbag.get_dag('example_branch_operator')
+            task = dag.get_task(task_id='run_this_first')
+
+            ti = TI(task, DEFAULT_DATE, State.RUNNING)
+            session.add(ti)
+            session.commit()
+            zombie = SimpleTaskInstance(ti)
+            ti.state = State.UP_FOR_RETRY
+            session.merge(ti)
+            session.commit()
+            zombie._state = State.UP_FOR_RETRY
+
+            # The next try was started before the zombie was handled
+            ti.state = State.RUNNING
+            session.merge(ti)
+            session.commit()
+
+            dagbag.kill_zombies([zombie])
+            mock_ti_handle_failure.assert_not_called()
+            mock_ti_alert_failure.assert_called_once_with(ANY, ANY)
+            ti.refresh_from_db(session=session)
+            self.assertEqual(State.RUNNING, ti.state)
+            session.query(TI).delete()
+
     def test_deactivate_unknown_dags(self):
         """
         Test that dag_ids not passed into deactivate_unknown_dags
@@ -2971,6 +3214,52 @@ class ClearTasksTest(unittest.TestCase):
         self.assertEqual(ti1.try_number, 2)
         self.assertEqual(ti1.max_tries, 2)
 
+    def test_bulk_clear_task_instances(self):
+        dag = DAG('test_bulk_clear_task_instances', start_date=DEFAULT_DATE)
+        task0 = DummyOperator(task_id='task0', owner='test', dag=dag)
+        task1 = DummyOperator(task_id='task1', owner='test', dag=dag, retries=2)
+        task2 = DummyOperator(task_id='task2', owner='test', dag=dag)
+        ti0 = TI(task=task0, execution_date=DEFAULT_DATE)
+        ti1 = TI(task=task1, execution_date=DEFAULT_DATE)
+        ti2 = TI(task=task2, execution_date=DEFAULT_DATE)
+        ti0.run()
+        ti1.run()
+        ti2.run()
+        dr = dag.create_dagrun(run_id='test_bulk_clear_task_instances',
+                               state=State.SUCCESS,
+                               execution_date=DEFAULT_DATE,
+                               start_date=DEFAULT_DATE)
+
+        session = settings.Session()
+        job = BackfillJob(dag=dag)
+        session.add(job)
+        session.flush()
+        job_id = job.id
+        ti2.state = State.RUNNING
+        ti2.job_id = job_id
+        session.merge(ti2)
+        session.commit()
+
+        # task0 is not known anymore
+        del dag.task_dict['task0']
+        bulk_clear_task_instances(TI.dag_id == dag.dag_id, session, dags=[dag])
+        session.commit()
+
+        ti0.refresh_from_db()
+        ti1.refresh_from_db()
+        ti2.refresh_from_db()
+        dr.refresh_from_db()
+        self.assertEqual(State.NONE, ti0.state)
+        self.assertEqual(1, ti0.max_tries)
+        self.assertEqual(State.NONE, ti1.state)
+        self.assertEqual(3, ti1.max_tries)
+        self.assertEqual(State.SHUTDOWN, ti2.state)
+        self.assertEqual(State.SHUTDOWN, session.query(BackfillJob.state).filter(
+            BackfillJob.id == job_id).scalar())
+        self.assertEqual(State.RUNNING, dr.state)
+        self.assertIsNone(dr.end_date)
+        session.close()
+
     def test_dag_clear(self):
         dag = DAG('test_dag_clear', start_date=DEFAULT_DATE,
                   end_date=DEFAULT_DATE + datetime.timedelta(days=10))
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+import logging
+import os
+import time
+import unittest
+
+import psutil
+
+from airflow import models, settings
+from airflow.jobs import LocalTaskJob
+from airflow.models import TaskInstance as TI
+from airflow.task.task_runner.fork_task_runner import ForkTaskRunner
+from airflow.utils import timezone
+from airflow.utils.db import create_session
+from airflow.utils.log.logging_mixin import redirect_stderr, redirect_stdout
+from airflow.utils.state import State
+
+from logging.config import dictConfig
+
+from tests.core import TEST_DAG_FOLDER
+from tests.task.task_runner.test_standard_task_runner import LOGGING_CONFIG
+
+DEFAULT_DATE = timezone.datetime(2016, 1, 1)
+
+
+class TestForkTaskRunner(unittest.TestCase):
+    def setUp(self):
+        dictConfig(LOGGING_CONFIG)
+        self.dagbag = models.DagBag(
+            dag_folder=TEST_DAG_FOLDER,
+            include_examples=False,
+        )
+        self.clear_dag_runs()
+
+    def tearDown(self):
+        self.clear_dag_runs()
+
+    @staticmethod
+    def clear_dag_runs():
+        with create_session() as session:
+            session.query(models.DagRun).filter(
+                models.DagRun.dag_id.in_(['test_mark_success', 'test_on_kill'])
+            ).delete(synchronize_session=False)
+
+    def _create_task_instance(self, dag_id, task_id):
+        dag = self.dagbag.dags.get(dag_id)
+        dag.clear()
+        dag.create_dagrun(run_id="test",
+                          state=State.RUNNING,
+                          execution_date=DEFAULT_DATE,
+                          start_date=DEFAULT_DATE,
+                          session=settings.Session())
+        return TI(task=dag.get_task(task_id), execution_date=DEFAULT_DATE)
+
+    def test_run_forked(self):
+        ti = self._create_task_instance('test_mark_success', 'task1')
+        # The child runs the task of the DAG parsed here, which does not sleep
+        ti.task.execute = lambda context: None
+        job = LocalTaskJob(task_instance=ti, ignore_ti_state=True)
+
+        runner = ForkTaskRunner(job)
+        runner.start()
+
+        # The child is a fork of this process, not a new interpreter
+        self.assertEqual(psutil.Process().cmdline(), runner.process.cmdline())
+        self.assertEqual(runner.process.pid, os.getpgid(runner.process.pid))
+
+        for _ in range(60):
+            if runner.return_code() is not None:
+                break
+            time.sleep(0.5)
+        self.assertEqual(0, runner.return_code())
+        ti.refresh_from_db()
+        self.assertEqual(State.SUCCESS, ti.state)
+
+        runner.terminate()
+        runner.on_finish()
+
+    def test_run_forked_with_redirected_output(self):
+        ti = self._create_task_instance('test_mark_success', 'task1')
+        ti.task.execute = lambda context: None
+        job = LocalTaskJob(task_instance=ti, ignore_ti_state=True)
+
+        # `airflow run --local` redirects the output to the task logger
+        runner = ForkTaskRunner(job)
+        with redirect_stdout(ti.log, logging.INFO), \
+                redirect_stderr(ti.log, logging.WARN):
+            runner.start()
+
+        for _ in range(60):
+            if runner.return_code() is not None:
+                break
+            time.sleep(0.5)
+        self.assertEqual(0, runner.return_code())
+        ti.refresh_from_db()
+        self.assertEqual(State.SUCCESS, ti.state)
+
+        runner.terminate()
+        runner.on_finish()
+
+    def test_on_kill(self):
+        """
+        Test that ensures that clearing in the UI SIGTERMS
+        the task
+        """
+        path = "/tmp/airflow_on_kill"
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+        ti = self._create_task_instance('test_on_kill', 'task1')
+        job1 = LocalTaskJob(task_instance=ti, ignore_ti_state=True)
+
+        runner = ForkTaskRunner(job1)
+        runner.start()
+
+        # give the task some time to startup
+        time.sleep(3)
+
+        runner.terminate()
+        self.assertIsNotNone(runner.return_code())
+
+        f = open(path, "r")
+        self.assertEqual("ON_KILL_TEST", f.readline())
+        f.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,13 +16,17 @@
 # KIND, either express or implied.  See the License for the
 # specific language governing permissions and limitations
 # under the License.
+import io
+import logging
 import mock
 import os
 import psutil
+import shutil
+import tempfile
 import time
 import unittest
 
-from airflow import models, settings
+from airflow import configuration, models, settings
 from airflow.jobs import LocalTaskJob
 from airflow.models import TaskInstance as TI
 from airflow.task.task_runner import StandardTaskRunner
@@ -90,6 +94,68 @@ class TestStandardTaskRunner(unittest.TestCase):
         for p in procs:
             self.assertFalse(psutil.pid_exists(p.pid))
 
+    def test_wait(self):
+        local_task_job = mock.Mock()
+        local_task_job.task_instance = mock.MagicMock()
+        local_task_job.task_instance.run_as_user = None
+        local_task_job.task_instance.command_as_list.return_value = [
+            'bash', '-c', 'sleep 0.5; exit 3']
+
+        runner = StandardTaskRunner(local_task_job)
+        runner.start()
+
+        self.assertIsNone(runner.wait(0))
+        self.assertEqual(3, runner.wait(10))
+        self.assertEqual(3, runner.return_code())
+        runner.terminate()
+
+    def test_raw_task_log_forwarding(self):
+        local_task_job = mock.Mock()
+        local_task_job.task_instance = mock.MagicMock()
+        local_task_job.task_instance.run_as_user = None
+        local_task_job.task_instance.command_as_list.return_value = [
+            'bash', '-c', 'printf "%s\\n" first "second line"']
+
+        log_dir = tempfile.mkdtemp()
+        log_file = os.path.join(log_dir, 'task.log')
+        file_handler = logging.FileHandler(log_file)
+        configuration.conf.set('core', 'raw_task_log_forwarding', 'True')
+        runner = StandardTaskRunner(local_task_job)
+        runner.log.addHandler(file_handler)
+        try:
+            runner.start()
+            self.assertEqual(0, runner.wait(10))
+            for _ in range(50):
+                with open(log_file) as f:
+                    content = f.read()
+                if 'Forwarded' in content:
+                    break
+                time.sleep(0.1)
+        finally:
+            runner.log.removeHandler(file_handler)
+            file_handler.close()
+            configuration.conf.set('core', 'raw_task_log_forwarding', 'False')
+            shutil.rmtree(log_dir)
+
+        # The output is copied without the log format
+        self.assertIn('first\nsecond line\n', content)
+        self.assertNotIn('Subtask', content)
+        self.assertIn('Forwarded 18 bytes of task output', content)
+
+    def test_task_log_forwarding_counts_bytes(self):
+        local_task_job = mock.Mock()
+        local_task_job.task_instance = mock.MagicMock()
+        local_task_job.task_instance.run_as_user = None
+        runner = StandardTaskRunner(local_task_job)
+        output = u'd\u00e9j\u00e0 vu\n'.encode('utf-8')
+
+        # Bytes are counted as in raw mode, not decoded characters
+        for stream in (io.BytesIO(output),
+                       io.TextIOWrapper(io.BytesIO(output), encoding='utf-8')):
+            with mock.patch.object(runner, '_record_log_volume') as record:
+                runner._read_task_logs(stream)
+            self.assertEqual(10, record.call_args[0][0])
+
     def test_on_kill(self):
         """
         Test that ensures that clearing in the UI SIGTERMS
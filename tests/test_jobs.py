@@ -52,7 +52,8 @@ from airflow.operators.bash_operator import BashOperator
 from airflow.operators.dummy_operator import DummyOperator
 from airflow.task.task_runner.base_task_runner import BaseTaskRunner
 from airflow.utils import timezone
-from airflow.utils.dag_processing import SimpleDag, SimpleDagBag, list_py_file_paths
+from airflow.utils.dag_processing import (SimpleDag, SimpleDagBag, TaskInstanceRow,
+                                          list_py_file_paths)
 from airflow.utils.dates import days_ago
 from airflow.utils.db import provide_session
 from airflow.utils.net import get_hostname
@@ -128,6 +129,26 @@ class BaseJobTest(unittest.TestCase):
         self.assertEqual(job.state, State.FAILED)
         self.assertIsNotNone(job.end_date)
 
+    def test_heartbeat(self):
+        def heartbeat_twice():
+            job.heartrate = 0
+            job.heartbeat()
+            first_heartbeat = job.latest_heartbeat
+            with create_session() as session:
+                self.assertEqual(
+                    first_heartbeat,
+                    session.query(BaseJob.latest_heartbeat).filter(
+                        BaseJob.id == job.id).scalar())
+                session.query(BaseJob).filter(BaseJob.id == job.id).update(
+                    {BaseJob.state: State.SHUTDOWN}, synchronize_session=False)
+            # The job is killed and its heartbeat is not updated
+            with self.assertRaises(AirflowException):
+                job.heartbeat()
+            self.assertEqual(first_heartbeat, job.latest_heartbeat)
+
+        job = self.TestJob(heartbeat_twice)
+        job.run()
+
 
 class BackfillJobTest(unittest.TestCase):
 
@@ -1532,6 +1553,41 @@ class SchedulerJobTest(unittest.TestCase):
         self.assertIn(ti_no_dagrun.key, res_keys)
         self.assertIn(ti_with_dagrun.key, res_keys)
 
+    def test_find_executable_task_instances_rows(self):
+        dag_id = 'SchedulerJobTest.test_find_executable_task_instances_rows'
+        dag = DAG(dag_id=dag_id, start_date=DEFAULT_DATE, concurrency=16)
+        task1 = DummyOperator(dag=dag, task_id='dummy1', priority_weight=2)
+        task2 = DummyOperator(dag=dag, task_id='dummy2')
+        dagbag = self._make_simple_dag_bag([dag])
+
+        executor = TestExecutor()
+        scheduler = SchedulerJob(executor=executor)
+        session = settings.Session()
+
+        dr = scheduler.create_dag_run(dag)
+        ti1 = TI(task1, dr.execution_date)
+        ti2 = TI(task2, dr.execution_date)
+        ti1.state = State.SCHEDULED
+        ti2.state = State.SCHEDULED
+        ti1.try_number = 2
+        session.merge(ti1)
+        session.merge(ti2)
+        session.commit()
+        executor.queued_tasks[ti2.key] = None
+
+        res = scheduler._find_executable_task_instances(
+            dagbag,
+            states=[State.SCHEDULED],
+            session=session)
+
+        self.assertEqual(1, len(res))
+        self.assertIsInstance(res[0], TaskInstanceRow)
+        self.assertEqual(ti1.key, res[0].key)
+        self.assertEqual(2, res[0].priority_weight)
+        self.assertEqual(repr(ti1), repr(res[0]))
+        with self.assertRaises(AttributeError):
+            res[0].executor_config
+
     def test_find_executable_task_instances_pool(self):
         dag_id = 'SchedulerJobTest.test_find_executable_task_instances_pool'
         task_id_1 = 'dummy'
@@ -2987,6 +3043,53 @@ class SchedulerJobTest(unittest.TestCase):
 
         sla_callback.assert_not_called()
 
+    def test_scheduler_sla_miss_recorded_once(self):
+        """
+        Test that the scheduler records every missed schedule once, and calls
+        the sla_miss_callback once for all of them
+        """
+        session = settings.Session()
+        session.query(models.SlaMiss).filter(
+            models.SlaMiss.dag_id == 'test_sla_miss_bulk').delete()
+
+        sla_callback = MagicMock()
+        test_start_date = timezone.utcnow() - datetime.timedelta(hours=10, minutes=30)
+        dag = DAG(dag_id='test_sla_miss_bulk',
+                  sla_miss_callback=sla_callback,
+                  schedule_interval=datetime.timedelta(hours=1),
+                  default_args={'start_date': test_start_date})
+
+        task = DummyOperator(task_id='dummy',
+                             dag=dag,
+                             owner='airflow',
+                             sla=datetime.timedelta(minutes=15))
+        DummyOperator(task_id='no_sla', dag=dag, owner='airflow')
+
+        session.merge(models.TaskInstance(task=task,
+                                          execution_date=test_start_date,
+                                          state='success'))
+        session.commit()
+
+        scheduler = SchedulerJob(dag_id='test_sla_miss_bulk',
+                                 num_runs=1)
+        scheduler.manage_slas(dag=dag, session=session)
+        scheduler.manage_slas(dag=dag, session=session)
+
+        sla_misses = (
+            session.query(models.SlaMiss)
+            .filter(models.SlaMiss.dag_id == 'test_sla_miss_bulk')
+            .order_by(models.SlaMiss.execution_date)
+            .all()
+        )
+        # The runs of the 9 hours after the last success ended more than 15
+        # minutes ago
+        self.assertEqual(
+            [test_start_date + datetime.timedelta(hours=i) for i in range(1, 10)],
+            [sla_miss.execution_date for sla_miss in sla_misses])
+        self.assertEqual({'dummy'}, {sla_miss.task_id for sla_miss in sla_misses})
+        self.assertTrue(all(sla_miss.notification_sent for sla_miss in sla_misses))
+        sla_callback.assert_called_once()
+
     def test_scheduler_sla_miss_callback_exception(self):
         """
         Test that the scheduler gracefully logs an exception if there is a problem
@@ -3264,6 +3367,47 @@ class SchedulerJobTest(unittest.TestCase):
 
         self.assertEqual(execution_date, running_date, 'Running Date must match Execution Date')
 
+    def test_create_dag_runs_catchup(self):
+        """
+        Test that the scheduler creates the DagRuns of several due schedules
+        at once, up to max_active_runs
+        """
+        dag = DAG('test_create_dag_runs_catchup',
+                  start_date=DEFAULT_DATE,
+                  schedule_interval=datetime.timedelta(days=1),
+                  max_active_runs=5)
+        DummyOperator(task_id='dummy', dag=dag, owner='airflow')
+        DummyOperator(task_id='later', dag=dag, owner='airflow',
+                      start_date=DEFAULT_DATE + datetime.timedelta(days=2))
+        dag.clear()
+
+        scheduler = SchedulerJob()
+        self.assertEqual(
+            {dag.dag_id: (0, None, None)},
+            scheduler._get_dag_run_stats([dag.dag_id]))
+
+        dag_runs = scheduler.create_dag_runs(dag, max_runs=3)
+        self.assertEqual([DEFAULT_DATE + datetime.timedelta(days=i) for i in range(3)],
+                         [dr.execution_date for dr in dag_runs])
+        self.assertEqual({DagRun.ID_PREFIX + dr.execution_date.isoformat()
+                          for dr in dag_runs},
+                         {dr.run_id for dr in dag_runs})
+        self.assertEqual(['dummy'], [ti.task_id for ti in dag_runs[0].get_task_instances()])
+        self.assertEqual(['dummy', 'later'],
+                         sorted(ti.task_id for ti in dag_runs[2].get_task_instances()))
+
+        last_date = DEFAULT_DATE + datetime.timedelta(days=2)
+        self.assertEqual(
+            {dag.dag_id: (3, last_date, last_date)},
+            scheduler._get_dag_run_stats([dag.dag_id]))
+
+        # max_active_runs is reached after two more runs
+        dag_runs = scheduler.create_dag_runs(dag, max_runs=10)
+        self.assertEqual([DEFAULT_DATE + datetime.timedelta(days=i) for i in (3, 4)],
+                         [dr.execution_date for dr in dag_runs])
+        self.assertEqual([], scheduler.create_dag_runs(dag, max_runs=10))
+        self.assertIsNone(scheduler.create_dag_run(dag))
+
     def test_dag_catchup_option(self):
         """
         Test to check that a DAG with catchup = False only schedules beginning now, not back to the start date
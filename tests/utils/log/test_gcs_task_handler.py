@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import mock
+import unittest
+
+from airflow.utils.log.gcs_task_handler import GCSTaskHandler
+
+
+class FakeGCSHook(object):
+    """
+    Keeps objects in memory and implements the subset of
+    GoogleCloudStorageHook used by GCSTaskHandler.
+    """
+    def __init__(self):
+        self.objects = {}
+        self.downloads = []
+
+    def exists(self, bucket, object):
+        return (bucket, object) in self.objects
+
+    def upload(self, bucket, object, filename):
+        with open(filename, 'rb') as f:
+            self.objects[(bucket, object)] = f.read()
+
+    def download(self, bucket, object, filename=None, offset=None, length=None):
+        self.downloads.append(object)
+        data = self.objects[(bucket, object)]
+        if offset is not None:
+            data = data[offset:offset + length]
+        return data
+
+    def compose(self, bucket, source_objects, destination_object):
+        self.objects[(bucket, destination_object)] = b''.join(
+            self.objects[(bucket, source)] for source in source_objects)
+
+    def delete(self, bucket, object, generation=None):
+        return self.objects.pop((bucket, object), None) is not None
+
+
+class TestGCSTaskHandler(unittest.TestCase):
+
+    def setUp(self):
+        super(TestGCSTaskHandler, self).setUp()
+        self.remote_log_location = 'gs://bucket/remote/log/location/1.log'
+        self.gcs_task_handler = GCSTaskHandler(
+            'local/log/location',
+            'gs://bucket/remote/log/location',
+            '{try_number}.log'
+        )
+        self.hook = FakeGCSHook()
+        self.gcs_task_handler._hook = self.hook
+
+    def test_write(self):
+        self.gcs_task_handler.gcs_write('text', self.remote_log_location)
+
+        self.assertEqual({('bucket', 'remote/log/location/1.log'): b'text'},
+                         self.hook.objects)
+
+    def test_write_existing_is_composed(self):
+        self.hook.objects[('bucket', 'remote/log/location/1.log')] = b'previous '
+        self.gcs_task_handler.gcs_write('text', self.remote_log_location)
+
+        # The previous log is never downloaded, and the temporary object
+        # holding the new log is removed after composing.
+        self.assertEqual([], self.hook.downloads)
+        self.assertEqual({('bucket', 'remote/log/location/1.log'): b'previous \ntext'},
+                         self.hook.objects)
+
+    def test_write_existing_falls_back_to_rewrite(self):
+        self.hook.objects[('bucket', 'remote/log/location/1.log')] = b'previous '
+        with mock.patch.object(self.hook, 'compose', side_effect=Exception('too many')):
+            self.gcs_task_handler.gcs_write('text', self.remote_log_location)
+
+        self.assertEqual({('bucket', 'remote/log/location/1.log'): b'previous \ntext'},
+                         self.hook.objects)
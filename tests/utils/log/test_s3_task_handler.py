@@ -114,9 +114,24 @@ class TestS3TaskHandler(unittest.TestCase):
         self.assertEqual(
             self.s3_task_handler.read(self.ti),
             (['*** Reading remote log from s3://bucket/remote/log/location/1.log.\n'
-             'Log line\n\n'], [{'end_of_log': True}])
+             'Log line\n'], [{'offset': 9, 'end_of_log': True}])
         )
 
+    def test_read_in_chunks(self):
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key,
+                             Body=b'First line\nSecond line\n')
+        with mock.patch.object(S3TaskHandler, '_get_chunk_size', return_value=16):
+            logs, metadatas = self.s3_task_handler.read(self.ti, 1)
+            self.assertEqual(
+                logs[0],
+                '*** Reading remote log from s3://bucket/remote/log/location/1.log.\n'
+                'First line\n')
+            self.assertEqual({'offset': 11, 'end_of_log': False}, metadatas[0])
+
+            logs, metadatas = self.s3_task_handler.read(self.ti, 1, metadatas[0])
+            self.assertEqual(logs[0], 'Second line\n')
+            self.assertEqual({'offset': 23, 'end_of_log': True}, metadatas[0])
+
     def test_read_when_s3_log_missing(self):
         log, metadata = self.s3_task_handler.read(self.ti)
 
@@ -146,9 +161,64 @@ class TestS3TaskHandler(unittest.TestCase):
     def test_write_existing(self):
         self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=b'previous ')
         self.s3_task_handler.s3_write('text', self.remote_log_location)
+
+        # The existing log is left untouched and the new log is uploaded
+        # as the next segment.
+        body = boto3.resource('s3').Object('bucket', self.remote_log_key).get()['Body'].read()
+        self.assertEqual(body, b'previous ')
+        body = boto3.resource('s3').Object(
+            'bucket', self.remote_log_key + '.1').get()['Body'].read()
+        self.assertEqual(body, b'\ntext')
+
+        self.assertEqual(self.s3_task_handler.s3_read(self.remote_log_location),
+                         'previous \ntext')
+
+    def test_write_existing_segments(self):
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=b'first')
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key + '.1', Body=b'\nsecond')
+        # Logs of other tries sharing the prefix are not segments of this log.
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key + '.bak', Body=b'other')
+        self.s3_task_handler.s3_write('third', self.remote_log_location)
+
+        self.assertEqual(self.s3_task_handler.s3_read(self.remote_log_location),
+                         'first\nsecond\nthird')
+
+    def test_read_range_across_segments(self):
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=b'first')
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key + '.1', Body=b'\nsecond')
+
+        data, size = self.s3_task_handler.s3_read_range(self.remote_log_location, 3, 5)
+        self.assertEqual(data, b'st\nse')
+        self.assertEqual(size, 12)
+
+    def test_write_no_append(self):
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=b'previous ')
+        self.s3_task_handler.s3_write('text', self.remote_log_location, append=False)
         body = boto3.resource('s3').Object('bucket', self.remote_log_key).get()['Body'].read()
 
-        self.assertEqual(body, b'previous \ntext')
+        self.assertEqual(body, b'text')
+
+    def test_write_no_append_existing_segments(self):
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=b'first')
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key + '.1', Body=b'\nsecond')
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key + '.bak', Body=b'other')
+        self.s3_task_handler.s3_write('text', self.remote_log_location, append=False)
+
+        # The segments of the overwritten log are not read back with it.
+        self.assertEqual(self.s3_task_handler.s3_read(self.remote_log_location), 'text')
+        keys = [obj['Key'] for obj in
+                self.conn.list_objects(Bucket='bucket')['Contents']]
+        self.assertEqual(sorted(keys), [self.remote_log_key, self.remote_log_key + '.bak'])
+
+    def test_write_existing_segments_other_url_form(self):
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key, Body=b'first')
+        self.conn.put_object(Bucket='bucket', Key=self.remote_log_key + '.1', Body=b'\nsecond')
+        # Locations the segments are not listed under are still appended to.
+        location = 's3://bucket//' + self.remote_log_key
+        self.s3_task_handler.s3_write('third', location)
+
+        self.assertEqual(self.s3_task_handler.s3_read(self.remote_log_location),
+                         'first\nsecond\nthird')
 
     def test_write_raises(self):
         handler = self.s3_task_handler
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import mock
+import unittest
+
+try:
+    from airflow.utils.log.wasb_task_handler import WasbTaskHandler
+except ImportError:
+    WasbTaskHandler = None
+
+
+class FakeBlobStore(object):
+    """
+    Keeps blobs in memory, behind the parts of WasbHook used by the handler.
+    """
+
+    def __init__(self):
+        self.blobs = {}
+        self.hook = mock.MagicMock()
+        self.hook.load_string.side_effect = self.load_string
+        self.hook.read_file.side_effect = self.read_file
+        self.hook.delete_file.side_effect = self.delete_file
+        self.hook.connection.list_blobs.side_effect = self.list_blobs
+        self.hook.connection.get_blob_to_bytes.side_effect = self.get_blob_to_bytes
+
+    def load_string(self, string_data, container_name, blob_name):
+        self.blobs[blob_name] = string_data.encode('utf-8')
+
+    def read_file(self, container_name, blob_name):
+        return self.blobs[blob_name].decode('utf-8')
+
+    def delete_file(self, container_name, blob_name, ignore_if_missing=False):
+        self.blobs.pop(blob_name, None)
+
+    def list_blobs(self, container_name, prefix=None):
+        blobs = []
+        for name, data in self.blobs.items():
+            if name.startswith(prefix):
+                blob = mock.Mock()
+                blob.name = name
+                blob.properties.content_length = len(data)
+                blobs.append(blob)
+        return blobs
+
+    def get_blob_to_bytes(self, container_name, blob_name, start_range, end_range):
+        return mock.Mock(content=self.blobs[blob_name][start_range:end_range + 1])
+
+
+@unittest.skipIf(WasbTaskHandler is None,
+                 "Skipping test because azure is not available")
+class TestWasbTaskHandler(unittest.TestCase):
+
+    def setUp(self):
+        super(TestWasbTaskHandler, self).setUp()
+        self.remote_log_location = 'remote/log/location/1.log'
+        self.wasb_task_handler = WasbTaskHandler(
+            'local/log/location',
+            'remote/log/location',
+            'container',
+            '{try_number}.log',
+            False,
+        )
+        self.store = FakeBlobStore()
+        self.wasb_task_handler._hook = self.store.hook
+
+    def test_write(self):
+        self.wasb_task_handler.wasb_write('text', self.remote_log_location)
+        self.assertEqual(self.store.blobs, {self.remote_log_location: b'text'})
+
+    def test_write_existing(self):
+        self.store.blobs[self.remote_log_location] = b'previous '
+        self.wasb_task_handler.wasb_write('text', self.remote_log_location)
+
+        # The existing log is left untouched and the new log is uploaded
+        # as the next segment.
+        self.assertEqual(self.store.blobs, {
+            self.remote_log_location: b'previous ',
+            self.remote_log_location + '.1': b'\ntext',
+        })
+        self.assertEqual(self.wasb_task_handler.wasb_read(self.remote_log_location),
+                         'previous \ntext')
+
+    def test_write_existing_segments(self):
+        self.store.blobs[self.remote_log_location] = b'first'
+        self.store.blobs[self.remote_log_location + '.1'] = b'\nsecond'
+        # Logs of other tries sharing the prefix are not segments of this log.
+        self.store.blobs[self.remote_log_location + '.bak'] = b'other'
+        self.wasb_task_handler.wasb_write('third', self.remote_log_location)
+
+        self.assertEqual(self.store.blobs[self.remote_log_location + '.2'], b'\nthird')
+        self.assertEqual(self.wasb_task_handler.wasb_read(self.remote_log_location),
+                         'first\nsecond\nthird')
+
+    def test_read_range_across_segments(self):
+        self.store.blobs[self.remote_log_location] = b'first'
+        self.store.blobs[self.remote_log_location + '.1'] = b'\nsecond'
+
+        data, size = self.wasb_task_handler.wasb_read_range(
+            self.remote_log_location, 3, 5)
+        self.assertEqual(data, b'st\nse')
+        self.assertEqual(size, 12)
+
+    def test_write_no_append(self):
+        self.store.blobs[self.remote_log_location] = b'first'
+        self.store.blobs[self.remote_log_location + '.1'] = b'\nsecond'
+        self.store.blobs[self.remote_log_location + '.bak'] = b'other'
+        self.wasb_task_handler.wasb_write('text', self.remote_log_location,
+                                          append=False)
+
+        # The segments of the overwritten log are not read back with it.
+        self.assertEqual(self.store.blobs, {
+            self.remote_log_location: b'text',
+            self.remote_log_location + '.bak': b'other',
+        })
+        self.assertEqual(self.wasb_task_handler.wasb_read(self.remote_log_location),
+                         'text')
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import unittest
+
+from airflow import configuration as conf
+from airflow.utils.configuration import (cached_configuration_copy,
+                                         is_configuration_snapshot,
+                                         tmp_configuration_copy)
+
+
+class TestCachedConfigurationCopy(unittest.TestCase):
+    def test_snapshot_reused_while_unchanged(self):
+        cfg_path = cached_configuration_copy()
+        self.assertTrue(is_configuration_snapshot(cfg_path))
+        self.assertEqual(cfg_path, cached_configuration_copy())
+        self.assertEqual(0o600, os.stat(cfg_path).st_mode & 0o777)
+        with open(cfg_path) as cfg_file:
+            cfg_dict = json.load(cfg_file)
+        self.assertEqual(conf.get('core', 'dags_folder'), cfg_dict['core']['dags_folder'])
+
+        tmp_path = tmp_configuration_copy()
+        try:
+            self.assertFalse(is_configuration_snapshot(tmp_path))
+        finally:
+            os.remove(tmp_path)
+
+    def test_snapshot_follows_changes(self):
+        cfg_path = cached_configuration_copy()
+
+        parallelism = conf.get('core', 'parallelism')
+        conf.set('core', 'parallelism', '1234')
+        try:
+            changed_path = cached_configuration_copy()
+        finally:
+            conf.set('core', 'parallelism', parallelism)
+        self.assertNotEqual(cfg_path, changed_path)
+        with open(changed_path) as cfg_file:
+            self.assertEqual('1234', json.load(cfg_file)['core']['parallelism'])
+
+        os.environ['AIRFLOW__CORE__PARALLELISM'] = '4321'
+        try:
+            self.assertNotIn(cached_configuration_copy(), (cfg_path, changed_path))
+        finally:
+            del os.environ['AIRFLOW__CORE__PARALLELISM']
+        self.assertEqual(cfg_path, cached_configuration_copy())
@@ -18,21 +18,23 @@
 # under the License.
 
 import os
+import shutil
 import sys
 import tempfile
 import unittest
 from datetime import timedelta
 
-from mock import MagicMock
+from mock import MagicMock, patch
 
 from airflow import configuration as conf
 from airflow.configuration import mkdir_p
 from airflow.jobs import DagFileProcessor
 from airflow.jobs import LocalTaskJob as LJ
 from airflow.models import DagBag, TaskInstance as TI
-from airflow.utils import timezone
+from airflow.utils import dag_processing, timezone
 from airflow.utils.dag_processing import (DagFileProcessorAgent, DagFileProcessorManager,
-                                          SimpleTaskInstance)
+                                          SimpleDag, SimpleTaskInstance,
+                                          list_py_file_paths)
 from airflow.utils.db import create_session
 from airflow.utils.state import State
 
@@ -132,6 +134,54 @@ class settings_context(object):
         sys.path.remove(self.settings_root)
 
 
+class TestListPyFilePaths(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, file_name, content):
+        file_path = os.path.join(self.directory, file_name)
+        with open(file_path, 'w') as f:
+            f.write(content)
+        return file_path
+
+    def test_heuristic_reads_by_chunks(self):
+        padding = ' ' * (dag_processing._HEURISTIC_CHUNK_SIZE - 3)
+        # The words are split over two chunks
+        split = self.write('split.py', '# ' + padding + 'airflow DAG')
+        no_dag = self.write('no_dag.py', '# ' + padding + 'airflow')
+        self.write('.airflowignore', 'ignored')
+        self.write('ignored.py', 'airflow DAG')
+        self.write('notes.txt', 'airflow DAG')
+
+        self.assertEqual([split], list_py_file_paths(self.directory, include_examples=False))
+        self.assertEqual(
+            sorted([split, no_dag]),
+            sorted(list_py_file_paths(self.directory, safe_mode=False,
+                                      include_examples=False)))
+
+    def test_examined_files_are_cached(self):
+        file_path = self.write('dag.py', 'from airflow import DAG')
+        self.assertEqual([file_path], list_py_file_paths(self.directory,
+                                                         include_examples=False))
+
+        with patch('airflow.utils.dag_processing._file_contains_words') as contains:
+            self.assertEqual([file_path], list_py_file_paths(self.directory,
+                                                             include_examples=False))
+            contains.assert_not_called()
+
+        # The file is examined again once modified
+        self.write('dag.py', 'import os')
+        os.utime(file_path, (0, 0))
+        self.assertEqual([], list_py_file_paths(self.directory, include_examples=False))
+
+        os.remove(file_path)
+        list_py_file_paths(self.directory, include_examples=False)
+        self.assertNotIn(file_path, dag_processing._examined_files)
+
+
 class TestDagFileProcessorManager(unittest.TestCase):
     def test_set_file_paths_when_processor_file_path_not_in_new_file_paths(self):
         manager = DagFileProcessorManager(
@@ -214,6 +264,97 @@ class TestDagFileProcessorManager(unittest.TestCase):
             session.query(TI).delete()
             session.query(LJ).delete()
 
+    def test_reap_zombies(self):
+        manager = DagFileProcessorManager(
+            dag_directory='directory',
+            file_paths=['abc.txt'],
+            max_runs=1,
+            processor_factory=MagicMock().return_value,
+            signal_conn=MagicMock(),
+            stat_queue=MagicMock(),
+            result_queue=MagicMock,
+            async_mode=True)
+        dagbag = DagBag(TEST_DAG_FOLDER)
+        for dag_id in ['example_branch_operator', 'test_example_bash_operator']:
+            manager._dag_id_to_file_path[dag_id] = 'abc.txt'
+            manager._simple_dags[dag_id] = SimpleDag(dagbag.get_dag(dag_id))
+
+        with create_session() as session:
+            session.query(TI).delete()
+            tis = []
+            for dag_id, task_id, max_tries in [
+                # Retries left
+                ('test_example_bash_operator', 'runme_0', 3),
+                # Cleared once, but without retries
+                ('example_branch_operator', 'run_this_first', 1),
+                # Not found by a processor yet
+                ('example_bash_operator', 'runme_0', 0),
+            ]:
+                task = dagbag.get_dag(dag_id).get_task(task_id=task_id)
+                ti = TI(task, DEFAULT_DATE, State.RUNNING)
+                ti.try_number = 1
+                ti.max_tries = max_tries
+                session.add(ti)
+                tis.append(ti)
+            session.commit()
+            zombies = [SimpleTaskInstance(ti) for ti in tis]
+
+            manager._reap_zombies(zombies)
+            for ti in tis:
+                ti.refresh_from_db(session=session)
+            self.assertEqual(State.UP_FOR_RETRY, tis[0].state)
+            self.assertEqual(State.FAILED, tis[1].state)
+            self.assertEqual(State.RUNNING, tis[2].state)
+            self.assertEqual(zombies[:2], manager._zombies_by_file['abc.txt'])
+            self.assertEqual([State.UP_FOR_RETRY, State.FAILED],
+                             [zombie.state for zombie in zombies[:2]])
+
+            # The zombies are no longer running and are not handled again
+            manager._reap_zombies(zombies)
+            self.assertEqual(2, len(manager._zombies_by_file['abc.txt']))
+
+            session.query(TI).delete()
+
+    def test_reap_zombies_of_paused_dags(self):
+        manager = DagFileProcessorManager(
+            dag_directory='directory',
+            file_paths=['abc.txt'],
+            max_runs=1,
+            processor_factory=MagicMock().return_value,
+            signal_conn=MagicMock(),
+            stat_queue=MagicMock(),
+            result_queue=MagicMock,
+            async_mode=True)
+        dagbag = DagBag(TEST_DAG_FOLDER)
+        dag = dagbag.get_dag('example_branch_operator')
+        simple_dag = SimpleDag(dag)
+        simple_dag._is_paused = True
+
+        mock_processor = MagicMock()
+        mock_processor.done = True
+        mock_processor.start_time = timezone.utcnow()
+        mock_processor.result = [simple_dag]
+        manager._processors['abc.txt'] = mock_processor
+
+        # The paused DAG is not scheduled, but its zombies are handled
+        self.assertEqual([], manager.heartbeat())
+
+        with create_session() as session:
+            session.query(TI).delete()
+            task = dag.get_task(task_id='run_this_first')
+            ti = TI(task, DEFAULT_DATE, State.RUNNING)
+            ti.try_number = 1
+            session.add(ti)
+            session.commit()
+            zombies = [SimpleTaskInstance(ti)]
+
+            manager._reap_zombies(zombies)
+            ti.refresh_from_db(session=session)
+            self.assertEqual(State.FAILED, ti.state)
+            self.assertEqual(zombies, manager._zombies_by_file['abc.txt'])
+
+            session.query(TI).delete()
+
 
 class TestDagFileProcessorAgent(unittest.TestCase):
     def test_reload_module(self):
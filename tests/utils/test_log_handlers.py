@@ -17,10 +17,14 @@
 # specific language governing permissions and limitations
 # under the License.
 
+import io
 import logging
 import logging.config
 import os
+import shutil
+import tempfile
 import unittest
+import mock
 import six
 
 from airflow.models import TaskInstance, DAG, DagRun
@@ -160,6 +164,81 @@ class TestFileTaskLogHandler(unittest.TestCase):
         # Remove the generated tmp log file.
         os.remove(log_filename)
 
+    def test_file_task_handler_read_in_chunks(self):
+        dag = DAG('dag_for_testing_file_task_handler', start_date=DEFAULT_DATE)
+        task = DummyOperator(task_id='task_for_testing_file_log_handler', dag=dag)
+        ti = TaskInstance(task=task, execution_date=DEFAULT_DATE)
+        ti.try_number = 1
+        ti.state = State.SUCCESS
+
+        log_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_folder)
+        file_handler = FileTaskHandler(log_folder, '{try_number}.log')
+        location = os.path.join(log_folder, '1.log')
+        with open(location, 'w') as f:
+            f.write('line one\nline two\nline three\n')
+
+        with mock.patch.object(FileTaskHandler, '_get_chunk_size', return_value=20):
+            logs, metadatas = file_handler.read(ti, 1)
+            self.assertEqual(
+                '*** Reading local file: {}\nline one\nline two\n'.format(location),
+                logs[0])
+            self.assertEqual({'offset': 18, 'end_of_log': False}, metadatas[0])
+
+            logs, metadatas = file_handler.read(ti, 1, metadatas[0])
+            self.assertEqual('line three\n', logs[0])
+            self.assertEqual({'offset': 29, 'end_of_log': True}, metadatas[0])
+
+    def test_file_task_handler_read_running_does_not_end(self):
+        dag = DAG('dag_for_testing_file_task_handler', start_date=DEFAULT_DATE)
+        task = DummyOperator(task_id='task_for_testing_file_log_handler', dag=dag)
+        ti = TaskInstance(task=task, execution_date=DEFAULT_DATE)
+        ti.try_number = 1
+        ti.state = State.RUNNING
+
+        log_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_folder)
+        file_handler = FileTaskHandler(log_folder, '{try_number}.log')
+        with open(os.path.join(log_folder, '1.log'), 'w') as f:
+            f.write('complete line\npartial')
+
+        logs, metadatas = file_handler.read(ti, 1)
+        # Partial lines are held back until they are complete.
+        self.assertTrue(logs[0].endswith('complete line\n'))
+        self.assertEqual({'offset': 14, 'end_of_log': False}, metadatas[0])
+
+        logs, metadatas = file_handler.read(ti, 1, metadatas[0])
+        self.assertEqual('partial', logs[0])
+        self.assertFalse(metadatas[0]['end_of_log'])
+
+    def test_file_task_handler_read_long_line_in_chunks(self):
+        dag = DAG('dag_for_testing_file_task_handler', start_date=DEFAULT_DATE)
+        task = DummyOperator(task_id='task_for_testing_file_log_handler', dag=dag)
+        ti = TaskInstance(task=task, execution_date=DEFAULT_DATE)
+        ti.try_number = 1
+        ti.state = State.SUCCESS
+
+        log_folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_folder)
+        file_handler = FileTaskHandler(log_folder, '{try_number}.log')
+        content = u'long line \u00e9\u00e9\u00e9\nend\n'
+        with io.open(os.path.join(log_folder, '1.log'), 'w', encoding='utf-8') as f:
+            f.write(content)
+
+        # Lines longer than a chunk are split, but never within a character,
+        # and the chunks put back together are the log.
+        chunks = []
+        metadata = {}
+        with mock.patch.object(FileTaskHandler, '_get_chunk_size', return_value=12):
+            while not metadata.get('end_of_log'):
+                logs, metadatas = file_handler.read(ti, 1, metadata)
+                metadata = metadatas[0]
+                chunks.append(logs[0])
+        self.assertTrue(chunks[0].startswith('*** Reading local file'))
+        chunks[0] = chunks[0].split('\n', 1)[1]
+        self.assertEqual(content, ''.join(chunks))
+        self.assertNotIn(u'\ufffd', ''.join(chunks))
+
 
 class TestFilenameRendering(unittest.TestCase):
 
@@ -148,6 +148,22 @@ class UtilsTest(unittest.TestCase):
         (args, kwargs) = instance.open.call_args_list[0]
         self.assertEqual('deep/path/to/file.txt', args[0])
 
+    @mock.patch('airflow.www.utils.time')
+    def test_ttl_cached(self, mock_time):
+        compute = mock.Mock(side_effect=[1, 2])
+        mock_time.time.return_value = 100
+        self.assertEqual(1, utils.ttl_cached('test_ttl_cached', 5, compute))
+        mock_time.time.return_value = 104
+        self.assertEqual(1, utils.ttl_cached('test_ttl_cached', 5, compute))
+        mock_time.time.return_value = 105
+        self.assertEqual(2, utils.ttl_cached('test_ttl_cached', 5, compute))
+        self.assertEqual(2, compute.call_count)
+
+    def test_ttl_cached_disabled(self):
+        compute = mock.Mock(side_effect=[1, 2])
+        self.assertEqual(1, utils.ttl_cached('test_ttl_cached_disabled', 0, compute))
+        self.assertEqual(2, utils.ttl_cached('test_ttl_cached_disabled', 0, compute))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -45,6 +45,7 @@ from airflow.operators.dummy_operator import DummyOperator
 from airflow.settings import Session
 from airflow.utils import dates, timezone
 from airflow.utils.db import create_session
+from airflow.utils.log.file_task_handler import FileTaskHandler
 from airflow.utils.state import State
 from airflow.utils.timezone import datetime
 from airflow.www import app as application
@@ -455,6 +456,27 @@ class TestAirflowBaseViews(TestBase):
         resp = self.client.get(url, follow_redirects=True)
         self.check_content_in_response('example_bash_operator', resp)
 
+    def test_duration_cached_until_task_instances_change(self):
+        url = 'duration?days=30&dag_id=example_bash_operator'
+
+        def finish(task_id, duration):
+            ti = self.bash_dagrun.get_task_instance(task_id, session=self.session)
+            ti.state = State.SUCCESS
+            ti.duration = duration
+            ti.end_date = timezone.utcnow()
+            self.session.merge(ti)
+            self.session.commit()
+
+        with mock.patch('airflow.www.views.CHART_CACHE_TTL', 60):
+            finish('runme_0', 10)
+            resp = self.client.get(url, follow_redirects=True)
+            self.check_content_in_response('"runme_0"', resp)
+            self.check_content_not_in_response('"runme_1"', resp)
+
+            finish('runme_1', 20)
+            resp = self.client.get(url, follow_redirects=True)
+            self.check_content_in_response('"runme_1"', resp)
+
     def test_duration_missing(self):
         url = 'duration?days=30&dag_id=missing_dag'
         resp = self.client.get(url, follow_redirects=True)
@@ -517,6 +539,21 @@ class TestAirflowBaseViews(TestBase):
         resp = self.client.get('refresh?dag_id=example_bash_operator')
         self.check_content_in_response('', resp, resp_code=302)
 
+    @mock.patch('airflow.www.views.dagbag')
+    def test_refresh_all(self, mock_dagbag):
+        resp = self.client.get('refresh_all')
+        self.check_content_in_response('', resp, resp_code=302)
+        mock_dagbag.collect_dags.assert_called_once_with(only_if_updated=False)
+        mock_dagbag.collect_dags_from_db.assert_not_called()
+
+    @mock.patch('airflow.www.views.dagbag')
+    def test_refresh_all_serialized_dags(self, mock_dagbag):
+        with mock.patch.object(settings, 'STORE_SERIALIZED_DAGS', True):
+            resp = self.client.get('refresh_all')
+        self.check_content_in_response('', resp, resp_code=302)
+        mock_dagbag.collect_dags_from_db.assert_called_once_with()
+        mock_dagbag.collect_dags.assert_not_called()
+
     def test_delete_dag_button_normal(self):
         resp = self.client.get('/', follow_redirects=True)
         self.check_content_in_response('/delete?dag_id=example_bash_operator', resp)
@@ -664,6 +701,24 @@ class TestLogView(TestBase):
         self.assertEqual(200, response.status_code)
         self.assertIn('Log for testing.', response.data.decode('utf-8'))
 
+    def test_get_logs_with_metadata_as_download_file_in_chunks(self):
+        url_template = "get_logs_with_metadata?dag_id={}&" \
+                       "task_id={}&execution_date={}&" \
+                       "try_number={}&metadata={}&format=file"
+        url = url_template.format(self.DAG_ID,
+                                  self.TASK_ID,
+                                  quote_plus(self.DEFAULT_DATE.isoformat()),
+                                  1,
+                                  json.dumps({}))
+        # Chunks end mid-line, they are put back together as they are
+        with mock.patch.object(FileTaskHandler, '_get_chunk_size', return_value=5):
+            response = self.client.get(url)
+
+        self.assertEqual(200, response.status_code)
+        data = response.data.decode('utf-8')
+        self.assertTrue(data.startswith('*** Reading local file: '))
+        self.assertEqual('Log for testing.\n', data.split('\n', 1)[1])
+
     def test_get_logs_with_metadata(self):
         url_template = "get_logs_with_metadata?dag_id={}&" \
                        "task_id={}&execution_date={}&" \